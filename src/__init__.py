@@ -1,5 +1,16 @@
-from .core.anonymiser import Anonymiser
-from .main import create_dummy_files
-
 __version__ = "0.1.0"
 __all__ = ["Anonymiser", "create_dummy_files"]
+
+
+def __getattr__(name: str):
+    # Loaded on first access, so importing Clanto (e.g. for `clanto --help`)
+    # does not import pandas
+    if name == "Anonymiser":
+        from .core.anonymiser import Anonymiser
+
+        return Anonymiser
+    if name == "create_dummy_files":
+        from .example.dummy_gen import create_dummy_files
+
+        return create_dummy_files
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,125 @@
+"""Times the free-text scanner of the detection rules on long cells"""
+
+import argparse
+import json
+import statistics
+import time
+from collections.abc import Callable
+
+import pandas as pd
+
+from ..core.rules import RuleEngine
+from .generator import generate_notes
+
+
+def full_scan(rules: RuleEngine, values: pd.Series) -> list[list[tuple[int, int]]]:
+    """
+    Runs the combined detector over every cell, as before the prefilters.
+
+    :param rules: Detection rules
+    :type rules: RuleEngine
+    :param values: Cells to scan
+    :type values: pd.Series
+    :return: Spans found in every cell
+    :rtype: list[list[tuple[int, int]]]
+    """
+    return [[m.span() for m in rules.detector.finditer(value)] for value in values]
+
+
+def _median_seconds(run: Callable[[], list], repeat: int) -> tuple[float, list]:
+    timings = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def run_benchmark(
+    cells: int = 2_000,
+    words: int = 600,
+    pii_density: float = 0.1,
+    repeat: int = 3,
+    seed: int = 0,
+) -> dict:
+    """
+    Times ``RuleEngine.scan`` against a full scan of every cell.
+
+    :param cells: Number of cells, defaults to 2,000
+    :type cells: int, optional
+    :param words: Words per cell (600 words are about 4 KB), defaults to 600
+    :type words: int, optional
+    :param pii_density: Share of the cells embedding a token, defaults to 0.1
+    :type pii_density: float, optional
+    :param repeat: Runs per scanner (median reported), defaults to 3
+    :type repeat: int, optional
+    :param seed: Seed of the generator, defaults to 0
+    :type seed: int, optional
+    :raises AssertionError: If both scanners do not find the same tokens
+    :return: The report
+    :rtype: dict
+    """
+    values = generate_notes(cells, words, pii_density, seed)
+    megabytes = values.str.len().sum() / 1e6
+    rules = RuleEngine()
+
+    full_s, full = _median_seconds(lambda: full_scan(rules, values), repeat)
+    scan_s, scanned = _median_seconds(lambda: rules.scan(values), repeat)
+    assert full == [[(start, end) for start, end, _ in s] for s in scanned]
+
+    return {
+        "cells": cells,
+        "mean_cell_bytes": round(megabytes * 1e6 / cells),
+        "cells_with_tokens": sum(map(bool, scanned)),
+        "seconds": {"full_scan": full_s, "scan": scan_s},
+        "mb_per_second": {
+            "full_scan": megabytes / full_s if full_s else None,
+            "scan": megabytes / scan_s if scan_s else None,
+        },
+        "speedup": full_s / scan_s if scan_s else None,
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    """
+    Command line entry point: ``python -m src.benchmark.free_text``.
+
+    :param argv: Arguments, defaults to ``sys.argv``
+    :type argv: list[str] | None, optional
+    :return: The report
+    :rtype: dict
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the free-text scanner on long cells."
+    )
+    parser.add_argument("--cells", type=int, default=2_000, help="Number of cells.")
+    parser.add_argument(
+        "--words", type=int, default=600, help="Words per cell (600 is about 4 KB)."
+    )
+    parser.add_argument(
+        "--pii-density",
+        type=float,
+        default=0.1,
+        help="Share of the cells embedding an email or phone number.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per scanner (median reported)."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generator.")
+    parser.add_argument(
+        "--report", default=None, help="Also save the report to this JSON file."
+    )
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        args.cells, args.words, args.pii_density, args.repeat, args.seed
+    )
+    print(json.dumps(report, indent=4))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+    return report
+
+
+if __name__ == "__main__":
+    main()
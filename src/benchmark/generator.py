@@ -0,0 +1,210 @@
+"""Scalable synthetic data generator for Clanto's benchmarks"""
+
+import os
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+from ..core.base_reader import ClantoFile
+from ..discovery.utils import save_non_db
+
+PII_KINDS = ("name", "email", "phone", "text")
+"""Column kinds holding identifiable values"""
+PLAIN_KINDS = ("integer", "amount", "date", "code")
+"""Column kinds Clanto should leave untouched"""
+
+_FIRST_NAMES = np.array(
+    ["Alice", "Bob", "Carmen", "David", "Eve", "Farid", "Grace", "Hugo", "Ines", "Jun"]
+)
+_LAST_NAMES = np.array(
+    ["Smith", "Garcia", "Chen", "Okafor", "Novak", "Rossi", "Kim", "Silva", "Ivanova"]
+)
+_DOMAINS = np.array(["example.com", "mail.org", "corp.net", "domain.io"])
+_WORDS = np.array(
+    [
+        "order",
+        "delivered",
+        "customer",
+        "called",
+        "about",
+        "invoice",
+        "refund",
+        "please",
+        "contact",
+        "support",
+        "ticket",
+        "update",
+    ]
+)
+
+
+@dataclass
+class DatasetSpec:
+    """Shape of a synthetic dataset."""
+
+    rows: int = 10_000
+    """Rows per file"""
+    columns: int = 8
+    """Columns per file"""
+    cardinality: int = 1_000
+    """Distinct values per identifiable column"""
+    pii_density: float = 0.5
+    """Share of the columns holding identifiable values, and share of the
+    free-text cells embedding an email or phone number"""
+    text_words: int = 12
+    """Words per free-text cell"""
+    file_format: str = "csv"
+    """``csv``, ``xlsx``, ``parquet`` or ``arrow``"""
+    files: int = 1
+    """Number of files"""
+    seed: int = 0
+    """Seed of the generator"""
+
+    def as_dict(self) -> dict:
+        """Spec as a plain dict, for reports."""
+        return asdict(self)
+
+
+def column_kinds(spec: DatasetSpec) -> list[str]:
+    """
+    Kinds of the columns of a dataset, identifiable ones first.
+
+    :param spec: Dataset spec
+    :type spec: DatasetSpec
+    :return: One kind from ``PII_KINDS`` or ``PLAIN_KINDS`` per column
+    :rtype: list[str]
+    """
+    n_pii = min(spec.columns, round(spec.columns * spec.pii_density))
+    return [PII_KINDS[i % len(PII_KINDS)] for i in range(n_pii)] + [
+        PLAIN_KINDS[i % len(PLAIN_KINDS)] for i in range(spec.columns - n_pii)
+    ]
+
+
+def _pool(
+    kind: str, size: int, spec: DatasetSpec, rng: np.random.Generator
+) -> np.ndarray:
+    """Distinct values of an identifiable column"""
+    i = np.arange(size)
+    if kind == "name":
+        firsts = rng.choice(_FIRST_NAMES, size)
+        lasts = rng.choice(_LAST_NAMES, size)
+        return np.array(
+            [f"{first} {last} {n}" for first, last, n in zip(firsts, lasts, i)],
+            dtype=object,
+        )
+    if kind == "email":
+        domains = rng.choice(_DOMAINS, size)
+        return np.array([f"user{n}@{d}" for n, d in zip(i, domains)], dtype=object)
+    if kind == "phone":
+        return np.array([f"+34 6{n % 100:02d}-{n // 100:06d}" for n in i], dtype=object)
+
+    words = rng.choice(_WORDS, (size, spec.text_words))
+    texts = [" ".join(row) for row in words]
+    embeds = rng.random(size) < spec.pii_density
+    return np.array(
+        [
+            f"{text} user{n}@{_DOMAINS[n % len(_DOMAINS)]}" if embed else text
+            for n, text, embed in zip(i, texts, embeds)
+        ],
+        dtype=object,
+    )
+
+
+def generate_frame(spec: DatasetSpec, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Generates one table following ``spec``.
+
+    Identifiable columns draw their cells from a pool of ``cardinality``
+    distinct values; the other columns are numbers, dates and digit codes.
+
+    :param spec: Dataset spec
+    :type spec: DatasetSpec
+    :param rng: Random generator
+    :type rng: np.random.Generator
+    :return: The table
+    :rtype: pd.DataFrame
+    """
+    data = {}
+    for position, kind in enumerate(column_kinds(spec)):
+        name = f"{kind}_{position}"
+        if kind in PII_KINDS:
+            pool = _pool(kind, max(1, spec.cardinality), spec, rng)
+            data[name] = pool.take(rng.integers(0, len(pool), spec.rows))
+        elif kind == "integer":
+            data[name] = rng.integers(0, 1_000_000, spec.rows)
+        elif kind == "amount":
+            data[name] = np.round(rng.random(spec.rows) * 1_000, 2)
+        elif kind == "date":
+            data[name] = pd.Timestamp("2020-01-01") + pd.to_timedelta(
+                rng.integers(0, 1_500, spec.rows), unit="D"
+            )
+        else:
+            data[name] = np.char.zfill(
+                rng.integers(0, 100_000, spec.rows).astype(str), 6
+            ).astype(object)
+    return pd.DataFrame(data)
+
+
+def generate_dataset(spec: DatasetSpec, directory: str) -> list[str]:
+    """
+    Writes a synthetic dataset to a directory.
+
+    :param spec: Dataset spec
+    :type spec: DatasetSpec
+    :param directory: Output directory, created if needed
+    :type directory: str
+    :return: Paths of the written files
+    :rtype: list[str]
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(spec.seed)
+
+    paths = []
+    for i in range(spec.files):
+        path = os.path.join(directory, f"synthetic_{i}.{spec.file_format}")
+        save_non_db(ClantoFile(path, generate_frame(spec, rng)))
+        paths.append(path)
+    return paths
+
+
+def generate_notes(
+    cells: int, words: int, pii_density: float, seed: int = 0
+) -> pd.Series:
+    """
+    Generates a free-text column: long notes of words, amounts, dates and
+    order codes, a share of them embedding an email or a phone number.
+
+    :param cells: Number of cells
+    :type cells: int
+    :param words: Words per cell
+    :type words: int
+    :param pii_density: Share of the cells embedding an email or phone number
+    :type pii_density: float
+    :param seed: Seed of the generator, defaults to 0
+    :type seed: int, optional
+    :return: The notes
+    :rtype: pd.Series
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.concatenate(
+        [
+            np.repeat(_WORDS, 20),
+            [f"ORD-{n:04d}" for n in range(0, 10_000, 997)],
+            [f"{n / 100:.2f}" for n in range(0, 100_000, 9_973)],
+            ["2024-03-01", "2023-11-15", "2025-01-07"],
+        ]
+    ).astype(object)
+    embeds = rng.random(cells) < pii_density
+    notes = []
+    for n, (row, embed) in enumerate(
+        zip(rng.choice(vocabulary, (cells, words)), embeds)
+    ):
+        if embed:
+            row[rng.integers(words)] = (
+                f"user{n}@{_DOMAINS[n % len(_DOMAINS)]}"
+                if n % 2
+                else f"+34 6{n % 100:02d} {n // 100 % 1_000:03d} {n % 10_000:04d}"
+            )
+        notes.append(" ".join(row))
+    return pd.Series(notes, dtype=object, name="notes")
@@ -0,0 +1,284 @@
+"""Times Clanto's pipeline stages on synthetic datasets and writes a JSON report"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+from .. import __version__
+from ..core.anonymiser import Anonymiser
+from ..discovery.lookup import FileManager
+from .generator import DatasetSpec, generate_dataset
+
+METHODS = ("random_chars", "random_words", "custom_mapping")
+"""Anonymisation methods benchmarked by default"""
+
+
+def _timed(obj: object, name: str, timings: dict[str, float], stage: str) -> None:
+    """Wraps ``obj.name`` so the time spent in it is added to ``timings[stage]``"""
+    method = getattr(obj, name)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+    setattr(obj, name, wrapper)
+
+
+def _measure(run: Callable[[dict[str, float]], None]) -> dict[str, float]:
+    timings: dict[str, float] = {}
+    start = time.perf_counter()
+    run(timings)
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def build_template(input_dir: str, output_dir: str) -> tuple[dict, dict[str, float]]:
+    """
+    Times ``gen_map_template`` and fills the template it returns.
+
+    The template is written to the output directory: the user's
+    mapping_template.clason is never touched.
+
+    :param input_dir: Dataset directory
+    :type input_dir: str
+    :param output_dir: Scratch output directory
+    :type output_dir: str
+    :return: Filled template (every value mapped to a fixed token) and timings
+    :rtype: tuple[dict, dict[str, float]]
+    """
+    manager = FileManager(input_dir, output_dir)
+    anonymiser = Anonymiser(manager, output_dir, "custom_mapping", make_mapping=True)
+    path = os.path.join(output_dir, "mapping_template.clason")
+
+    timings = _measure(lambda _: anonymiser.gen_map_template(path))
+    with open(path, encoding="utf-8") as f:
+        template = {value: f"MAPPED_{i}" for i, value in enumerate(json.load(f))}
+    return template, {"gen_map_template": timings["total"]}
+
+
+def run_method(
+    method: str, input_dir: str, output_dir: str, template: dict
+) -> tuple[dict[str, float], int]:
+    """
+    Times a full anonymisation run with one method.
+
+    ``anonymise_files`` includes saving the outputs; the time spent in the
+    manager's ``save_files`` is reported as ``save`` and left out of
+    ``anonymise``.
+
+    :param method: Anonymisation method
+    :type method: str
+    :param input_dir: Dataset directory
+    :type input_dir: str
+    :param output_dir: Output directory, emptied first
+    :type output_dir: str
+    :param template: Filled template used by ``custom_mapping``
+    :type template: dict
+    :return: Seconds per stage, and the number of mapping entries
+    :rtype: tuple[dict[str, float], int]
+    """
+    shutil.rmtree(output_dir, ignore_errors=True)
+    random.seed(0)
+    state = {}
+
+    def _run(timings: dict[str, float]) -> None:
+        start = time.perf_counter()
+        manager = FileManager(input_dir, output_dir)
+        timings["load"] = time.perf_counter() - start
+
+        # Built as random_chars so the user's .clason files are not loaded:
+        # custom_mapping uses the template of this benchmark instead
+        anonymiser = Anonymiser(manager, output_dir, "random_chars")
+        anonymiser.anonymisation_method = method
+        if method == "custom_mapping":
+            anonymiser.mapping_manager.use_templates(map_template=template)
+        anonymiser.mapping_manager.save_files = lambda: None
+        _timed(manager, "save_files", timings, "save")
+
+        start = time.perf_counter()
+        anonymiser.anonymise_files()
+        timings["anonymise"] = time.perf_counter() - start - timings.get("save", 0.0)
+        state["entries"] = len(anonymiser.mapping)
+
+    return _measure(_run), state["entries"]
+
+
+def run_benchmark(
+    spec: DatasetSpec,
+    methods: tuple[str, ...] = METHODS,
+    repeat: int = 1,
+    workdir: str | None = None,
+) -> dict:
+    """
+    Generates a dataset and times every stage for every method.
+
+    :param spec: Dataset spec
+    :type spec: DatasetSpec
+    :param methods: Methods to benchmark, defaults to METHODS
+    :type methods: tuple[str, ...], optional
+    :param repeat: Runs per method; the median of every stage is reported, defaults to 1
+    :type repeat: int, optional
+    :param workdir: Directory for the dataset and outputs, defaults to a temporary one
+    :type workdir: str | None, optional
+    :return: Report entry of the dataset
+    :rtype: dict
+    """
+    cleanup = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="clanto_bench_")
+    input_dir = os.path.join(workdir, "input")
+    output_dir = os.path.join(workdir, "output")
+
+    try:
+        start = time.perf_counter()
+        paths = generate_dataset(spec, input_dir)
+        generate_s = time.perf_counter() - start
+        input_bytes = sum(os.path.getsize(path) for path in paths)
+
+        template, template_timings = build_template(input_dir, output_dir)
+        results = []
+        for method in methods:
+            runs = [
+                run_method(method, input_dir, output_dir, template)
+                for _ in range(max(1, repeat))
+            ]
+            stages = {
+                stage: statistics.median(timings.get(stage, 0.0) for timings, _ in runs)
+                for stage in ("load", "anonymise", "save", "total")
+            }
+            cells = spec.rows * spec.columns * spec.files
+            results.append(
+                {
+                    "method": method,
+                    "seconds": stages,
+                    "cells_per_second": (
+                        cells / stages["total"] if stages["total"] else None
+                    ),
+                    "mapping_entries": runs[0][1],
+                }
+            )
+    finally:
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "dataset": spec.as_dict(),
+        "input_bytes": input_bytes,
+        "generate_seconds": generate_s,
+        "template_seconds": template_timings,
+        "template_entries": len(template),
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    """
+    Command line entry point: ``python -m src.benchmark``.
+
+    :param argv: Arguments, defaults to ``sys.argv``
+    :type argv: list[str] | None, optional
+    :return: The report
+    :rtype: dict
+    """
+    defaults = DatasetSpec()
+    parser = argparse.ArgumentParser(
+        description="Benchmark Clanto on synthetic datasets."
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[defaults.rows],
+        help="Rows per file (one dataset per value).",
+    )
+    parser.add_argument(
+        "--columns", type=int, default=defaults.columns, help="Columns per file."
+    )
+    parser.add_argument(
+        "--cardinality",
+        type=int,
+        default=defaults.cardinality,
+        help="Distinct values per identifiable column.",
+    )
+    parser.add_argument(
+        "--pii-density",
+        type=float,
+        default=defaults.pii_density,
+        help="Share of identifiable columns and of free-text cells embedding PII.",
+    )
+    parser.add_argument(
+        "--text-words",
+        type=int,
+        default=defaults.text_words,
+        help="Words per free-text cell.",
+    )
+    parser.add_argument(
+        "--format",
+        dest="file_format",
+        default=defaults.file_format,
+        choices=["csv", "xlsx", "parquet", "arrow"],
+        help="File format of the dataset.",
+    )
+    parser.add_argument(
+        "--files", type=int, default=defaults.files, help="Number of files."
+    )
+    parser.add_argument(
+        "--seed", type=int, default=defaults.seed, help="Seed of the generator."
+    )
+    parser.add_argument(
+        "--methods",
+        nargs="+",
+        default=list(METHODS),
+        choices=list(METHODS),
+        help="Methods to benchmark.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Runs per method (median reported)."
+    )
+    parser.add_argument(
+        "--workdir",
+        default=None,
+        help="Keep the dataset and outputs in this directory.",
+    )
+    parser.add_argument(
+        "--report", default="clanto_benchmark.json", help="Path of the JSON report."
+    )
+    args = parser.parse_args(argv)
+
+    datasets = []
+    for rows in args.rows:
+        spec = DatasetSpec(
+            rows=rows,
+            columns=args.columns,
+            cardinality=args.cardinality,
+            pii_density=args.pii_density,
+            text_words=args.text_words,
+            file_format=args.file_format,
+            files=args.files,
+            seed=args.seed,
+        )
+        workdir = os.path.join(args.workdir, f"rows_{rows}") if args.workdir else None
+        datasets.append(run_benchmark(spec, tuple(args.methods), args.repeat, workdir))
+
+    report = {
+        "clanto_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "datasets": datasets,
+    }
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"Benchmark report saved to '{args.report}'.")
+    return report
@@ -0,0 +1,128 @@
+"""Times Clanto's startup and checks that heavy dependencies load lazily"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("pandas", "numpy", "tqdm", "pyarrow", "openpyxl")
+"""Dependencies that must not be imported before a command needs them"""
+
+COMMANDS = {
+    "import": ["-c", "import src"],
+    "help": ["-m", "src.main", "--help"],
+}
+"""Startup paths timed, as arguments of the Python interpreter"""
+
+_PROJECT_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def time_command(args: list[str], repeat: int = 5) -> list[float]:
+    """
+    Times a fresh interpreter running ``args``.
+
+    :param args: Arguments of the Python interpreter
+    :type args: list[str]
+    :param repeat: Number of runs, defaults to 5
+    :type repeat: int, optional
+    :return: Wall seconds of every run
+    :rtype: list[float]
+    """
+    timings = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args],
+            cwd=_PROJECT_DIR,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def heavy_imports(module: str = "src.main") -> list[str]:
+    """
+    Heavy dependencies loaded by importing a module in a fresh interpreter.
+
+    :param module: Module to import, defaults to ``src.main``
+    :type module: str, optional
+    :return: Modules of ``HEAVY_MODULES`` found in ``sys.modules``
+    :rtype: list[str]
+    """
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=_PROJECT_DIR,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.split()
+
+
+def main(argv: list[str] | None = None) -> dict:
+    """
+    Command line entry point: ``python -m src.benchmark.startup``.
+
+    Exits with status 1 when a heavy dependency is imported at startup or
+    when a median exceeds ``--max-seconds``, so it can guard CI.
+
+    :param argv: Arguments, defaults to ``sys.argv``
+    :type argv: list[str] | None, optional
+    :return: The report
+    :rtype: dict
+    """
+    parser = argparse.ArgumentParser(description="Benchmark Clanto's startup time.")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs per command (median reported)."
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=None,
+        help="Fail if the median of a command exceeds this many seconds.",
+    )
+    parser.add_argument(
+        "--report", default=None, help="Also save the report to this JSON file."
+    )
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": sys.version.split()[0],
+        "heavy_imports": heavy_imports(),
+        "seconds": {
+            name: statistics.median(time_command(command, args.repeat))
+            for name, command in COMMANDS.items()
+        },
+    }
+    print(json.dumps(report, indent=4))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+
+    slow = [
+        name
+        for name, seconds in report["seconds"].items()
+        if args.max_seconds is not None and seconds > args.max_seconds
+    ]
+    if report["heavy_imports"] or slow:
+        print(
+            f"Startup regression: heavy imports {report['heavy_imports']}, "
+            f"slow commands {slow}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1,71 +1,131 @@
 """This module is in charge of reading and setting a custom configuration"""
 
 import configparser
+import fnmatch
 from .clanto_exc import MultipleConfigFiles
-from .discovery.utils import _file_discovery
-from .core.base_reader import BaseFile
+from .config import CFG_SEARCH_DEPTH, CONFIG_ENV
 import os
 
-
 __CLANTO_CFG_EXT = "*.clanto"
 _CLANTO_JSON = "*.clason"
 _ROOTDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+_loaded_cfg: tuple[configparser.ConfigParser, str | None] | None = None
+"""Configuration of this process and its directory, resolved on first use"""
+_loaded_cfg_file: str | None = None
+"""Path of the configuration file of this process, if any"""
+
+
+def _shallow_discovery(
+    root_path: str, pattern: str, depth: int = CFG_SEARCH_DEPTH
+) -> list[str]:
+    """Bounded file lookup: ``root_path`` and up to ``depth`` levels below it.
 
-def __find_cfg(path: str) -> str | None:
-    """Try quick configuration file lookup, if not provided as an argument.
+    Hidden directories and ``__pycache__`` are skipped, so the lookup stays
+    cheap even when ``root_path`` is a large install tree.
 
-    :param path: Root path
-    :type path: str
+    :param root_path: Base path
+    :type root_path: str
+    :param pattern: Glob pattern of the file names
+    :type pattern: str
+    :param depth: Subdirectory levels to search, defaults to CFG_SEARCH_DEPTH
+    :type depth: int, optional
+    :return: Files found, shallowest first
+    :rtype: list[str]
+    """
+    found = []
+    level = [root_path]
+    for _ in range(depth + 1):
+        subdirs = []
+        for directory in level:
+            try:
+                entries = sorted(os.scandir(directory), key=lambda e: e.name)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith(".") and entry.name != "__pycache__":
+                        subdirs.append(entry.path)
+                elif fnmatch.fnmatch(entry.name, pattern):
+                    found.append(entry.path)
+        level = subdirs
+    return found
+
+
+def __find_cfg(path: str | None = None) -> str | None:
+    """Configuration file lookup.
+
+    In order: the given path, the CLANTO_CONFIG environment variable, then a
+    shallow search (see ``_shallow_discovery``) of the working directory and
+    of Clanto's root directory.
+
+    :param path: Explicit path of a .clanto file (e.g. from ``--config``)
+    :type path: str | None
+    :raises FileNotFoundError: If an explicit path does not exist
+    :raises MultipleConfigFiles: If a search location holds several .clanto files
     :return: The path of the configuration file, if available, otherwise None.
     :rtype: str | None
     """
-    cfg_file = _file_discovery(path, __CLANTO_CFG_EXT)
-
-    if isinstance(cfg_file, list):
-        raise MultipleConfigFiles
-    elif isinstance(cfg_file, str):
-        return cfg_file
-    else:
-        return None
-
-
-_found_cfg_path = __find_cfg(_ROOTDIR)
-_CFG_PATH = os.path.dirname(_found_cfg_path) if _found_cfg_path else None
-
-
-def _load_cfg(path: str) -> tuple[configparser.ConfigParser, str | None]:
+    explicit = path or os.environ.get(CONFIG_ENV)
+    if explicit:
+        if not os.path.isfile(explicit):
+            raise FileNotFoundError(f"Configuration file '{explicit}' not found.")
+        return os.path.abspath(explicit)
+
+    for root in dict.fromkeys([os.getcwd(), _ROOTDIR]):
+        cfg_files = _shallow_discovery(root, __CLANTO_CFG_EXT)
+        if len(cfg_files) > 1:
+            raise MultipleConfigFiles
+        if cfg_files:
+            return cfg_files[0]
+    return None
+
+
+def _load_cfg(path: str | None = None) -> tuple[configparser.ConfigParser, str | None]:
     """Loads the Clanto configuration from a file.
 
-    Searches for a .clanto file in the given path. If found, loads the
-    configuration. If multiple files are found, raises MultipleConfigFiles.
-    If no file is found, returns an empty ConfigParser object.
+    The file is looked up once per process (see ``__find_cfg``) and cached;
+    giving an explicit path loads it again. If no file is found, the
+    configuration is an empty ConfigParser object.
 
-    :param path: The root path to search for the config file.
-    :type path: str
+    :param path: Explicit path of a .clanto file, defaults to a lookup
+    :type path: str | None
     :return: A tuple containing:
              - A ConfigParser object containing the configuration.
              - The directory of the configuration file, or None if not found.
     :rtype: tuple[configparser.ConfigParser, str | None]
     """
+    global _loaded_cfg, _loaded_cfg_file
+    if _loaded_cfg is not None and path is None:
+        return _loaded_cfg
+
     cfg_file_path = __find_cfg(path)
 
     __cfg = configparser.ConfigParser(
         converters={"list": lambda x: [i.strip() for i in x.split(",")]}
     )
 
+    _loaded_cfg_file = cfg_file_path
     if cfg_file_path:
         __cfg.read(cfg_file_path)
-        relative_cfg_path = os.path.relpath(cfg_file_path, path)
+        relative_cfg_path = os.path.relpath(cfg_file_path)
         print(f"Configuration file found at relative path: {relative_cfg_path}")
-
-    if cfg_file_path:
         cfg_file_path = os.path.dirname(cfg_file_path)
 
-    return __cfg, cfg_file_path
+    _loaded_cfg = (__cfg, cfg_file_path)
+    return _loaded_cfg
 
 
-if __name__ == "__main__":
-    file = __find_cfg("C:\\Users\\d.ruiz.blanco\\Documents\\Personal\\Projects\\clanto")
+def _cfg_dir() -> str | None:
+    """Directory of the configuration file (loading it if needed), or None."""
+    return _load_cfg()[1]
 
-    print(_load_cfg(file))
+
+def _cfg_file() -> str | None:
+    """Path of the configuration file (loading it if needed), or None."""
+    _load_cfg()
+    return _loaded_cfg_file
+
+
+if __name__ == "__main__":
+    print(_load_cfg())
@@ -1,2 +1,6 @@
 class MultipleConfigFiles(Exception):
     """There's multiple Clanto config files, when only one should be present."""
+
+
+class InvalidDetectionRule(Exception):
+    """A detection rule from the Clanto config is not a valid regex."""
@@ -3,9 +3,80 @@ DEFAULT_ANONYMISATION_OPTIONS = {
     "prefix": "ANON_",
 }
 
+MAPPING_FILENAME = "anonymisation_mapping.csv"
+"""Export of the mapping, saved in the output directory"""
+
+MAPPING_FILENAMES = {
+    "csv": MAPPING_FILENAME,
+    "parquet": "anonymisation_mapping.parquet",
+}
+"""Export of the mapping per format: CSV, or compact and fast to reload Parquet"""
+
+MAPPING_COLUMNS = ["Original Value", "Anonymised Value"]
+"""Columns of the mapping export"""
+
+DEFAULT_SHARD_ROWS = 250_000
+"""Rows per shard sent to a worker process when running with --workers"""
+
+DEFAULT_MAPPING_CACHE_SIZE = 1_000_000
+"""Entries kept in the hot cache in front of an on-disk mapping store"""
+
+DEFAULT_CELL_CACHE_SIZE = 100_000
+"""Cells made of several tokens (e.g. free text) whose rewrite is cached"""
+
+DEFAULT_VERDICT_CACHE_SIZE = 1_000_000
+"""Values whose classification verdict is cached"""
+
+DEFAULT_MAPPING_BATCH_SIZE = 10_000
+"""Pending mapping writes inserted per transaction by an on-disk mapping store"""
+
+DEFAULT_PIPELINE_IN_FLIGHT = 3
+"""Files/chunks in flight with --pipeline: one read, one anonymised, one written"""
+
+DEFAULT_TEMPLATE_MEMORY_MB = 256
+"""Memory budget of the distinct values counted by gen_map_template, beyond
+which they are spilled to disk"""
+
+TEMPLATE_COUNTS_FILENAME = "mapping_template_counts.csv"
+"""Occurrences of every value of the mapping template, saved in the output directory"""
+
+DEFAULT_PROFILE_SAMPLE_ROWS = 1_000
+"""Rows sampled per column by the column profiler (--plan)"""
+
+DEFAULT_CFG_FILENAME = "clanto.clanto"
+"""Configuration created in the working directory when a plan is saved without one"""
+
+CATEGORICAL_MAX_RATIO = 0.5
+"""Text columns with at most this many distinct values per cell are loaded as
+categoricals (--categorical)"""
+
+CATEGORICAL_SAMPLE_ROWS = 10_000
+"""Rows of a CSV read to choose the columns loaded as categoricals"""
+
+DATE_FORMAT_CACHE_SIZE = 8
+"""Date formats remembered per process to validate date columns in one pass"""
+
+DATE_FORMAT_SAMPLE_SIZE = 20
+"""Values whose format is guessed to infer the date format of a column"""
+
+DEFAULT_DB_BATCH_SIZE = 50_000
+"""Rows fetched per ``fetchmany`` call when reading a database table"""
+
+DEFAULT_DB_COMMIT_ROWS = 1_000_000
+"""Rows inserted per transaction when writing an anonymised database"""
+
+FPE_KEY_ENV = "CLANTO_FPE_KEY"
+"""Environment variable holding the secret key of the 'fpe' method"""
+
+CONFIG_ENV = "CLANTO_CONFIG"
+"""Environment variable holding the path of the .clanto configuration file"""
+
+CFG_SEARCH_DEPTH = 1
+"""Subdirectory levels searched for a .clanto file when none is given"""
+
 DATABASE_SUPPORT = ["*.db", "*.sqlite"]
 
-FILE_SUPPORT = ["*.csv", "*.xlsx"]
+FILE_SUPPORT = ["*.csv", "*.xlsx", "*.parquet", "*.arrow", "*.feather"]
 
 RANDOM_WORDS = [
     "fizzblast",
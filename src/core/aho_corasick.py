@@ -0,0 +1,98 @@
+"""Aho-Corasick automaton to find which of many literal keys occur in a string"""
+
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    Multi-pattern literal matcher built once over an ordered list of keys.
+
+    ``first_match`` answers "which is the lowest-index key occurring
+    anywhere in this text?" in a single pass over the text, whatever the
+    number of keys, which is exactly the first-match-wins question asked by
+    the custom substitution rules.
+    """
+
+    def __init__(self, keys: list[str]) -> None:
+        """
+        :param keys: Literal keys, in priority order
+        :type keys: list[str]
+        """
+        self.keys = keys
+
+        self._goto: list[dict[str, int]] = [{}]
+        """Trie transitions of every node"""
+        self._fail: list[int] = [0]
+        """Failure link of every node"""
+        self._best: list[int | None] = [None]
+        """Lowest key index ending at a node or along its failure chain"""
+
+        self._empty: int | None = None
+        """Lowest index of an empty key, which matches every text"""
+
+        for index, key in enumerate(keys):
+            if key == "":
+                if self._empty is None:
+                    self._empty = index
+                continue
+            node = 0
+            for char in key:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                node = nxt
+            if self._best[node] is None or index < self._best[node]:
+                self._best[node] = index
+
+        self._lowest = min(
+            (i for i in self._best if i is not None), default=None
+        )
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            fallback = self._best[self._fail[node]]
+            if fallback is not None and (
+                self._best[node] is None or fallback < self._best[node]
+            ):
+                self._best[node] = fallback
+
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                state = self._fail[node]
+                while state and char not in self._goto[state]:
+                    state = self._fail[state]
+                target = self._goto[state].get(char, 0)
+                self._fail[child] = target if target != child else 0
+
+    def first_match(self, text: str) -> int | None:
+        """
+        Finds the lowest-index key occurring anywhere in ``text``.
+
+        :param text: Text to scan
+        :type text: str
+        :return: Index of the key in ``keys``, or None if no key occurs.
+        :rtype: int | None
+        """
+        best = self._empty
+        if self._lowest is None or (best is not None and best <= self._lowest):
+            return best
+
+        goto, fail, found = self._goto, self._fail, self._best
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            index = found[node]
+            if index is not None and (best is None or index < best):
+                best = index
+                if best == self._lowest:
+                    break
+        return best
@@ -1,14 +1,30 @@
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+import contextlib
+import itertools
+from typing import TYPE_CHECKING
 from tqdm import tqdm
+import numpy as np
 import pandas as pd
 import os
 from ..utils import (
     generate_random_string,
     generate_random_word_string,
-    is_identifiable_string,
     anonymise_email,
+    anonymise_emails,
     custom_mapping_replacement,
+    custom_mapping_replacements,
     anonymise_phone,
+    anonymise_phones,
 )
+from ..discovery.columnar import (
+    ColumnarWriter,
+    anonymise_table,
+    iter_text_counts,
+    sample_frame,
+)
+from ..discovery.utils import load_non_db, save_non_db
 from ..discovery.lookup import (
     DatabaseManager,
     FileManager,
@@ -16,12 +32,39 @@ from ..discovery.lookup import (
     ClantoFile,
     MappingTemplateManager,
 )
-from ..config import DEFAULT_ANONYMISATION_OPTIONS
+from .cache import LRUCache, cache_size
+from .distinct import DistinctCounter, save_template
+from .fpe import FormatPreservingCipher
+from .mapping_export import (
+    MappingWriter,
+    find_mapping,
+    iter_mapping,
+    open_mapping_writer,
+)
+from .mapping_store import InMemoryMappingStore, MappingStore
+from .metrics import METRICS_FILENAME, RunMetrics
+from .parallel import (
+    classify_values,
+    is_text_dtype,
+    make_pool,
+    submit_shards,
+    text_columns,
+)
+from .pipeline import run_pipeline
+from .profiler import ACTION_SCAN, ACTION_SKIP, ColumnPlan
+from .rules import RuleEngine
+from ..config import (
+    DEFAULT_ANONYMISATION_OPTIONS,
+    DEFAULT_MAPPING_BATCH_SIZE,
+    DEFAULT_SHARD_ROWS,
+    DEFAULT_TEMPLATE_MEMORY_MB,
+    TEMPLATE_COUNTS_FILENAME,
+    FPE_KEY_ENV,
+)
 from configparser import ConfigParser
 
-import re
-
-tqdm.pandas()
+if TYPE_CHECKING:
+    import pyarrow as pa
 
 
 class Anonymiser:
@@ -32,6 +75,14 @@ class Anonymiser:
         anonymisation_method: str = "random_chars",
         make_mapping: bool = False,
         cfg: ConfigParser = None,
+        fpe_key: str | None = None,
+        workers: int = 1,
+        shard_rows: int = DEFAULT_SHARD_ROWS,
+        mapping_store: MappingStore | None = None,
+        metrics: RunMetrics | None = None,
+        pipeline: int | None = None,
+        mapping_format: str = "csv",
+        column_plan: ColumnPlan | None = None,
     ) -> None:
         """
         Initialises the Anonymiser.
@@ -41,48 +92,123 @@ class Anonymiser:
             anonymisation_method (str): 'random_chars' for random character strings,
                                         'random_words' for strings based on random words.
             make_mapping (bool): Boolean to create or not the mapping template for custom use
+            fpe_key (str): Secret key for the 'fpe' method. Falls back to the
+                           CLANTO_FPE_KEY environment variable.
+            workers (int): Number of processes used to classify files and row shards.
+            shard_rows (int): Maximum number of rows per shard sent to a worker.
+            mapping_store (MappingStore): Backend holding the mapping. Defaults
+                                          to an in-memory store lost at exit.
+            metrics (RunMetrics): Collector of the run's timings and counters.
+                                  Defaults to the manager's.
+            pipeline (int | None): Overlap the reads, anonymisation and writes of
+                                   files, chunks and row groups, with at most this
+                                   many in flight. None runs them one after another.
+            mapping_format (str): Format of the mapping export, 'csv' or 'parquet'.
+            column_plan (ColumnPlan | None): Per-column plan; columns it skips are
+                                             passed through without being classified.
+                                             None anonymises every text column.
         """
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
         self.cfg = cfg
 
-        self.mapping: dict = {}
+        self.store = (
+            mapping_store if mapping_store is not None else InMemoryMappingStore()
+        )
+        """Backend holding the mapping"""
+
+        self.mapping = self.store.forward
         """Dictionary containing the mapping of anonymised data"""
 
-        self.reverse_mapping: dict = {}
+        self.reverse_mapping = self.store.reverse
         """Dictionary containing the mapping of anonymised data, reversed for collision checking"""
 
+        self.cell_cache = LRUCache(cache_size(cfg, "cell_rewrites"))
+        """Rewrites of cells made of several tokens (e.g. free text), kept out of
+        the mapping: they are rebuilt from the mapped tokens when evicted"""
+
         self.manager = manager
         """manager containing the file(s) to be anonymised """
 
+        self.metrics = (
+            metrics
+            if metrics is not None
+            else getattr(manager, "metrics", None) or RunMetrics()
+        )
+        """Timings and counters of the run, saved as METRICS_FILENAME"""
+
         self.anonymisation_method = anonymisation_method
         self.options = DEFAULT_ANONYMISATION_OPTIONS.copy()
+        self.workers = max(1, workers)
+        self.shard_rows = shard_rows
+        self.pipeline = pipeline
+        """Items in flight when pipelining (see ``run_pipeline``), or None"""
+
+        self.rules = RuleEngine.from_config(cfg)
+        """Compiled detection rules shared by every value"""
+
+        self.fpe: FormatPreservingCipher | None = None
+        """Keyed cipher used by the 'fpe' method"""
+        if anonymisation_method == "fpe":
+            fpe_key = fpe_key or os.environ.get(FPE_KEY_ENV)
+            if not fpe_key:
+                raise ValueError(
+                    f"The 'fpe' method needs a secret key (--fpe-key or {FPE_KEY_ENV})."
+                )
+            self.fpe = FormatPreservingCipher(fpe_key)
+
+        self.mapping_format = mapping_format
+        """Format of the mapping export (see MAPPING_FILENAMES)"""
+        self._mapping_writer: MappingWriter | None = None
+        """Export of the mapping, written while anonymising"""
+        self._journal: list[tuple[str, str]] = []
+        """New pairs not written to the export yet"""
+
+        self.column_plan = column_plan
+        """Columns to pass through, profiled on first sight, or None"""
 
         self.mapping_manager = MappingTemplateManager(output_dir)
         if anonymisation_method == "custom_mapping":
             self.mapping_manager._load()
+        self._custom_batch: dict[str, str] = {}
+        """Custom mapping replacements precomputed for the current column"""
+        self._contact_batch: dict[str, str] = {}
+        """Email/phone candidates generated in bulk for the current column"""
 
-    def _get_anonymised_value(self, original_value: str) -> str:
+    def _get_anonymised_value(
+        self, original_value: str, spans: list[tuple[int, int, str]] | None = None
+    ) -> str:
         """
         Gets an anonymised value for a given original value.
         Ensures coherence by reusing existing anonymised values.
         Handles potential collisions for new anonymised values.
         Can identify and replace multiple identifiable entities within a single string.
+        Only tokens are added to the mapping; the rewrite of a value holding
+        several tokens is kept in ``cell_cache``.
 
         :param original_value: The string value to be anonymised.
         :type original_value: str
+        :param spans: Tokens already found by ``RuleEngine.detect``, if any.
+        :type spans: list[tuple[int, int, str]] | None
         :raises ValueError: If an unknown anonymisation method is specified.
         :return: The anonymised value.
         :rtype: str
         """
 
-      
         def _get_anonymised_single_token(
             token: str, token_type: str = "general"
         ) -> str:
             if token in self.mapping:
+                self.metrics.count("token_hits")
                 return self.mapping[token]
 
+            self.metrics.count("new_tokens")
+            if self.fpe is not None:
+                # Deterministic bijection: no collision check needed
+                new_token_value = self.fpe.encrypt_token(token, token_type)
+                self._remember(token, new_token_value)
+                return new_token_value
+
             new_token_value = None
             should_retry_generation = True
             is_first_attempt = True
@@ -90,24 +216,29 @@ class Anonymiser:
             while should_retry_generation and (
                 new_token_value is None or new_token_value in self.reverse_mapping
             ):
-                status_message = (
-                    "Generating new value"
-                    if is_first_attempt
-                    else "Retrying generation"
-                )
-              
+                if not is_first_attempt:
+                    self.metrics.count("collision_retries")
 
                 if self.anonymisation_method == "custom_mapping":
-                    new_token_value = custom_mapping_replacement(
-                        token, self.mapping_manager
-                    )
+                    new_token_value = self._custom_batch.get(token)
+                    if new_token_value is None:
+                        new_token_value = custom_mapping_replacement(
+                            token, self.mapping_manager
+                        )
                     if new_token_value in self.reverse_mapping:
                     
                         should_retry_generation = (
                             False  
                         )
                 else:  
-                    if token_type == "email":
+                    candidate = (
+                        self._contact_batch.pop(token, None)
+                        if is_first_attempt
+                        else None
+                    )
+                    if candidate is not None:
+                        new_token_value = candidate
+                    elif token_type == "email":
                         new_token_value = anonymise_email(token)
                     elif token_type == "phone":
                         new_token_value = anonymise_phone(token)
@@ -136,96 +267,686 @@ class Anonymiser:
 
                 is_first_attempt = False  
 
-            self.mapping[token] = new_token_value
+            self._remember(token, new_token_value)
             self.reverse_mapping[new_token_value] = token
             return new_token_value
 
         # --- Main logic for _get_anonymised_value ---
 
         if original_value in self.mapping:
+            self.metrics.count("mapping_hits")
             return self.mapping[original_value]
+        cached = self.cell_cache.get(original_value)
+        if cached is not None:
+            return cached
 
-        email_pattern_in_text = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
+        if spans is None:
+            spans = self.rules.detect(original_value)
 
-        phone_pattern_in_text = (
-            r"\b(?:\+?\d{1,3}[-.\s]?)?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}\b"
-        )
+        if spans:
+            parts = []
+            last = 0
+            for start, end, token_type in spans:
+                parts.append(original_value[last:start])
+                parts.append(
+                    _get_anonymised_single_token(
+                        original_value[start:end], token_type
+                    )
+                )
+                last = end
+            parts.append(original_value[last:])
+            final_anonymised_value = "".join(parts)
+        else:
+            final_anonymised_value = _get_anonymised_single_token(
+                original_value, "general"
+            )
 
-    
-        combined_pattern = re.compile(
-            f"(?P<email>{email_pattern_in_text})|(?P<phone>{phone_pattern_in_text})"
-        )
+        # A value that was a single token is in the mapping by now; other
+        # values are a rewrite around their tokens, only cached
+        if original_value not in self.mapping:
+            self.cell_cache.put(original_value, final_anonymised_value)
+        return final_anonymised_value
 
-        made_replacements = False
+    def _remember(self, original: str, anonymised: str) -> None:
+        """Adds a new pair to the mapping and to the pending export batch."""
+        self.mapping[original] = anonymised
+        if self._mapping_writer is not None:
+            self._journal.append((original, anonymised))
+            if len(self._journal) >= DEFAULT_MAPPING_BATCH_SIZE:
+                self._flush_journal()
 
-        def replacer(match):
-            nonlocal made_replacements
-            matched_string = match.group(0)
-            replaced_value = matched_string 
+    def _flush_journal(self) -> None:
+        """Appends the pending pairs to the mapping export."""
+        filename = os.path.basename(self._mapping_writer.path)
+        with self.metrics.stage("save", file=filename):
+            self._mapping_writer.write(self._journal)
+        self._journal = []
 
-            if match.group("email"):
-                replaced_value = _get_anonymised_single_token(matched_string, "email")
-                made_replacements = True
-            elif match.group("phone"):
-                replaced_value = _get_anonymised_single_token(matched_string, "phone")
-                made_replacements = True
-            elif match.group("general_word"):
-                if is_identifiable_string(matched_string, self._regex_rules):
-                    replaced_value = _get_anonymised_single_token(matched_string, "general")
-                    made_replacements = True
+    def _open_mapping_export(self) -> None:
+        """
+        Starts the mapping export, with the pairs already in the mapping
+        (seeded from a previous run or held by a reused store) first.
+        """
+        self._mapping_writer = open_mapping_writer(
+            self.output_dir, self.mapping_format
+        )
+        self._journal = []
+        filename = os.path.basename(self._mapping_writer.path)
+        pairs = iter(self.mapping.items())
+        with self.metrics.stage("save", file=filename):
+            while batch := list(itertools.islice(pairs, DEFAULT_MAPPING_BATCH_SIZE)):
+                self._mapping_writer.write(batch)
 
-            return replaced_value
+    def _close_mapping_export(self) -> MappingWriter:
+        """Writes the last pending pairs and finalises the mapping export."""
+        writer = self._mapping_writer
+        self._flush_journal()
+        with self.metrics.stage("save", file=os.path.basename(writer.path)):
+            writer.close()
+        self._mapping_writer = None
+        return writer
 
-        anonymised_value_with_parts_replaced = combined_pattern.sub(
-            replacer, original_value
-        )
+    def _prepare_batch(self, pending: dict[str, list[tuple[int, int, str]]]) -> None:
+        """
+        Precomputes, in bulk, the replacements of the tokens of a column.
 
-        if made_replacements:
-        
-            self.mapping[original_value] = anonymised_value_with_parts_replaced
-            self.reverse_mapping[anonymised_value_with_parts_replaced] = original_value
-            return anonymised_value_with_parts_replaced
-        else:
+        Custom mapping replacements are computed in one batch, and emails and
+        phones get their first candidate from a single vectorized draw. A
+        candidate that collides is discarded and generated again as usual.
 
-            final_anonymised_value = _get_anonymised_single_token(
-                original_value, "general"
+        :param pending: Values not mapped yet -> their ``RuleEngine.detect`` spans
+        :type pending: dict[str, list[tuple[int, int, str]]]
+        """
+        self._custom_batch = {}
+        self._contact_batch = {}
+        if self.fpe is not None:
+            return
+
+        tokens: dict[str, str] = {}
+        for value, spans in pending.items():
+            if not spans:
+                tokens.setdefault(value, "general")
+            for start, end, token_type in spans:
+                tokens.setdefault(value[start:end], token_type)
+        tokens = {t: kind for t, kind in tokens.items() if t not in self.mapping}
+
+        if self.anonymisation_method == "custom_mapping":
+            replacements = custom_mapping_replacements(
+                list(tokens), self.mapping_manager
             )
-            self.mapping[original_value] = final_anonymised_value
-            self.reverse_mapping[final_anonymised_value] = original_value
-            return final_anonymised_value
+            self._custom_batch = dict(zip(tokens, replacements))
+            return
+
+        emails = [t for t, kind in tokens.items() if kind == "email"]
+        phones = [t for t, kind in tokens.items() if kind == "phone"]
+        self._contact_batch = {
+            **dict(zip(emails, anonymise_emails(emails))),
+            **dict(zip(phones, anonymise_phones(phones))),
+        }
+
+    @staticmethod
+    def _span_tokens(
+        spans: dict[str, list[tuple[int, int, str]]],
+    ) -> Iterator[str]:
+        """Tokens of values -> their ``RuleEngine.detect`` spans"""
+        for value, found in spans.items():
+            for start, end, _ in found:
+                yield value[start:end]
 
     def __save(self) -> None:
         self.manager.save_files()
         self.mapping_manager.save_files()
 
+    def anonymise_column(self, series: pd.Series, scan: bool = False) -> pd.Series:
+        """
+        Anonymises a single column by working on its distinct values only.
+
+        The column is factorized so every distinct value goes through the
+        batch classifier and ``_get_anonymised_value`` exactly once, and the
+        anonymised column is rebuilt with a single vectorized take over the
+        codes. Missing and non-string cells are kept untouched.
+
+        A categorical column is already factorized: only its categories
+        used by the column are anonymised, and it stays categorical.
+
+        :param series: Column to be anonymised
+        :type series: pd.Series
+        :param scan: Free text: skip the classifier, replace only the tokens
+                     found by ``RuleEngine.scan`` and keep the cells without
+                     any as they are, defaults to False
+        :type scan: bool, optional
+        :return: The anonymised column, with the same index and name.
+        :rtype: pd.Series
+        """
+        column = series.name
+        if not is_text_dtype(series.dtype):
+            self.metrics.count("cells_skipped", len(series), column=column)
+            return series
+
+        categorical = isinstance(series.dtype, pd.CategoricalDtype)
+        with self.metrics.stage("classify", column=column):
+            if categorical:
+                codes, uniques = self._factorize_categorical(series)
+            else:
+                codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            uniques = np.asarray(uniques, dtype=object)
+            values = pd.Series(uniques, dtype=object)
+            if scan:
+                found = self.rules.scan(values)
+                changed = np.fromiter(map(bool, found), dtype=bool, count=len(found))
+            else:
+                changed = self.rules.identifiable_mask(values)
+            positions = np.flatnonzero(changed)
+            pending = [
+                i
+                for i in positions
+                if uniques[i] not in self.mapping and uniques[i] not in self.cell_cache
+            ]
+            if not scan:
+                found = dict(zip(pending, self.rules.scan(values.iloc[pending])))
+            spans = {uniques[i]: found[i] for i in pending}
+        self._count_cells(series, codes, changed)
+        if not changed.any():
+            return series
+
+        with self.metrics.stage("anonymise", column=column):
+            # One batched lookup for the values and the tokens found in them
+            self.store.prefetch(
+                itertools.chain(uniques[changed], self._span_tokens(spans))
+            )
+            self._prepare_batch(spans)
+            anonymised_uniques = uniques.copy()
+            for i in positions:
+                anonymised_uniques[i] = self._get_anonymised_value(
+                    uniques[i], spans.get(uniques[i])
+                )
+
+            if categorical:
+                return self._rebuild_categorical(series, codes, anonymised_uniques)
+            return self._rebuild_column(series, codes, anonymised_uniques, changed)
+
+    @staticmethod
+    def _factorize_categorical(series: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Codes and distinct values of a categorical column, as ``pd.factorize``
+        would return them: unused categories are left out and the others
+        come in order of first appearance, so tokens are generated in the
+        same order as for the same column of strings.
+
+        :param series: Categorical column
+        :type series: pd.Series
+        :return: Codes (-1 for missing cells) and the categories they point to
+        :rtype: tuple[np.ndarray, np.ndarray]
+        """
+        codes = series.cat.codes.to_numpy()
+        valid = codes != -1
+        used_codes, used = pd.factorize(codes[valid])
+        codes = np.full(len(codes), -1, dtype=np.intp)
+        codes[valid] = used_codes
+        return codes, series.cat.categories.to_numpy(dtype=object).take(used)
+
+    @staticmethod
+    def _rebuild_categorical(
+        series: pd.Series, codes: np.ndarray, anonymised_uniques: np.ndarray
+    ) -> pd.Series:
+        """
+        Rebuilds a categorical column over its anonymised categories, without
+        materialising a value per cell.
+
+        :param series: Original categorical column
+        :type series: pd.Series
+        :param codes: Codes returned by ``_factorize_categorical``
+        :type codes: np.ndarray
+        :param anonymised_uniques: Anonymised value of every used category
+        :type anonymised_uniques: np.ndarray
+        :return: The anonymised column, with the same index and name.
+        :rtype: pd.Series
+        """
+        # Categories must be unique: merge those anonymised to the same value
+        inverse, categories = pd.factorize(anonymised_uniques)
+        codes = np.where(codes == -1, -1, inverse.take(codes, mode="clip"))
+        return pd.Series(
+            pd.Categorical.from_codes(
+                codes, categories=categories, ordered=series.cat.ordered
+            ),
+            index=series.index,
+            name=series.name,
+        )
+
+    def _count_cells(
+        self, series: pd.Series, codes: np.ndarray, changed: np.ndarray
+    ) -> None:
+        """Counts the classified, anonymised and skipped cells of a column."""
+        valid = codes != -1
+        classified = int(np.count_nonzero(valid))
+        anonymised = int(np.count_nonzero(changed[codes[valid]]))
+        self.metrics.count("cells_classified", classified, column=series.name)
+        self.metrics.count("cells_anonymised", anonymised, column=series.name)
+        self.metrics.count(
+            "cells_skipped", len(series) - anonymised, column=series.name
+        )
+
+    @staticmethod
+    def _rebuild_column(
+        series: pd.Series,
+        codes: np.ndarray,
+        anonymised_uniques: np.ndarray,
+        changed: np.ndarray,
+    ) -> pd.Series:
+        """
+        Rebuilds a factorized column with a single take over its codes.
+
+        :param series: Original column
+        :type series: pd.Series
+        :param codes: Codes returned by ``pd.factorize``
+        :type codes: np.ndarray
+        :param anonymised_uniques: Anonymised value of every distinct value
+        :type anonymised_uniques: np.ndarray
+        :param changed: Which distinct values were anonymised
+        :type changed: np.ndarray
+        :return: The anonymised column, with the same index and name.
+        :rtype: pd.Series
+        """
+        values = series.to_numpy(dtype=object, copy=True)
+        selected = (codes != -1) & changed[codes]
+        values[selected] = anonymised_uniques.take(codes[selected])
+
+        return pd.Series(
+            values, index=series.index, name=series.name, dtype=series.dtype
+        )
+
+    def _planned_columns(self, key: str, df: pd.DataFrame) -> tuple[set[int], set[int]]:
+        """
+        Positions of the columns of a DataFrame that the column plan skips,
+        and of those it scans as free text.
+
+        :param key: File of the DataFrame (``file:sheet``, ``database:table``)
+        :type key: str
+        :param df: DataFrame to be anonymised, or a sample of it
+        :type df: pd.DataFrame
+        :return: Positions to pass through and to scan, none without a plan
+        :rtype: tuple[set[int], set[int]]
+        """
+        if self.column_plan is None:
+            return set(), set()
+        with self.metrics.stage("profile"):
+            actions = self.column_plan.column_actions(key, df)
+        return (
+            {p for p, action in actions.items() if action == ACTION_SKIP},
+            {p for p, action in actions.items() if action == ACTION_SCAN},
+        )
+
+    def _submit(
+        self, pool: ProcessPoolExecutor, key: str, df: pd.DataFrame
+    ) -> tuple[set[int], set[int], list[Future]]:
+        """
+        Submits the shards of the columns of a DataFrame the plan neither
+        skips nor scans (scanned columns are cheap enough to scan in place).
+        """
+        skip, scan = self._planned_columns(key, df)
+        return skip, scan, submit_shards(pool, df, self.shard_rows, skip | scan)
+
+    def _anonymise_frame(
+        self, df: pd.DataFrame, desc: str, key: str | None = None
+    ) -> pd.DataFrame:
+        """
+        Anonymises every column of a DataFrame.
+
+        :param df: DataFrame to be anonymised
+        :type df: pd.DataFrame
+        :param desc: Progress bar description
+        :type desc: str
+        :param key: File of the DataFrame in the column plan, defaults to None
+        :type key: str | None, optional
+        :return: The anonymised DataFrame
+        :rtype: pd.DataFrame
+        """
+        # Anonymised columns replace the shared ones, no cell is written in place
+        anonymised_df = df.copy(deep=False)
+        skip, scan = (
+            self._planned_columns(key, df) if key is not None else (set(), set())
+        )
+
+        for position in tqdm(range(df.shape[1]), desc=desc):
+            if position in skip:
+                self.metrics.count(
+                    "cells_skipped", len(df), column=df.columns[position]
+                )
+                continue
+            anonymised_df.isetitem(
+                position,
+                self.anonymise_column(df.iloc[:, position], scan=position in scan),
+            )
+
+        return anonymised_df
+
+    def _anonymise_frame_parallel(
+        self, df: pd.DataFrame, shards: tuple[set[int], set[int], list[Future]]
+    ) -> pd.DataFrame:
+        """
+        Anonymises a DataFrame from the results of its worker shards.
+
+        Results are visited in the same order as a serial run (column, then
+        shard), so new values are generated in the same order and the
+        mapping matches a serial run.
+
+        :param df: DataFrame to be anonymised
+        :type df: pd.DataFrame
+        :param shards: Skipped and scanned columns and futures returned by ``_submit``
+        :type shards: tuple[set[int], set[int], list[Future]]
+        :return: The anonymised DataFrame
+        :rtype: pd.DataFrame
+        """
+        skip, scan, futures = shards
+        # Waiting for the workers is the classification seen from here
+        with self.metrics.stage("classify"):
+            results = [future.result() for future in futures]
+        for _, hits in results:
+            self.rules.hits.update(hits)
+
+        anonymised_df = df.copy(deep=False)
+        text = set(text_columns(df)) - skip
+        for position in range(df.shape[1]):
+            series = df.iloc[:, position]
+            if position not in text:
+                self.metrics.count("cells_skipped", len(df), column=series.name)
+                continue
+            if position in scan or isinstance(series.dtype, pd.CategoricalDtype):
+                # Not sharded (see submit_shards): only its categories are classified
+                anonymised_df.isetitem(
+                    position, self.anonymise_column(series, scan=position in scan)
+                )
+                continue
+
+            with self.metrics.stage("anonymise", column=series.name):
+                found = {}
+                for shard, _ in results:
+                    for value, spans in shard[position]:
+                        found.setdefault(value, spans)
+                # One batched lookup for the values and the tokens found in them
+                self.store.prefetch(itertools.chain(found, self._span_tokens(found)))
+                self._prepare_batch(
+                    {
+                        value: spans
+                        for value, spans in found.items()
+                        if value not in self.mapping and value not in self.cell_cache
+                    }
+                )
+                lookup = {
+                    value: self._get_anonymised_value(value, spans)
+                    for value, spans in found.items()
+                }
+                if not lookup:
+                    classified = int(series.notna().sum())
+                    self.metrics.count(
+                        "cells_classified", classified, column=series.name
+                    )
+                    self.metrics.count("cells_skipped", len(df), column=series.name)
+                    continue
+
+                codes, uniques = pd.factorize(series, use_na_sentinel=True)
+                uniques = np.asarray(uniques, dtype=object)
+                changed = np.fromiter(
+                    (isinstance(u, str) and u in lookup for u in uniques),
+                    dtype=bool,
+                    count=len(uniques),
+                )
+                self._count_cells(series, codes, changed)
+                anonymised_uniques = uniques.copy()
+                anonymised_uniques[changed] = [lookup[u] for u in uniques[changed]]
+                anonymised_df.isetitem(
+                    position,
+                    self._rebuild_column(series, codes, anonymised_uniques, changed),
+                )
+
+        return anonymised_df
+
     def anonymise_file(self, f: RawFile) -> None:
         """
-        Reads a single CSV or XLSX file, anonymises it, and saves the output.
+        Anonymises a single CSV or XLSX file (every sheet) column by column.
+
+        :param f: Loaded file to be anonymised
+        :type f: RawFile
+        """
+        self.manager.add_clanto_file(self._anonymise_raw_file(f))
+
+    def _anonymise_raw_file(self, f: RawFile) -> ClantoFile:
+        """Anonymises every sheet of a file into its anonymised, unsaved ClantoFile."""
+        with self.metrics.file(f.filename):
+            anonymised = {}
+            for name, df in self._frames(f).items():
+                key = self._frame_key(f, name)
+                anonymised[name] = self._anonymise_frame(
+                    df, desc=f"Anonymising {key}", key=key
+                )
+        self.manager.release(f)
+        return self._anonymised_file(f, anonymised)
+
+    def _run_stages(
+        self, source: Iterable, process: Callable, sink: Callable[..., None]
+    ) -> None:
+        """
+        Runs ``sink(process(item))`` for every item of ``source``, pipelined
+        (see ``run_pipeline``) when ``pipeline`` is set.
+
+        :param source: Items read lazily (files, chunks, row groups)
+        :type source: Iterable
+        :param process: Anonymises an item
+        :type process: Callable
+        :param sink: Writes (or registers) an anonymised item
+        :type sink: Callable[..., None]
+        """
+        if self.pipeline:
+            run_pipeline(source, process, sink, self.pipeline)
+            return
+        for item in source:
+            sink(process(item))
+
+    @staticmethod
+    def _frames(f: RawFile) -> dict[str | None, pd.DataFrame]:
+        """Every sheet of a workbook, or the only DataFrame (keyed None) of a file."""
+        return f.sheets if f.sheets else {None: f.df}
+
+    @staticmethod
+    def _frame_key(f: RawFile, name: str | None) -> str:
+        """Name of a DataFrame of ``_frames`` in progress bars and the column plan."""
+        return f.filename if name is None else f"{f.filename}:{name}"
+
+    def anonymise_stream(
+        self, path: str, pool: ProcessPoolExecutor | None = None
+    ) -> None:
+        """
+        Anonymises a CSV chunk by chunk, appending every anonymised chunk to
+        its output file, so memory depends on the chunk size and the mapping
+        rather than on the file size.
 
-        :param filepath: RawFile path
-        :type filepath: str
+        :param path: Path of the CSV to be anonymised
+        :type path: str
+        :param pool: Process pool to classify the chunks with, defaults to None
+        :type pool: ProcessPoolExecutor | None, optional
         """
+        filename = os.path.basename(path)
+        output = os.path.join(self.output_dir, f"anonymised_{filename}")
+
+        written = False
 
-        tqdm.pandas(desc=f"Anonymising {f.filename}")
+        def _anonymise(chunk: RawFile) -> pd.DataFrame:
+            if pool is None:
+                return self._anonymise_frame(chunk.df, desc="Columns", key=filename)
+            return self._anonymise_frame_parallel(
+                chunk.df, self._submit(pool, filename, chunk.df)
+            )
 
-        anonymised_df = f.df.copy()
+        def _append(anonymised_df: pd.DataFrame) -> None:
+            nonlocal written
+            with self.metrics.stage("save", file=filename):
+                save_non_db(
+                    ClantoFile(output, anonymised_df),
+                    mode="a" if written else "w",
+                    header=not written,
+                )
+            written = True
 
-        anonymised_df = anonymised_df.progress_map(
-            lambda value: (
-                self._get_anonymised_value(value)
-                if is_identifiable_string(value)
-                else value
+        with self.metrics.file(filename):
+            self._run_stages(
+                tqdm(
+                    self.manager.iter_chunks(path),
+                    desc=f"Anonymising {filename}",
+                    unit="chunk",
+                ),
+                _anonymise,
+                _append,
             )
-        )
 
-        output_filename = f"anonymised_{f.filename}"
+            if not written:
+                save_non_db(ClantoFile(output, load_non_db(path, nrows=0).df))
+
+    def anonymise_columnar(self, path: str) -> None:
+        """
+        Anonymises a Parquet or Arrow IPC file row group by row group into a
+        file of the same format and schema.
+
+        Text columns are anonymised through their dictionaries only, so
+        memory depends on the row group size and work on the number of
+        distinct values rather than on the number of rows.
+
+        :param path: Path of the file to be anonymised
+        :type path: str
+        """
+        filename = os.path.basename(path)
+        output = os.path.join(self.output_dir, f"anonymised_{filename}")
+        schema = self.manager.schema(path)
 
-        self.manager.add_clanto_file(
-            ClantoFile(
-                path=os.path.join(self.output_dir, output_filename), df=anonymised_df
+        skip = scan = None
+        """Columns skipped and scanned by the plan, profiled from the first row group"""
+
+        def _anonymise(table: "pa.Table") -> "pa.Table":
+            nonlocal skip, scan
+            if skip is None:
+                skip, scan = set(), set()
+                if self.column_plan is not None:
+                    sample = sample_frame(table, self.column_plan.sample_rows)
+                    skipped, scanned = self._planned_columns(filename, sample)
+                    skip = {sample.columns[i] for i in skipped}
+                    scan = {sample.columns[i] for i in scanned}
+            for column in skip:
+                self.metrics.count("cells_skipped", table.num_rows, column=column)
+            return anonymise_table(table, schema, self.anonymise_column, skip, scan)
+
+        with self.metrics.file(filename), ColumnarWriter(output, schema) as writer:
+
+            def _write(table: "pa.Table") -> None:
+                with self.metrics.stage("save", file=filename):
+                    writer.write(table)
+
+            self._run_stages(
+                tqdm(
+                    self.manager.iter_tables(path),
+                    desc=f"Anonymising {filename}",
+                    unit="row group",
+                ),
+                _anonymise,
+                _write,
             )
+
+    def anonymise_database(
+        self, path: str, pool: ProcessPoolExecutor | None = None
+    ) -> None:
+        """
+        Anonymises a SQLite database into an anonymised copy, table by table
+        and batch by batch, so memory depends on the batch size and the
+        mapping rather than on the size of the database.
+
+        :param path: Path of the database to be anonymised
+        :type path: str
+        :param pool: Process pool to classify the batches with, defaults to None
+        :type pool: ProcessPoolExecutor | None, optional
+        """
+        filename = os.path.basename(path)
+
+        with self.manager.open_output(path) as writer:
+            for table in self.manager.databases[path]:
+                key = f"{filename}:{table}"
+                with self.metrics.file(key):
+                    for batch in tqdm(
+                        self.manager.iter_batches(path, table),
+                        desc=f"Anonymising {filename}:{table}",
+                        unit="batch",
+                    ):
+                        if pool is None:
+                            anonymised_df = self._anonymise_frame(
+                                batch, desc="Columns", key=key
+                            )
+                        else:
+                            anonymised_df = self._anonymise_frame_parallel(
+                                batch, self._submit(pool, key, batch)
+                            )
+                        with self.metrics.stage("save"):
+                            writer.write(
+                                table,
+                                list(anonymised_df.columns),
+                                anonymised_df.itertuples(index=False, name=None),
+                            )
+
+    def _anonymised_file(
+        self, f: RawFile, anonymised: dict[str | None, pd.DataFrame]
+    ) -> ClantoFile:
+        """ClantoFile of the anonymised DataFrames (see ``_frames``) of a file."""
+        output_filename = f"anonymised_{f.filename}"
+
+        return ClantoFile(
+            path=os.path.join(self.output_dir, output_filename),
+            df=next(iter(anonymised.values())),
+            sheets=anonymised if f.sheets else None,
         )
-        os.system("cls" if os.name == "nt" else "clear")
+
+    def _anonymise_files_parallel(self) -> None:
+        """
+        Anonymises every file with a process pool.
+
+        Workers classify the distinct values of every file and row shard and
+        find their tokens, while this process coordinates the mapping.
+        """
+        max_loaded = self.manager.max_loaded
+        with make_pool(self.workers, self.rules) as pool:
+            window: deque[
+                tuple[
+                    RawFile, dict[str | None, tuple[set[int], set[int], list[Future]]]
+                ]
+            ] = deque()
+
+            def _process_oldest() -> None:
+                f, shards = window.popleft()
+                frames = self._frames(f)
+                with self.metrics.file(f.filename):
+                    anonymised = {
+                        name: self._anonymise_frame_parallel(frames[name], futures)
+                        for name, futures in shards.items()
+                    }
+                self.manager.add_clanto_file(self._anonymised_file(f, anonymised))
+                self.manager.release(f)
+
+            # Shards of up to max_loaded files are in flight at once
+            for f in tqdm(self.manager.iter_files(), desc="Anonymising files"):
+                window.append(
+                    (
+                        f,
+                        {
+                            name: self._submit(pool, self._frame_key(f, name), df)
+                            for name, df in self._frames(f).items()
+                        },
+                    )
+                )
+                if max_loaded is not None and len(window) >= max_loaded:
+                    _process_oldest()
+            while window:
+                _process_oldest()
+
+            for path in self.manager.streamed:
+                self.anonymise_stream(path, pool)
+
+        for path in self.manager.columnar:
+            self.anonymise_columnar(path)
 
     def anonymise_files(self):
         """
@@ -234,51 +955,221 @@ class Anonymiser:
         :param filepaths: List of paths
         """
 
-        if not self.manager.raw_loaded:
-            print("No supported files found for anonymisation.")
+        if not self.manager.has_files():
+            if getattr(self.manager, "skipped", None):
+                print("Every input is unchanged since the last run.")
+            else:
+                print("No supported files found for anonymisation.")
             return
-        for _, fobj in self.manager.raw_loaded.items():
-            self.anonymise_file(fobj)
+        manifest = getattr(self.manager, "manifest", None)
+        if manifest is not None and not manifest.settings_changed:
+            self._load_previous_mapping()
 
-        mapping_df = pd.DataFrame(
-            self.mapping.items(), columns=["Original Value", "Anonymised Value"]
+        self._open_mapping_export()
+        try:
+            self._anonymise_inputs()
+        except BaseException:
+            self._mapping_writer.abort()
+            self._mapping_writer = None
+            raise
+        export = self._close_mapping_export()
+
+        self.__save()
+        self.store.flush()
+        if self.column_plan is not None:
+            self._save_column_plan()
+
+        if manifest is not None:
+            self.manager.save_manifest(
+                {
+                    "entries": export.rows,
+                    "export": os.path.basename(export.path),
+                    "store": getattr(self.store, "path", None),
+                    "method": self.anonymisation_method,
+                },
+                (
+                    {**manifest.settings, "column_plan": self.column_plan.snapshot()}
+                    if self.column_plan is not None
+                    else None
+                ),
+            )
+
+        self.metrics.save(
+            os.path.join(self.output_dir, METRICS_FILENAME),
+            method=self.anonymisation_method,
+            workers=self.workers,
+            mapping_entries=export.rows,
+            rule_hits=dict(self.rules.hits),
+            caches={
+                "cell_rewrites": self.cell_cache.stats(),
+                "verdicts": self.rules.verdicts.stats(),
+            },
         )
-        mapping_filepath = os.path.join(self.output_dir, "anonymisation_mapping.csv")
 
-        self.manager.add_clanto_file(ClantoFile(mapping_filepath, mapping_df))
+    def _save_column_plan(self) -> None:
+        """Adds the columns profiled in this run to the config and reports the skips."""
+        for key, columns in self.column_plan.summary().items():
+            if columns:
+                print(f"Column plan skips {key}: {', '.join(columns)}")
+        added = self.column_plan.save()
+        if added:
+            print(
+                f"Column plan: {added} new column(s) saved to "
+                f"{os.path.relpath(self.column_plan.path)}"
+            )
 
-        self.__save()
+    def _anonymise_inputs(self) -> None:
+        """Anonymises every input of the manager with the configured executor."""
+        if isinstance(self.manager, DatabaseManager):
+            if self.workers > 1:
+                with make_pool(self.workers, self.rules) as pool:
+                    for path in self.manager.databases:
+                        self.anonymise_database(path, pool)
+            else:
+                for path in self.manager.databases:
+                    self.anonymise_database(path)
+        elif self.workers > 1:
+            self._anonymise_files_parallel()
+        else:
+            # Pipelined, file N+1 is loaded and file N-1 written (lazy mode)
+            # while file N is anonymised
+            self._run_stages(
+                self.manager.iter_files(),
+                self._anonymise_raw_file,
+                self.manager.add_clanto_file,
+            )
+            for path in self.manager.streamed:
+                self.anonymise_stream(path)
+            for path in self.manager.columnar:
+                self.anonymise_columnar(path)
+
+    def _load_previous_mapping(self) -> None:
+        """
+        Seeds an empty mapping from the export of the previous run, so
+        re-processed files keep the tokens they were given before.
+        """
+        mapping_filepath = find_mapping(self.output_dir, self.mapping_format)
+        if len(self.mapping) or mapping_filepath is None:
+            return
 
-    def gen_map_template(self):
-        """Generate a .json mapping template for the user to fill in."""
-        import json
+        for pairs in iter_mapping(mapping_filepath):
+            for original, anonymised in pairs:
+                self.mapping[original] = anonymised
+                if self.fpe is None:
+                    self.reverse_mapping[anonymised] = original
 
-        if self.cfg and self.cfg.has_section("mapping_template_rules"):
-            if self.cfg.has_option("mapping_template_rules", "non_identifiable"):
-                _regex_rules = self.cfg.getlist(
-                    "mapping_template_rules", "non_identifiable"
-                )
-                if not isinstance(_regex_rules, list):
-                    raise TypeError(
-                        f"Regex rules for mapping template must be list[str], not {type(_regex_rules).__name__}"
-                    )
+    def gen_map_template(
+        self,
+        path: str | None = None,
+        memory_mb: float = DEFAULT_TEMPLATE_MEMORY_MB,
+    ) -> str | None:
+        """
+        Generates a .clason mapping template for the user to fill in.
 
-        self.mapping_template: dict = {}
-        """A mapping template for the user to fill in later."""
-        if not self.manager.raw_loaded:
+        Inputs are streamed (files, CSV chunks, database batches, row
+        groups); the distinct values of every text column are counted and
+        classified in batches, column by column in the process pool when
+        ``workers`` > 1. Identifiable values are counted within a memory
+        budget, spilling sorted runs to disk (see ``DistinctCounter``), and
+        merged into the template, sorted by value. Their number of
+        occurrences is saved as TEMPLATE_COUNTS_FILENAME in the output
+        directory, to review the most frequent values first.
+
+        :param path: Path of the template, defaults to mapping_template.clason
+                     next to the configuration file
+        :type path: str | None, optional
+        :param memory_mb: Memory budget of the counts, in MB, defaults to
+                          DEFAULT_TEMPLATE_MEMORY_MB
+        :type memory_mb: float, optional
+        :return: Path of the template, or None if there is nothing to scan
+        :rtype: str | None
+        """
+        template_rules = RuleEngine.from_config(self.cfg, template=True)
+
+        if not self.manager.has_files():
             print("No supported files found to generate the mapping template.")
-            return
+            return None
+        path = path or self.mapping_manager.map_template_path
 
-        tqdm_iterator = tqdm(
-            self.manager.raw_loaded.values(), desc="Creating mapping template"
+        with contextlib.ExitStack() as stack:
+            counter = stack.enter_context(
+                DistinctCounter(memory_mb, tmp_dir=self.output_dir)
+            )
+            pool = (
+                stack.enter_context(make_pool(self.workers, template_rules))
+                if self.workers > 1
+                else None
+            )
+
+            def _classify(counts: list[pd.Series]) -> None:
+                """Adds the identifiable values of every Series of counts."""
+                # Categoricals also count their unused categories, with 0
+                counts = [c[(c > 0) & (c.index.map(type) == str)] for c in counts]
+                if pool is None:
+                    masks = [
+                        template_rules.identifiable_mask(
+                            pd.Series(c.index, dtype=object)
+                        )
+                        for c in counts
+                    ]
+                else:
+                    futures = [
+                        pool.submit(classify_values, c.index.to_numpy(dtype=object))
+                        for c in counts
+                    ]
+                    masks = [future.result() for future in futures]
+                for c, mask in zip(counts, masks):
+                    counter.update(c[np.asarray(mask)])
+
+            def _scan(df: pd.DataFrame) -> None:
+                with self.metrics.stage("classify"):
+                    _classify(
+                        [df.iloc[:, i].value_counts() for i in text_columns(df)]
+                    )
+
+            if isinstance(self.manager, DatabaseManager):
+                for db_path, tables in self.manager.databases.items():
+                    for table in tables:
+                        for batch in tqdm(
+                            self.manager.iter_batches(db_path, table),
+                            desc=f"Scanning {os.path.basename(db_path)}:{table}",
+                            unit="batch",
+                        ):
+                            _scan(batch)
+            else:
+                tqdm_iterator = tqdm(
+                    itertools.chain(
+                        self.manager.iter_files(),
+                        *(
+                            self.manager.iter_chunks(stream)
+                            for stream in self.manager.streamed
+                        ),
+                    ),
+                    desc="Creating mapping template",
+                )
+                for f in tqdm_iterator:
+                    tqdm_iterator.set_description(f"Scanning {f.filename}")
+                    for df in self._frames(f).values():
+                        _scan(df)
+                    self.manager.release(f)
+
+                for columnar in self.manager.columnar:
+                    for table in tqdm(
+                        self.manager.iter_tables(columnar),
+                        desc=f"Scanning {os.path.basename(columnar)}",
+                        unit="row group",
+                    ):
+                        with self.metrics.stage("classify"):
+                            _classify(list(iter_text_counts(table)))
+
+            with self.metrics.stage("save"):
+                entries = save_template(
+                    counter.items(),
+                    path,
+                    os.path.join(self.output_dir, TEMPLATE_COUNTS_FILENAME),
+                )
+
+        print(
+            f"Mapping template with {entries} value(s) saved to {os.path.relpath(path)}"
         )
-        for f in tqdm_iterator:
-            tqdm_iterator.set_description(f"Scanning {f.filename}")
-            df = f.df
-            for column in df.columns:
-                for value in df[column].unique():
-                    if is_identifiable_string(value, _regex_rules):
-                        self.mapping_template[value] = ""
-
-        self.mapping_manager.map_template = self.mapping_template
-        self.__save()
+        return path
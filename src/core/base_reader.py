@@ -22,6 +22,8 @@ class BaseFile:
     """Loaded dataframe (optional)"""
     file: Any | None = None
     """Loaded file (optional)"""
+    sheets: dict[str, pd.DataFrame] | None = None
+    """Every sheet of a workbook by name, ``df`` being the first one (optional)"""
     filename: str = field(init=False)
     """Filename"""
     ext: str = field(init=False)
@@ -0,0 +1,119 @@
+"""Size-bounded LRU caches for values that can always be computed again"""
+
+from collections import OrderedDict
+from collections.abc import Hashable
+from configparser import ConfigParser
+from typing import Any
+
+from ..config import DEFAULT_CELL_CACHE_SIZE, DEFAULT_VERDICT_CACHE_SIZE
+
+CACHE_SECTION = "caches"
+"""Config section with the sizes of the caches (``0`` disables a cache)"""
+
+CACHE_OPTIONS = {
+    "cell_rewrites": DEFAULT_CELL_CACHE_SIZE,
+    "verdicts": DEFAULT_VERDICT_CACHE_SIZE,
+}
+"""Option of every cache in CACHE_SECTION -> its default size"""
+
+
+class LRUCache:
+    """
+    Mapping holding at most ``maxsize`` entries, evicting the least recently
+    used one, and counting its hits and misses.
+
+    Unlike the token mapping, an evicted entry is never lost: it is only
+    computed again the next time it is needed.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        """
+        :param maxsize: Entries kept; 0 disables the cache
+        :type maxsize: int
+        """
+        self.maxsize = max(0, maxsize)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Looks up a key, marking it as recently used.
+
+        :param key: Key to look up
+        :type key: Hashable
+        :param default: Value returned on a miss, defaults to None
+        :type default: Any, optional
+        :return: The cached value, or ``default``
+        :rtype: Any
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Adds or refreshes an entry, evicting the least recently used one if
+        the cache is full.
+
+        :param key: Key
+        :type key: Hashable
+        :param value: Value
+        :type value: Any
+        """
+        if not self.maxsize:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Membership test, neither counted nor marking the key as used."""
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Size, limit, hits, misses, evictions and hit rate, for the run metrics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+
+def cache_size(cfg: ConfigParser | None, option: str) -> int:
+    """
+    Size of a cache, from the ``[caches]`` section of a Clanto config.
+
+    :param cfg: Clanto's ConfigParser, if any
+    :type cfg: ConfigParser | None
+    :param option: One of CACHE_OPTIONS
+    :type option: str
+    :raises ValueError: If the size is not a non-negative integer
+    :return: Entries the cache may hold
+    :rtype: int
+    """
+    default = CACHE_OPTIONS[option]
+    if not (cfg and cfg.has_option(CACHE_SECTION, option)):
+        return default
+    size = cfg.getint(CACHE_SECTION, option)
+    if size < 0:
+        raise ValueError(f"{CACHE_SECTION}.{option} must be >= 0, not {size}.")
+    return size
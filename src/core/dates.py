@@ -0,0 +1,183 @@
+"""Date detection: character-class prefilter, format inference and format cache"""
+
+from collections import Counter, OrderedDict
+import re
+import threading
+import warnings
+
+from dateutil.parser import parserinfo
+import numpy as np
+import pandas as pd
+
+from ..config import DATE_FORMAT_CACHE_SIZE, DATE_FORMAT_SAMPLE_SIZE
+
+NAT_STRINGS = frozenset(["", "NaT", "nat", "NAT", "nan", "NaN", "NAN"])
+"""Strings pandas parses as a missing datetime instead of raising"""
+NON_DIGIT_DATES = NAT_STRINGS | frozenset(["now", "today"])
+"""The only strings without digits that ``pd.to_datetime`` accepts"""
+
+
+def _date_words() -> list[str]:
+    """Every word the date parser understands (months, weekdays, am/pm...)"""
+    info = parserinfo()
+    words = set(info.JUMP) | set(info.UTCZONE) | set(info.PERTAIN)
+    for names in (info.WEEKDAYS, info.MONTHS, info.HMS, info.AMPM):
+        for group in names:
+            words.update(group)
+    # Abbreviated September, and quarters (2024Q1) that pandas parses itself
+    words.update(["sept", "q"])
+    words = {w.lower() for w in words if w.isalpha()}
+    return sorted(words, key=len, reverse=True)
+
+
+_DATE_CANDIDATE_RE = re.compile(
+    r"(?=.*\d)(?:[\d\s\-/.:,;+'()]"
+    r"|(?<![A-Za-z])"
+    rf"(?:(?i:{'|'.join(_date_words())})|(?<=[\s\d])[A-Z]{{1,5}})"
+    r"(?![A-Za-z]))*"
+)
+"""Strings that may be dates: a digit, separators, and only words the date
+parser knows or upper-case time zone abbreviations after a time (e.g.
+``Jan 5, 2024 10:00 CET``). Anything else, e.g. a name, an e-mail or most
+free text, is not a date, so the parser is never tried on it."""
+
+
+def may_be_date(value: str) -> bool:
+    """
+    Cheap prefilter of ``pd.to_datetime``: False means the value is not a
+    date, True that it has to be parsed to tell.
+
+    :param value: Stripped string
+    :type value: str
+    :return: Can the value be a date?
+    :rtype: bool
+    """
+    return value in NON_DIGIT_DATES or _DATE_CANDIDATE_RE.fullmatch(value) is not None
+
+
+class DateFormatCache:
+    """
+    Most recently matched date formats, most recent first.
+
+    Once a column's format is known, every later batch (chunks, shards,
+    columns sharing a format) is validated with it in one vectorized pass
+    instead of being parsed value by value.
+    """
+
+    def __init__(self, maxsize: int = DATE_FORMAT_CACHE_SIZE) -> None:
+        """
+        :param maxsize: Formats kept, defaults to DATE_FORMAT_CACHE_SIZE
+        :type maxsize: int, optional
+        """
+        self.maxsize = maxsize
+        self._formats: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def formats(self) -> list[str]:
+        """Cached formats, most recent first."""
+        with self._lock:
+            return list(reversed(self._formats))
+
+    def add(self, fmt: str) -> None:
+        """Marks a format as matched, evicting the least recent one if full."""
+        with self._lock:
+            self._formats[fmt] = None
+            self._formats.move_to_end(fmt)
+            while len(self._formats) > self.maxsize:
+                self._formats.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._formats.clear()
+
+
+DATE_FORMATS = DateFormatCache()
+"""Date formats matched so far in this process"""
+
+
+def infer_date_format(values: pd.Series) -> str | None:
+    """
+    Infers the most common date format of a sample of values.
+
+    :param values: Stripped strings
+    :type values: pd.Series
+    :return: strftime format, or None if no value has a recognisable format
+    :rtype: str | None
+    """
+    from pandas.tseries.api import guess_datetime_format
+
+    guesses = Counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for value in values.head(DATE_FORMAT_SAMPLE_SIZE):
+            fmt = guess_datetime_format(value)
+            if fmt is not None:
+                guesses[fmt] += 1
+    return guesses.most_common(1)[0][0] if guesses else None
+
+
+def _parse(values: pd.Series, fmt: str) -> np.ndarray:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        parsed = pd.to_datetime(values, errors="coerce", format=fmt)
+    return parsed.notna().to_numpy(dtype=bool)
+
+
+def date_mask(values: pd.Series, cache: DateFormatCache = DATE_FORMATS) -> np.ndarray:
+    """
+    Vectorized ``is_date`` over a Series of stripped strings.
+
+    The formats of the column are chosen on a sample of its values: cached
+    formats matching part of the sample, then formats inferred from a
+    sample of the values still unmatched (and cached). Each is validated
+    over the whole column in one ``pd.to_datetime`` pass with an explicit
+    format. Only the values matching none of them, and passing the
+    prefilter (see ``may_be_date``), go through the per-value ``mixed``
+    parser.
+
+    :param values: Stripped strings
+    :type values: pd.Series
+    :param cache: Formats to try first, defaults to DATE_FORMATS
+    :type cache: DateFormatCache, optional
+    :return: Boolean array, True where the value can be parsed as a date.
+    :rtype: np.ndarray
+    """
+    mask = values.isin(NAT_STRINGS).to_numpy(dtype=bool)
+    candidates = ~mask & (
+        values.str.contains(r"\d", regex=True).to_numpy(dtype=bool)
+        | values.isin(NON_DIGIT_DATES).to_numpy(dtype=bool)
+    )
+    remaining = np.flatnonzero(candidates)
+    if not len(remaining):
+        return mask
+
+    sample = values.iloc[remaining[:DATE_FORMAT_SAMPLE_SIZE]]
+    formats = [fmt for fmt in cache.formats() if _parse(sample, fmt).any()]
+    tried = set(formats)
+    while True:
+        for fmt in formats:
+            parsed = _parse(values.iloc[remaining], fmt)
+            if parsed.any():
+                cache.add(fmt)
+            mask[remaining[parsed]] = True
+            remaining = remaining[~parsed]
+            if not len(remaining):
+                return mask
+
+        # Values left may have another format (e.g. day-first dates whose
+        # day is over 12, after a month-first guess)
+        sample = values.iloc[remaining[:DATE_FORMAT_SAMPLE_SIZE]]
+        fmt = infer_date_format(sample)
+        if fmt is None or fmt in tried or not _parse(sample, fmt).any():
+            break
+        tried.add(fmt)
+        formats = [fmt]
+
+    rest = values.iloc[remaining]
+    remaining = remaining[
+        rest.str.fullmatch(_DATE_CANDIDATE_RE.pattern).to_numpy(dtype=bool)
+        | rest.isin(NON_DIGIT_DATES).to_numpy(dtype=bool)
+    ]
+    if len(remaining):
+        mask[remaining] = _parse(values.iloc[remaining], "mixed")
+    return mask
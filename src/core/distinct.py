@@ -0,0 +1,176 @@
+"""Memory-bounded counting of distinct values, spilling sorted runs to disk"""
+
+from collections.abc import Iterable, Iterator
+import csv
+import heapq
+import itertools
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from ..config import DEFAULT_TEMPLATE_MEMORY_MB
+
+ENTRY_OVERHEAD_BYTES = 120
+"""Approximate memory of a counted value besides its characters (str object and
+dict slot)"""
+
+MAX_OPEN_RUNS = 64
+"""Runs merged at once; more runs are merged in several passes"""
+
+
+def _read_run(path: str) -> Iterator[tuple[str, int]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            value, count = json.loads(line)
+            yield value, count
+
+
+def _write_run(path: str, items: Iterable[tuple[str, int]]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for value, count in items:
+            f.write(json.dumps([value, count]))
+            f.write("\n")
+
+
+def _merge(runs: Iterable[Iterable[tuple[str, int]]]) -> Iterator[tuple[str, int]]:
+    """Merges runs sorted by value, adding up the counts of equal values."""
+    merged = heapq.merge(*runs, key=lambda item: item[0])
+    for value, group in itertools.groupby(merged, key=lambda item: item[0]):
+        yield value, sum(count for _, count in group)
+
+
+class DistinctCounter:
+    """
+    Counts the occurrences of distinct values within a memory budget.
+
+    Counts are kept in a dict until their estimated size exceeds the
+    budget; the dict is then written to a temporary file as a run sorted by
+    value, and emptied. ``items`` merges the runs and what is left in
+    memory, so the memory needed depends on the budget and not on the
+    number of distinct values.
+
+    Use as a context manager: the runs are deleted on exit.
+    """
+
+    def __init__(
+        self, memory_mb: float = DEFAULT_TEMPLATE_MEMORY_MB, tmp_dir: str | None = None
+    ) -> None:
+        """
+        :param memory_mb: Memory budget of the counts, in MB, defaults to
+                          DEFAULT_TEMPLATE_MEMORY_MB
+        :type memory_mb: float, optional
+        :param tmp_dir: Directory of the temporary runs, defaults to the
+                        system's temporary directory
+        :type tmp_dir: str | None, optional
+        """
+        self.max_bytes = int(memory_mb * 1024 * 1024)
+        self.counts: dict[str, int] = {}
+        """Counts not spilled yet"""
+        self.runs: list[str] = []
+        """Paths of the spilled runs"""
+        self._bytes = 0
+        self._tmp = tempfile.TemporaryDirectory(prefix="clanto_distinct_", dir=tmp_dir)
+
+    def update(self, counts: pd.Series) -> None:
+        """
+        Adds occurrences.
+
+        :param counts: Number of occurrences, indexed by value
+        :type counts: pd.Series
+        """
+        current = self.counts
+        for value, count in zip(counts.index, counts.to_numpy()):
+            if value in current:
+                current[value] += int(count)
+            else:
+                current[value] = int(count)
+                self._bytes += ENTRY_OVERHEAD_BYTES + len(value)
+        if self._bytes > self.max_bytes:
+            self.spill()
+
+    def spill(self) -> None:
+        """Writes the counts in memory as a sorted run and empties them."""
+        if not self.counts:
+            return
+        path = os.path.join(self._tmp.name, f"run_{len(self.runs):06d}.jsonl")
+        _write_run(path, sorted(self.counts.items()))
+        self.runs.append(path)
+        self.counts = {}
+        self._bytes = 0
+
+    def items(self) -> Iterator[tuple[str, int]]:
+        """
+        Every distinct value and its total count, sorted by value.
+
+        :yield: (value, count) pairs
+        :rtype: Iterator[tuple[str, int]]
+        """
+        # Merge passes keep the number of open files bounded
+        while len(self.runs) > MAX_OPEN_RUNS:
+            batch, self.runs = self.runs[:MAX_OPEN_RUNS], self.runs[MAX_OPEN_RUNS:]
+            path = os.path.join(self._tmp.name, f"merged_{len(self.runs):06d}.jsonl")
+            _write_run(path, _merge(_read_run(run) for run in batch))
+            for run in batch:
+                os.remove(run)
+            self.runs.append(path)
+
+        yield from _merge(
+            [_read_run(run) for run in self.runs] + [sorted(self.counts.items())]
+        )
+
+    def close(self) -> None:
+        """Deletes the spilled runs."""
+        self._tmp.cleanup()
+
+    def __enter__(self) -> "DistinctCounter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def save_template(
+    items: Iterable[tuple[str, int]], path: str, counts_path: str | None = None
+) -> int:
+    """
+    Writes a mapping template (every value mapped to ``""``) one entry at a
+    time, formatted as ``json.dump(template, f, indent=4)`` would, and
+    optionally the count of every value as a CSV.
+
+    Both files are written to a temporary ``.part`` file first, so a failed
+    run leaves the previous template untouched.
+
+    :param items: (value, count) pairs, in template order
+    :type items: Iterable[tuple[str, int]]
+    :param path: Path of the template (.clason)
+    :type path: str
+    :param counts_path: Path of the CSV of counts, defaults to None (not written)
+    :type counts_path: str | None, optional
+    :return: Number of entries written
+    :rtype: int
+    """
+    entries = 0
+    with (
+        open(f"{path}.part", "w", encoding="utf-8") as template,
+        open(
+            f"{counts_path}.part" if counts_path else os.devnull,
+            "w",
+            encoding="utf-8",
+            newline="",
+        ) as counts_file,
+    ):
+        counts = csv.writer(counts_file, lineterminator=os.linesep)
+        counts.writerow(["original", "count"])
+        for value, count in items:
+            template.write(",\n    " if entries else "{\n    ")
+            template.write(f"{json.dumps(value)}: {json.dumps('')}")
+            counts.writerow([value, count])
+            entries += 1
+        template.write("\n}" if entries else "{}")
+
+    os.replace(f"{path}.part", path)
+    if counts_path:
+        os.replace(f"{counts_path}.part", counts_path)
+    return entries
@@ -0,0 +1,188 @@
+"""Streaming writers and readers of the mapping export"""
+
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+import csv
+import os
+
+import pandas as pd
+
+from ..config import DEFAULT_MAPPING_BATCH_SIZE, MAPPING_COLUMNS, MAPPING_FILENAMES
+
+
+class MappingWriter(ABC):
+    """
+    Writes the mapping export batch by batch, as new pairs are created, so
+    the mapping is never copied into a DataFrame.
+
+    Pairs go to a temporary ``.part`` file that replaces ``path`` on
+    ``close``: a failed run leaves the previous export untouched, and the
+    previous export can be read while the new one is being written.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: Path of the export
+        :type path: str
+        """
+        self.path = path
+        self.rows = 0
+        """Pairs written so far"""
+        self._tmp_path = f"{path}.part"
+
+    @abstractmethod
+    def _write(self, pairs: list[tuple[str, str]]) -> None: ...
+
+    @abstractmethod
+    def _close(self) -> None: ...
+
+    def write(self, pairs: list[tuple[str, str]]) -> None:
+        """
+        Appends a batch of pairs.
+
+        :param pairs: (original, anonymised) pairs
+        :type pairs: list[tuple[str, str]]
+        """
+        if pairs:
+            self._write(pairs)
+            self.rows += len(pairs)
+
+    def close(self) -> None:
+        """Finalises the export and moves it to ``path``."""
+        self._close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        """Discards the export, keeping whatever was at ``path`` before."""
+        self._close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class CsvMappingWriter(MappingWriter):
+    """Mapping export as CSV, byte for byte what ``DataFrame.to_csv`` writes."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._file = open(self._tmp_path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file, lineterminator=os.linesep)
+        self._writer.writerow(MAPPING_COLUMNS)
+
+    def _write(self, pairs: list[tuple[str, str]]) -> None:
+        self._writer.writerows(pairs)
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class ParquetMappingWriter(MappingWriter):
+    """
+    Mapping export as Parquet: one zstd-compressed row group per batch,
+    several times smaller than the CSV and loaded without parsing.
+    """
+
+    def __init__(self, path: str) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("The Parquet mapping needs pyarrow: pip install pyarrow")
+
+        super().__init__(path)
+        self._pa = pa
+        self._schema = pa.schema([(column, pa.string()) for column in MAPPING_COLUMNS])
+        self._writer = pq.ParquetWriter(
+            self._tmp_path, self._schema, compression="zstd"
+        )
+
+    def _write(self, pairs: list[tuple[str, str]]) -> None:
+        originals, anonymised = zip(*pairs)
+        self._writer.write_table(
+            self._pa.table(
+                [
+                    self._pa.array(originals, self._pa.string()),
+                    self._pa.array(anonymised, self._pa.string()),
+                ],
+                schema=self._schema,
+            )
+        )
+
+    def _close(self) -> None:
+        self._writer.close()
+
+
+MAPPING_WRITERS = {"csv": CsvMappingWriter, "parquet": ParquetMappingWriter}
+"""Writer per mapping format (see MAPPING_FILENAMES)"""
+
+
+def open_mapping_writer(output_dir: str, mapping_format: str = "csv") -> MappingWriter:
+    """
+    Starts the mapping export of a run.
+
+    :param output_dir: Output directory
+    :type output_dir: str
+    :param mapping_format: 'csv' or 'parquet', defaults to 'csv'
+    :type mapping_format: str, optional
+    :raises ValueError: If the format is unknown
+    :return: The writer, to be closed (or aborted) at the end of the run
+    :rtype: MappingWriter
+    """
+    if mapping_format not in MAPPING_WRITERS:
+        raise ValueError(
+            f"Unknown mapping format '{mapping_format}', expected one of "
+            f"{list(MAPPING_WRITERS)}."
+        )
+    path = os.path.join(output_dir, MAPPING_FILENAMES[mapping_format])
+    return MAPPING_WRITERS[mapping_format](path)
+
+
+def find_mapping(output_dir: str, mapping_format: str = "csv") -> str | None:
+    """
+    Finds the mapping export of a previous run, preferring ``mapping_format``.
+
+    :param output_dir: Output directory of the previous run
+    :type output_dir: str
+    :param mapping_format: Preferred format, defaults to 'csv'
+    :type mapping_format: str, optional
+    :return: Path of the export, or None if there is none
+    :rtype: str | None
+    """
+    formats = [mapping_format] + [f for f in MAPPING_FILENAMES if f != mapping_format]
+    for fmt in formats:
+        path = os.path.join(output_dir, MAPPING_FILENAMES[fmt])
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def iter_mapping(
+    path: str, batch_size: int = DEFAULT_MAPPING_BATCH_SIZE
+) -> Iterator[list[tuple[str, str]]]:
+    """
+    Reads a mapping export (CSV or Parquet) batch by batch, e.g. to warm
+    start a run or to re-identify anonymised values.
+
+    :param path: Path of the export
+    :type path: str
+    :param batch_size: Pairs per batch, defaults to DEFAULT_MAPPING_BATCH_SIZE
+    :type batch_size: int, optional
+    :yield: (original, anonymised) pairs, in export order
+    :rtype: Iterator[list[tuple[str, str]]]
+    """
+    if os.path.splitext(path)[1].lower() == ".parquet":
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        try:
+            for batch in parquet.iter_batches(batch_size=batch_size):
+                originals, anonymised = batch.columns
+                yield list(zip(originals.to_pylist(), anonymised.to_pylist()))
+        finally:
+            parquet.close()
+        return
+
+    with pd.read_csv(
+        path, dtype=str, keep_default_na=False, chunksize=batch_size
+    ) as reader:
+        for chunk in reader:
+            yield list(chunk.itertuples(index=False, name=None))
@@ -0,0 +1,355 @@
+"""Pluggable backends for the original <-> anonymised value mapping"""
+
+from abc import ABC
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, MutableMapping
+import sqlite3
+
+from ..config import DEFAULT_MAPPING_BATCH_SIZE, DEFAULT_MAPPING_CACHE_SIZE
+
+_SQLITE_MAX_VARIABLES = 900
+"""Parameters per ``IN (...)`` query, below SQLite's historical limit of 999"""
+
+
+class MappingStore(ABC):
+    """
+    Holds the mapping used by the Anonymiser.
+
+    ``forward`` (original -> anonymised) and ``reverse`` (anonymised ->
+    original) behave like dictionaries, so the Anonymiser does not need to
+    know which backend it is talking to.
+    """
+
+    forward: MutableMapping[str, str]
+    """Original -> anonymised value"""
+    reverse: MutableMapping[str, str]
+    """Anonymised -> original value, used for collision checking"""
+
+    def prefetch(self, originals: Iterable[str]) -> None:
+        """Warms up the backend for a batch of upcoming lookups."""
+
+    def flush(self) -> None:
+        """Persists every pending write."""
+
+    def close(self) -> None:
+        """Persists every pending write and releases the backend."""
+        self.flush()
+
+
+class InMemoryMappingStore(MappingStore):
+    """Default backend: two plain dictionaries, lost at exit."""
+
+    def __init__(self) -> None:
+        self.forward: dict[str, str] = {}
+        self.reverse: dict[str, str] = {}
+
+
+class _ForwardView(MutableMapping):
+    def __init__(self, store: "SqliteMappingStore") -> None:
+        self._store = store
+
+    def __getitem__(self, original: str) -> str:
+        value = self._store.get(original)
+        if value is None:
+            raise KeyError(original)
+        return value
+
+    def __contains__(self, original: object) -> bool:
+        return isinstance(original, str) and self._store.get(original) is not None
+
+    def __setitem__(self, original: str, anonymised: str) -> None:
+        self._store.put(original, anonymised)
+
+    def __delitem__(self, original: str) -> None:
+        self._store.delete(original)
+
+    def __iter__(self) -> Iterator[str]:
+        return (original for original, _ in self._store.items())
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        return self._store.items()
+
+
+class _ReverseView(MutableMapping):
+    def __init__(self, store: "SqliteMappingStore") -> None:
+        self._store = store
+
+    def __getitem__(self, anonymised: str) -> str:
+        value = self._store.get_reverse(anonymised)
+        if value is None:
+            raise KeyError(anonymised)
+        return value
+
+    def __contains__(self, anonymised: object) -> bool:
+        return (
+            isinstance(anonymised, str)
+            and self._store.get_reverse(anonymised) is not None
+        )
+
+    def __setitem__(self, anonymised: str, original: str) -> None:
+        self._store.put(original, anonymised)
+
+    def __delitem__(self, anonymised: str) -> None:
+        original = self[anonymised]
+        self._store.delete(original)
+
+    def __iter__(self) -> Iterator[str]:
+        return (anonymised for _, anonymised in self._store.items())
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+
+class SqliteMappingStore(MappingStore):
+    """
+    Mapping kept in a SQLite database, with an in-memory hot cache in front.
+
+    Writes are buffered and inserted in batches inside a single transaction,
+    and ``prefetch`` resolves a whole batch of originals with a few ``IN``
+    queries. Reopening an existing database resumes its mapping, so a later
+    run maps the same originals to the same anonymised values.
+
+    Both directions are cached, misses included: a value found absent (e.g.
+    by ``prefetch``) is not queried again until it is written. While no
+    pair has been evicted from a cache of a database created empty, the
+    cache holds the whole mapping and its misses are answered without any
+    query, so a first run never reads the database.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        cache_size: int = DEFAULT_MAPPING_CACHE_SIZE,
+        batch_size: int = DEFAULT_MAPPING_BATCH_SIZE,
+    ) -> None:
+        """
+        :param path: SQLite database file, created if it does not exist
+        :type path: str
+        :param cache_size: Entries kept in the hot cache, defaults to DEFAULT_MAPPING_CACHE_SIZE
+        :type cache_size: int, optional
+        :param batch_size: Pending writes that trigger a flush, defaults to DEFAULT_MAPPING_BATCH_SIZE
+        :type batch_size: int, optional
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS mapping ("
+            "id INTEGER PRIMARY KEY, "
+            "original TEXT NOT NULL UNIQUE, "
+            "anonymised TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS mapping_anonymised ON mapping (anonymised)"
+        )
+        self._conn.commit()
+        empty = self._conn.execute("SELECT 1 FROM mapping LIMIT 1").fetchone() is None
+
+        self._cache: OrderedDict[str, str | None] = OrderedDict()
+        """Hot cache of original -> anonymised, None for unknown originals"""
+        self._reverse_cache: OrderedDict[str, str | None] = OrderedDict()
+        """Hot cache of anonymised -> original, None for unused values"""
+        self._complete = empty
+        """Does ``_cache`` hold every pair of the mapping?"""
+        self._reverse_complete = empty
+        """Does ``_reverse_cache`` hold every pair of the mapping?"""
+        self._pending: dict[str, str] = {}
+        """Writes not flushed yet, original -> anonymised"""
+        self._pending_reverse: dict[str, str] = {}
+        """Writes not flushed yet, anonymised -> original"""
+
+        self.forward = _ForwardView(self)
+        self.reverse = _ReverseView(self)
+
+    def _remember(
+        self, cache: OrderedDict[str, str | None], key: str, value: str | None
+    ) -> bool:
+        """Caches a lookup; returns False if a known pair had to be evicted."""
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.cache_size:
+            return cache.popitem(last=False)[1] is None
+        return True
+
+    def _cache_put(self, original: str, anonymised: str | None) -> None:
+        if not self._remember(self._cache, original, anonymised):
+            self._complete = False
+
+    def _reverse_cache_put(self, anonymised: str, original: str | None) -> None:
+        if not self._remember(self._reverse_cache, anonymised, original):
+            self._reverse_complete = False
+
+    def get(self, original: str) -> str | None:
+        """
+        Looks up the anonymised value of an original value.
+
+        :param original: Original value
+        :type original: str
+        :return: The anonymised value, or None if unknown.
+        :rtype: str | None
+        """
+        if original in self._pending:
+            return self._pending[original]
+        if original in self._cache:
+            self._cache.move_to_end(original)
+            return self._cache[original]
+        if self._complete:
+            return None
+
+        row = self._conn.execute(
+            "SELECT anonymised FROM mapping WHERE original = ?", (original,)
+        ).fetchone()
+        anonymised = row[0] if row else None
+        self._cache_put(original, anonymised)
+        return anonymised
+
+    def get_many(self, originals: Iterable[str]) -> dict[str, str]:
+        """
+        Batched lookup of many original values.
+
+        :param originals: Original values
+        :type originals: Iterable[str]
+        :return: original -> anonymised, for the known values only.
+        :rtype: dict[str, str]
+        """
+        found = {}
+        missing = []
+        for original in dict.fromkeys(originals):
+            if original in self._pending:
+                found[original] = self._pending[original]
+            elif original in self._cache:
+                if self._cache[original] is not None:
+                    found[original] = self._cache[original]
+            elif not self._complete:
+                missing.append(original)
+
+        for i in range(0, len(missing), _SQLITE_MAX_VARIABLES):
+            batch = missing[i : i + _SQLITE_MAX_VARIABLES]
+            rows = self._conn.execute(
+                "SELECT original, anonymised FROM mapping WHERE original IN "
+                f"({', '.join('?' * len(batch))})",
+                batch,
+            )
+            rows = dict(rows)
+            for original in batch:
+                anonymised = rows.get(original)
+                if anonymised is not None:
+                    found[original] = anonymised
+                self._cache_put(original, anonymised)
+        return found
+
+    def prefetch(self, originals: Iterable[str]) -> None:
+        """
+        Loads a batch of originals into the hot cache with few queries,
+        remembering the unknown ones as well.
+        """
+        self.get_many(originals)
+
+    def get_reverse(self, anonymised: str) -> str | None:
+        """
+        Looks up the original value of an anonymised value.
+
+        :param anonymised: Anonymised value
+        :type anonymised: str
+        :return: The original value, or None if unknown.
+        :rtype: str | None
+        """
+        if anonymised in self._pending_reverse:
+            return self._pending_reverse[anonymised]
+        if anonymised in self._reverse_cache:
+            self._reverse_cache.move_to_end(anonymised)
+            return self._reverse_cache[anonymised]
+        if self._reverse_complete:
+            return None
+
+        row = self._conn.execute(
+            "SELECT original FROM mapping WHERE anonymised = ? LIMIT 1", (anonymised,)
+        ).fetchone()
+        original = row[0] if row else None
+        self._reverse_cache_put(anonymised, original)
+        return original
+
+    def put(self, original: str, anonymised: str) -> None:
+        """
+        Buffers a new pair, flushing once ``batch_size`` pairs are pending.
+
+        :param original: Original value
+        :type original: str
+        :param anonymised: Anonymised value
+        :type anonymised: str
+        """
+        previous = self._pending.get(original, self._cache.get(original))
+        if previous is not None and previous != anonymised:
+            self._reverse_cache.pop(previous, None)
+        self._pending[original] = anonymised
+        self._pending_reverse[anonymised] = original
+        self._cache_put(original, anonymised)
+        self._reverse_cache_put(anonymised, original)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def put_many(self, pairs: Iterable[tuple[str, str]]) -> None:
+        """
+        Buffers many new pairs.
+
+        :param pairs: (original, anonymised) pairs
+        :type pairs: Iterable[tuple[str, str]]
+        """
+        for original, anonymised in pairs:
+            self.put(original, anonymised)
+
+    def delete(self, original: str) -> None:
+        """
+        Removes an original value from the mapping.
+
+        :param original: Original value
+        :type original: str
+        """
+        self.flush()
+        anonymised = self.get(original)
+        self._cache_put(original, None)
+        if anonymised is not None:
+            self._reverse_cache.pop(anonymised, None)
+        self._conn.execute("DELETE FROM mapping WHERE original = ?", (original,))
+        self._conn.commit()
+
+    def flush(self) -> None:
+        """Inserts every pending pair in a single transaction."""
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO mapping (original, anonymised) VALUES (?, ?) "
+                "ON CONFLICT (original) DO UPDATE SET anonymised = excluded.anonymised",
+                self._pending.items(),
+            )
+        self._pending.clear()
+        self._pending_reverse.clear()
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        """
+        Iterates every pair, in insertion order.
+
+        :return: (original, anonymised) pairs
+        :rtype: Iterator[tuple[str, str]]
+        """
+        self.flush()
+        return iter(
+            self._conn.execute("SELECT original, anonymised FROM mapping ORDER BY id")
+        )
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._conn.execute("SELECT COUNT(*) FROM mapping").fetchone()[0]
+
+    def close(self) -> None:
+        """Flushes pending pairs and closes the database."""
+        self.flush()
+        self._conn.close()
@@ -0,0 +1,197 @@
+"""Per-stage timings and counters of a run, saved as a JSON report"""
+
+import cProfile
+import json
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICS_FILENAME = "run_metrics.json"
+"""Report of the run, saved next to the mapping"""
+
+
+class RunMetrics:
+    """
+    Collects wall times per stage (discovery, load, classify, anonymise,
+    save), broken down per file and per column, plus counters of cells and
+    mapping activity.
+
+    One instance is shared by the manager and the Anonymiser of a run, and
+    may be updated from the threads of a pipelined run. Timings use
+    ``time.perf_counter`` and counters are plain increments, so the overhead
+    is negligible next to the work being measured.
+    """
+
+    def __init__(self) -> None:
+        self.started = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+
+        self.stages: defaultdict[str, float] = defaultdict(float)
+        """Stage -> seconds, over the whole run"""
+        self.files: dict[str, dict] = {}
+        """File -> seconds per stage, counters and per-column breakdown"""
+        self.counters: Counter = Counter()
+        """Counter -> count, over the whole run"""
+        self.current_file: str | None = None
+        """File being processed, which unlabelled timings are attributed to"""
+        self._lock = threading.Lock()
+
+    def _entry(self, file: str | None, column=None) -> dict | None:
+        file = file if file is not None else self.current_file
+        if file is None:
+            return None
+        entry = self.files.setdefault(file, {"columns": {}})
+        if column is None:
+            return entry
+        return entry["columns"].setdefault(str(column), {})
+
+    def add_time(
+        self, stage: str, seconds: float, file: str | None = None, column=None
+    ) -> None:
+        """
+        Adds wall time to a stage, and to its file and column if any.
+
+        :param stage: Stage name
+        :type stage: str
+        :param seconds: Elapsed seconds
+        :type seconds: float
+        :param file: File, defaults to ``current_file``
+        :type file: str | None, optional
+        :param column: Column of the file, if the time belongs to one
+        :type column: Any, optional
+        """
+        with self._lock:
+            self.stages[stage] += seconds
+            for entry in (
+                self._entry(file),
+                self._entry(file, column) if column is not None else None,
+            ):
+                if entry is not None:
+                    entry[stage] = entry.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str, file: str | None = None, column=None) -> Iterator[None]:
+        """
+        Times the enclosed block as ``name``.
+
+        :param name: Stage name
+        :type name: str
+        :param file: File, defaults to ``current_file``
+        :type file: str | None, optional
+        :param column: Column of the file, if the block works on one
+        :type column: Any, optional
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start, file, column)
+
+    @contextmanager
+    def file(self, name: str) -> Iterator[None]:
+        """
+        Attributes the timings and counters of the enclosed block to a file.
+
+        :param name: File name (or ``database:table``)
+        :type name: str
+        """
+        previous = self.current_file
+        self.current_file = name
+        try:
+            yield
+        finally:
+            self.current_file = previous
+
+    def count(self, name: str, n: int = 1, column=None) -> None:
+        """
+        Increments a counter, and its file and column counterparts if any.
+
+        :param name: Counter name
+        :type name: str
+        :param n: Increment, defaults to 1
+        :type n: int, optional
+        :param column: Column of the current file, if the count belongs to one
+        :type column: Any, optional
+        """
+        with self._lock:
+            self.counters[name] += n
+            for entry in (
+                self._entry(None),
+                self._entry(None, column) if column is not None else None,
+            ):
+                if entry is not None:
+                    entry[name] = entry.get(name, 0) + n
+
+    @staticmethod
+    def peak_memory() -> int | None:
+        """
+        Peak resident memory of the process so far.
+
+        :return: Bytes, or None where ``resource`` is not available
+        :rtype: int | None
+        """
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def as_dict(self, **extra) -> dict:
+        """
+        The report as a JSON-serialisable dict.
+
+        :param extra: Additional top-level entries (e.g. the method)
+        :return: The report
+        :rtype: dict
+        """
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_seconds": time.perf_counter() - self._start,
+            "peak_memory_bytes": self.peak_memory(),
+            **extra,
+            "stages": dict(self.stages),
+            "counters": dict(self.counters),
+            "files": self.files,
+        }
+
+    def save(self, path: str, **extra) -> None:
+        """
+        Writes the report.
+
+        :param path: Path of the JSON report
+        :type path: str
+        :param extra: Additional top-level entries (e.g. the method)
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(**extra), f, indent=4, default=str)
+
+
+@contextmanager
+def profile(path: str | None) -> Iterator[None]:
+    """
+    Runs the enclosed block under cProfile and dumps the stats to ``path``
+    (readable with ``pstats`` or snakeviz). Does nothing if ``path`` is None.
+
+    :param path: Path of the ``.prof`` file, or None
+    :type path: str | None
+    """
+    if path is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
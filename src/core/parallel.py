@@ -0,0 +1,152 @@
+"""Process-pool helpers to spread anonymisation across files and row shards"""
+
+from collections import Counter
+from collections.abc import Collection
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .rules import RuleEngine
+
+_WORKER_RULES: RuleEngine | None = None
+"""Rule engine compiled once per worker process"""
+
+
+def _init_worker(
+    include: list[str], exclude: list[str], verdict_cache_size: int
+) -> None:
+    """Compiles the detection rules once in every worker process."""
+    global _WORKER_RULES
+    _WORKER_RULES = RuleEngine(
+        include=include, exclude=exclude, verdict_cache_size=verdict_cache_size
+    )
+
+
+def scan_shard(
+    columns: dict[int, np.ndarray],
+) -> tuple[dict[int, list[tuple[str, list[tuple[int, int, str]]]]], Counter]:
+    """
+    Classifies the distinct values of a row shard and finds their tokens.
+
+    This is the CPU-heavy, mapping-independent part of the anonymisation,
+    so it can run in any worker process.
+
+    :param columns: Column position -> values of the shard for that column
+    :type columns: dict[int, np.ndarray]
+    :return: Column position -> identifiable distinct values (in order of
+             first appearance) with their ``RuleEngine.detect`` spans, and
+             the rule hits of this shard.
+    :rtype: tuple[dict[int, list[tuple[str, list[tuple[int, int, str]]]]], Counter]
+    """
+    found = {}
+    for position, values in columns.items():
+        _, uniques = pd.factorize(values, use_na_sentinel=True)
+        uniques = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+        identifiable = uniques[_WORKER_RULES.identifiable_mask(uniques)]
+        found[position] = list(zip(identifiable, _WORKER_RULES.scan(identifiable)))
+
+    hits = _WORKER_RULES.hits.copy()
+    _WORKER_RULES.hits.clear()
+    return found, hits
+
+
+def classify_values(values: np.ndarray) -> np.ndarray:
+    """
+    Runs the batch classifier of the worker over distinct values.
+
+    :param values: Distinct values of a column
+    :type values: np.ndarray
+    :return: Mask of the identifiable values
+    :rtype: np.ndarray
+    """
+    mask = _WORKER_RULES.identifiable_mask(pd.Series(values, dtype=object))
+    _WORKER_RULES.hits.clear()
+    return np.asarray(mask, dtype=bool)
+
+
+def is_text_dtype(dtype) -> bool:
+    """
+    Whether a column of this dtype may hold identifiable strings.
+
+    :param dtype: dtype of a column
+    :type dtype: Any
+    :return: True for object/string columns, and categoricals of strings
+    :rtype: bool
+    """
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    return pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+
+
+def text_columns(df: pd.DataFrame) -> list[int]:
+    """
+    Positions of the columns that may hold identifiable strings.
+
+    :param df: DataFrame to inspect
+    :type df: pd.DataFrame
+    :return: Positions of object/string/categorical columns
+    :rtype: list[int]
+    """
+    return [i for i, dtype in enumerate(df.dtypes) if is_text_dtype(dtype)]
+
+
+def submit_shards(
+    pool: ProcessPoolExecutor,
+    df: pd.DataFrame,
+    shard_rows: int,
+    skip: Collection[int] = (),
+) -> list[Future]:
+    """
+    Splits the text columns of a DataFrame in row shards and submits them.
+
+    Categorical columns are not submitted: only their categories need to be
+    classified, which is cheaper done in place than shipped to a worker.
+    Neither are the columns in ``skip``.
+
+    :param pool: Pool created by ``make_pool``
+    :type pool: ProcessPoolExecutor
+    :param df: DataFrame to scan
+    :type df: pd.DataFrame
+    :param shard_rows: Maximum number of rows per shard
+    :type shard_rows: int
+    :param skip: Positions of text columns not to submit, defaults to none
+    :type skip: Collection[int], optional
+    :return: One future per shard, in row order
+    :rtype: list[Future]
+    """
+    positions = [
+        i
+        for i in text_columns(df)
+        if i not in skip and not isinstance(df.dtypes.iloc[i], pd.CategoricalDtype)
+    ]
+    if not positions:
+        return []
+    return [
+        pool.submit(
+            scan_shard,
+            {
+                i: df.iloc[start : start + shard_rows, i].to_numpy(dtype=object)
+                for i in positions
+            },
+        )
+        for start in range(0, len(df), shard_rows)
+    ]
+
+
+def make_pool(workers: int, rules: RuleEngine) -> ProcessPoolExecutor:
+    """
+    Creates the process pool, with the rules compiled in every worker.
+
+    :param workers: Number of processes
+    :type workers: int
+    :param rules: Rules of the coordinating Anonymiser
+    :type rules: RuleEngine
+    :return: The pool
+    :rtype: ProcessPoolExecutor
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(rules.include, rules.exclude, rules.verdicts.maxsize),
+    )
@@ -0,0 +1,88 @@
+"""Pipelined executor overlapping the reads, anonymisation and writes of a run"""
+
+import asyncio
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+_DONE = object()
+"""End of the source"""
+
+
+async def _run(
+    source: Iterator[T],
+    process: Callable[[T], U],
+    sink: Callable[[U], None],
+    max_in_flight: int,
+) -> None:
+    loop = asyncio.get_running_loop()
+    # Acquired before an item is read, released once it has been written
+    slots = asyncio.Semaphore(max(1, max_in_flight))
+    loaded: asyncio.Queue = asyncio.Queue()
+    processed: asyncio.Queue = asyncio.Queue()
+
+    # One thread per stage: every stage sees the items in source order, so
+    # the mapping is built as in a sequential run and appends stay ordered
+    with (
+        ThreadPoolExecutor(1, thread_name_prefix="clanto-read") as reader,
+        ThreadPoolExecutor(1, thread_name_prefix="clanto-anonymise") as worker,
+        ThreadPoolExecutor(1, thread_name_prefix="clanto-write") as writer,
+    ):
+
+        async def read() -> None:
+            while True:
+                await slots.acquire()
+                item = await loop.run_in_executor(reader, next, source, _DONE)
+                await loaded.put(item)
+                if item is _DONE:
+                    return
+
+        async def anonymise() -> None:
+            while (item := await loaded.get()) is not _DONE:
+                await processed.put(await loop.run_in_executor(worker, process, item))
+            await processed.put(_DONE)
+
+        async def write() -> None:
+            while (item := await processed.get()) is not _DONE:
+                await loop.run_in_executor(writer, sink, item)
+                slots.release()
+
+        tasks = [asyncio.ensure_future(stage()) for stage in (read, anonymise, write)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def run_pipeline(
+    source: Iterable[T],
+    process: Callable[[T], U],
+    sink: Callable[[U], None],
+    max_in_flight: int,
+) -> None:
+    """
+    Runs ``sink(process(item))`` for every item of ``source``, overlapping
+    the stages: item N+1 is read and item N-1 written while item N is
+    processed.
+
+    Reads, processing and writes each run in their own thread, driven by an
+    asyncio loop, so blocking pandas I/O does not wait for the CPU-bound
+    stage. At most ``max_in_flight`` items are held between the start of
+    their read and the end of their write, which bounds memory.
+
+    Must not be called from a running event loop.
+
+    :param source: Items, read lazily (e.g. files loaded on demand)
+    :type source: Iterable[T]
+    :param process: CPU-bound stage (e.g. anonymisation)
+    :type process: Callable[[T], U]
+    :param sink: Output stage (e.g. saving a file)
+    :type sink: Callable[[U], None]
+    :param max_in_flight: Items read but not written yet, at most
+    :type max_in_flight: int
+    """
+    asyncio.run(_run(iter(source), process, sink, max_in_flight))
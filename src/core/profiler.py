@@ -0,0 +1,355 @@
+"""Sampling column profiler building a per-column plan for the Anonymiser"""
+
+from configparser import ConfigParser
+from dataclasses import dataclass, field
+import os
+import re
+
+import pandas as pd
+
+from ..config import DEFAULT_CFG_FILENAME, DEFAULT_PROFILE_SAMPLE_ROWS
+from ..utils import _EMAIL_RE, _PHONE_RE, _number_mask
+from .dates import date_mask
+from .parallel import text_columns
+from .rules import RuleEngine
+
+PLAN_SECTION_PREFIX = "column_plan:"
+"""Config sections holding the plan of a file: ``[column_plan:<file>]``"""
+
+ACTION_ANONYMISE = "anonymise"
+ACTION_SKIP = "skip"
+ACTION_SCAN = "scan"
+"""Free text: only the tokens found inside the cells (e-mails, phones, matches
+of ``identifiable`` rules) are replaced, cells without any are kept as they are.
+Never chosen by the profiler, only set by hand."""
+
+KIND_ACTIONS = {
+    "email": ACTION_ANONYMISE,
+    "phone": ACTION_ANONYMISE,
+    "free_text": ACTION_ANONYMISE,
+    "text": ACTION_ANONYMISE,
+    "enum": ACTION_ANONYMISE,
+    "code": ACTION_ANONYMISE,
+    "date": ACTION_SKIP,
+    "numeric_string": ACTION_SKIP,
+    "empty": ACTION_SKIP,
+    "non_identifiable": ACTION_SKIP,
+}
+"""Default action per column kind. Only the kinds of columns without any
+identifiable cell in the sample are skipped: enums and codes hold cells the
+classifier flags (e.g. first names, user IDs), so they are only skipped once
+the plan is edited by hand."""
+
+ENUM_MAX_DISTINCT = 20
+"""Low-cardinality enums have at most this many distinct values in the sample..."""
+ENUM_MAX_RATIO = 0.05
+"""...and at most this many distinct values per sampled cell"""
+DOMINANT_SHARE = 0.5
+"""Share of the identifiable cells that makes a column email-like, phone-like, etc."""
+
+_CODE_RE = re.compile(r"^[A-Z0-9]+(?:[-_./][A-Z0-9]+)*$")
+"""Codes: upper-case letters and digits, optionally separated (e.g. ORD-0012)"""
+
+_PLAN_KEY_ESCAPES = re.compile(r"[%=:\r\n]|^[\[#; \t]|[ \t]$")
+"""Characters of a column name that configparser would not read back as part
+of an option name: delimiters, line breaks, a leading comment or section
+prefix, surrounding blanks, and ``%`` itself"""
+_PLAN_KEY_ESCAPED = re.compile(r"%([0-9a-fA-F]{2})")
+
+
+def encode_plan_key(column: str) -> str:
+    """
+    Option name of a column in a plan section, percent-escaping the
+    characters configparser would split or strip (see ``decode_plan_key``).
+
+    :param column: Lower-cased column name
+    :type column: str
+    :return: Option name
+    :rtype: str
+    """
+    return _PLAN_KEY_ESCAPES.sub(lambda m: f"%{ord(m.group()):02x}", column)
+
+
+def decode_plan_key(option: str) -> str:
+    """
+    Column name of an option of a plan section, reversing ``encode_plan_key``.
+
+    :param option: Option name
+    :type option: str
+    :return: Lower-cased column name
+    :rtype: str
+    """
+    return _PLAN_KEY_ESCAPED.sub(lambda m: chr(int(m.group(1), 16)), option)
+
+
+def _append_options(path: str, sections: dict[str, list[str]]) -> None:
+    """
+    Adds option lines to the sections of a config file, creating the
+    sections missing from it, and leaves the rest of its text (comments,
+    layout, other sections) as it is.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        lines = []
+
+    for section, options in sections.items():
+        header = next(
+            (
+                i
+                for i, line in enumerate(lines)
+                if not line[:1].isspace() and line.strip() == f"[{section}]"
+            ),
+            None,
+        )
+        if header is None:
+            lines += ([""] if lines and lines[-1].strip() else []) + [f"[{section}]"]
+            lines += options
+            continue
+
+        end = header + 1
+        for i in range(header + 1, len(lines)):
+            if not lines[i][:1].isspace() and ConfigParser.SECTCRE.match(
+                lines[i].strip()
+            ):
+                break
+            if lines[i].strip():
+                end = i + 1
+        lines[end:end] = options
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+@dataclass
+class ColumnProfile:
+    """Verdict of the profiler on a column."""
+
+    kind: str
+    """One of ``KIND_ACTIONS``"""
+    action: str
+    """``anonymise`` or ``skip``, see ``KIND_ACTIONS``"""
+    sampled: int = 0
+    """Non-empty cells sampled"""
+    distinct: int = 0
+    """Distinct values among them"""
+    scores: dict[str, float] = field(default_factory=dict)
+    """Share of the sampled cells per feature"""
+
+
+def _sample(series: pd.Series, sample_rows: int) -> pd.Series:
+    """Non-empty stripped strings of a deterministic sample of the column"""
+    values = series.dropna()
+    if len(values) > sample_rows:
+        values = values.sample(sample_rows, random_state=0)
+    values = pd.Series(values.to_numpy(dtype=object), dtype=object)
+    values = values[values.map(type).eq(str)].str.strip()
+    return values[values != ""].reset_index(drop=True)
+
+
+def profile_column(
+    series: pd.Series,
+    rules: RuleEngine,
+    sample_rows: int = DEFAULT_PROFILE_SAMPLE_ROWS,
+) -> ColumnProfile:
+    """
+    Profiles a text column from a sample of its cells.
+
+    The sample goes through the same classifier as the anonymisation
+    (``RuleEngine.identifiable_mask``); the identifiable cells are then
+    scored as emails, phones or free text, and the column as a whole as a
+    low-cardinality enum or a column of codes. A column is only skipped
+    when none of its sampled cells is identifiable.
+
+    :param series: Column to profile
+    :type series: pd.Series
+    :param rules: Detection rules of the Anonymiser
+    :type rules: RuleEngine
+    :param sample_rows: Cells sampled, defaults to DEFAULT_PROFILE_SAMPLE_ROWS
+    :type sample_rows: int, optional
+    :return: Kind of the column and the action to take
+    :rtype: ColumnProfile
+    """
+    values = _sample(series, sample_rows)
+    if values.empty:
+        return ColumnProfile("empty", KIND_ACTIONS["empty"])
+
+    sampled = len(values)
+    distinct = values.nunique()
+    numeric = _number_mask(values)
+    date = ~numeric & date_mask(values)
+    scores = {
+        "numeric_string": float(numeric.mean()),
+        "date": float(date.mean()),
+    }
+
+    # Sampled cells are not part of the run's rule hits
+    hits = rules.hits.copy()
+    try:
+        identifiable = values[rules.identifiable_mask(values)]
+    finally:
+        rules.hits.clear()
+        rules.hits.update(hits)
+    scores["identifiable"] = len(identifiable) / sampled
+    if identifiable.empty:
+        if numeric.all():
+            kind = "numeric_string"
+        elif (numeric | date).all():
+            kind = "date"
+        else:
+            kind = "non_identifiable"
+        return ColumnProfile(kind, KIND_ACTIONS[kind], sampled, distinct, scores)
+
+    shares = {
+        "email": identifiable.str.fullmatch(_EMAIL_RE.pattern).mean(),
+        "phone": identifiable.str.fullmatch(_PHONE_RE.pattern).mean(),
+        "free_text": identifiable.str.contains(r"\s", regex=True).mean(),
+    }
+    scores.update({kind: float(share) for kind, share in shares.items()})
+
+    if shares["email"] >= DOMINANT_SHARE:
+        kind = "email"
+    elif shares["phone"] >= DOMINANT_SHARE:
+        kind = "phone"
+    elif shares["free_text"] >= DOMINANT_SHARE:
+        kind = "free_text"
+    elif distinct <= ENUM_MAX_DISTINCT and distinct / sampled <= ENUM_MAX_RATIO:
+        kind = "enum"
+    elif identifiable.str.fullmatch(_CODE_RE.pattern).all():
+        kind = "code"
+    else:
+        kind = "text"
+
+    return ColumnProfile(kind, KIND_ACTIONS[kind], sampled, distinct, scores)
+
+
+class ColumnPlan:
+    """
+    Per-file, per-column plan followed by the Anonymiser: columns planned
+    as ``skip`` pass through untouched and are never classified.
+
+    Columns missing from the plan are profiled the first time they are seen
+    (see ``profile_column``). The plan lives in the ``.clanto`` config, one
+    ``[column_plan:<file>]`` section per file (``<file>:<sheet>`` for
+    workbooks, ``<database>:<table>`` for databases), with one
+    ``<column> = <action> (<kind>)`` option per column; only the first word
+    of a value is read, so the action can be edited by hand, e.g. to
+    ``scan`` a notes column instead of anonymising its cells whole. Column
+    names are percent-escaped where configparser would split them (see
+    ``encode_plan_key``).
+
+    Column names are case-insensitive, as every option of the config.
+    """
+
+    def __init__(
+        self,
+        rules: RuleEngine,
+        cfg: ConfigParser | None = None,
+        path: str | None = None,
+        sample_rows: int = DEFAULT_PROFILE_SAMPLE_ROWS,
+    ) -> None:
+        """
+        :param rules: Detection rules used to profile the columns
+        :type rules: RuleEngine
+        :param cfg: Config holding the saved plan, if any
+        :type cfg: ConfigParser | None, optional
+        :param path: Path of the config file, defaults to DEFAULT_CFG_FILENAME
+                     in the working directory
+        :type path: str | None, optional
+        :param sample_rows: Cells sampled per column, defaults to DEFAULT_PROFILE_SAMPLE_ROWS
+        :type sample_rows: int, optional
+        """
+        self.rules = rules
+        self.cfg = cfg if cfg is not None else ConfigParser()
+        self.path = path or os.path.join(os.getcwd(), DEFAULT_CFG_FILENAME)
+        self.sample_rows = sample_rows
+
+        self.actions: dict[str, dict[str, str]] = {}
+        """File -> column -> action"""
+        for section in self.cfg.sections():
+            if section.startswith(PLAN_SECTION_PREFIX):
+                actions = self.actions[section.removeprefix(PLAN_SECTION_PREFIX)] = {}
+                for option, value in self.cfg.items(section, raw=True):
+                    if not self.cfg.has_option("DEFAULT", option):
+                        action = (value.split() or [ACTION_ANONYMISE])[0]
+                        actions[decode_plan_key(option)] = action.lower()
+
+        self.profiles: dict[str, dict[str, ColumnProfile]] = {}
+        """File -> column -> profile, for the columns profiled in this run"""
+
+    @staticmethod
+    def _column_key(column) -> str:
+        return str(column).lower()
+
+    def column_actions(self, file: str, df: pd.DataFrame) -> dict[int, str]:
+        """
+        Action of every text column of a DataFrame, profiling the columns
+        not planned yet.
+
+        :param file: File (or ``file:sheet``, ``database:table``) of the DataFrame
+        :type file: str
+        :param df: DataFrame, or a sample of it
+        :type df: pd.DataFrame
+        :return: Column position -> action
+        :rtype: dict[int, str]
+        """
+        actions = self.actions.setdefault(file, {})
+        planned = {}
+        for position in text_columns(df):
+            column = self._column_key(df.columns[position])
+            if column not in actions:
+                profile = profile_column(
+                    df.iloc[:, position], self.rules, self.sample_rows
+                )
+                self.profiles.setdefault(file, {})[column] = profile
+                actions[column] = profile.action
+            planned[position] = actions[column]
+        return planned
+
+    def snapshot(self) -> dict[str, dict[str, str]]:
+        """
+        Copy of the plan as it stands, e.g. to tell whether it changed
+        between runs.
+
+        :return: File -> column -> action
+        :rtype: dict[str, dict[str, str]]
+        """
+        return {file: dict(actions) for file, actions in self.actions.items()}
+
+    def save(self) -> int:
+        """
+        Adds the columns profiled in this run to the config and to the file
+        at ``path``. Entries already in the config are left as they are, and
+        so is the rest of the file: new options are appended to their
+        section, new sections to the end of the file.
+
+        :return: Number of columns added to the plan
+        :rtype: int
+        """
+        added: dict[str, list[str]] = {}
+        for file, profiles in self.profiles.items():
+            section = f"{PLAN_SECTION_PREFIX}{file}"
+            if not self.cfg.has_section(section):
+                self.cfg.add_section(section)
+            for column, profile in profiles.items():
+                option = encode_plan_key(column)
+                if not self.cfg.has_option(section, option):
+                    value = f"{profile.action} ({profile.kind})"
+                    self.cfg.set(section, option, value)
+                    added.setdefault(section, []).append(f"{option} = {value}")
+        if added:
+            _append_options(self.path, added)
+        return sum(len(options) for options in added.values())
+
+    def summary(self) -> dict[str, list[str]]:
+        """
+        Columns profiled in this run and planned as ``skip``, per file.
+
+        :return: File -> columns
+        :rtype: dict[str, list[str]]
+        """
+        return {
+            file: [c for c, p in profiles.items() if p.action == ACTION_SKIP]
+            for file, profiles in self.profiles.items()
+        }
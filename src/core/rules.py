@@ -0,0 +1,347 @@
+"""Detection rules shared by the anonymisation and mapping template paths"""
+
+from collections import Counter
+from configparser import ConfigParser
+import itertools
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from ..clanto_exc import InvalidDetectionRule
+from ..config import DEFAULT_VERDICT_CACHE_SIZE
+from ..utils import identifiable_mask
+from .cache import LRUCache, cache_size
+
+EMAIL_IN_TEXT = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
+"""Built-in detector for emails inside a longer string"""
+PHONE_IN_TEXT = r"\b(?:\+?\d{1,3}[-.\s]?)?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}\b"
+"""Built-in detector for phone numbers inside a longer string"""
+PHONE_MIN_DIGITS = 9
+"""Fewest digits of a PHONE_IN_TEXT match"""
+PHONE_CLUSTER = rf"\d(?:[-.\s()]{{0,2}}\d){{{PHONE_MIN_DIGITS - 1},}}"
+"""At least PHONE_MIN_DIGITS digits, each at most two separators from the
+next: a PHONE_IN_TEXT match lies within one of these clusters (and the ``+``
+or ``(`` before it), so strings without one hold no phone"""
+
+BUILTIN_DETECTORS = {"email": EMAIL_IN_TEXT, "phone": PHONE_IN_TEXT}
+"""Token type -> pattern of the detectors every engine starts with"""
+
+RULES_SECTION = "detection_rules"
+"""Config section with rules applied to both anonymisation and gen-map"""
+TEMPLATE_RULES_SECTION = "mapping_template_rules"
+"""Config section with extra exclusions only applied to gen-map"""
+
+_PHONE_CLUSTER_RE = re.compile(PHONE_CLUSTER)
+
+
+class RuleEngine:
+    """
+    Compiles the built-in detectors and the user supplied include/exclude
+    rules once, and counts how many times each rule fires.
+
+    Detectors (built-in and include rules) are joined into a single pattern
+    with one named group per rule, so a single scan over a string finds
+    every token and tells which rule found it. Exclude rules are joined the
+    same way into a case-insensitive pattern that vetoes values otherwise
+    considered identifiable.
+
+    A built-in detector is left out of the scan of a string it cannot
+    match: e-mails need an ``@``, phones a cluster of PHONE_MIN_DIGITS
+    digits (PHONE_CLUSTER). A string with neither, and no include rule to
+    look for, is not scanned at all; when only phones are looked for, only
+    the clusters are scanned.
+
+    User patterns are embedded as-is, so they must not define named groups
+    nor use numbered backreferences.
+    """
+
+    def __init__(
+        self,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        verdict_cache_size: int = DEFAULT_VERDICT_CACHE_SIZE,
+    ) -> None:
+        """
+        :param include: Regex patterns whose matches inside a value are
+                        anonymised as general tokens, defaults to None
+        :type include: list[str] | None, optional
+        :param exclude: Regex patterns marking a value as non identifiable,
+                        defaults to None
+        :type exclude: list[str] | None, optional
+        :param verdict_cache_size: Verdicts of ``identifiable_mask`` kept,
+                                   defaults to DEFAULT_VERDICT_CACHE_SIZE
+        :type verdict_cache_size: int, optional
+        :raises InvalidDetectionRule: If a rule does not compile.
+        """
+        self.include = [p for p in include or [] if p]
+        self.exclude = [p for p in exclude or [] if p]
+
+        self.verdicts = LRUCache(verdict_cache_size)
+        """Value -> is it identifiable, for values already classified"""
+
+        self.hits: Counter = Counter()
+        """Number of matches per rule name"""
+
+        self._group_rules: dict[str, tuple[str, str]] = {}
+        """Group name -> (rule name, token type)"""
+
+        builtin_parts = {
+            token_type: self._group(token_type, token_type, pattern)
+            for token_type, pattern in BUILTIN_DETECTORS.items()
+        }
+        include_parts = [
+            self._group(f"include_{i}", "general", pattern, f"include:{pattern}")
+            for i, pattern in enumerate(self.include)
+        ]
+        self.detector = self._compile(
+            "|".join([*builtin_parts.values(), *include_parts])
+        )
+        """Combined matcher for every token detector"""
+
+        self._detectors: dict[tuple[bool, bool], re.Pattern | None] = {}
+        """(may hold an e-mail, may hold a phone) -> matcher of the detectors
+        that can match, None if there is none"""
+        for email, phone in itertools.product((True, False), repeat=2):
+            parts = [
+                part
+                for token_type, part in builtin_parts.items()
+                if {"email": email, "phone": phone}[token_type]
+            ] + include_parts
+            self._detectors[email, phone] = (
+                self._compile("|".join(parts)) if parts else None
+            )
+
+        self._exclude_any = None
+        self._exclude_named = None
+        if self.exclude:
+            self._exclude_any = "|".join(f"(?:{p})" for p in self.exclude)
+            self._exclude_named = self._compile(
+                "|".join(
+                    self._group(f"exclude_{i}", "exclude", p, f"exclude:{p}")
+                    for i, p in enumerate(self.exclude)
+                ),
+                re.IGNORECASE,
+            )
+
+    def _group(
+        self, group: str, token_type: str, pattern: str, rule: str | None = None
+    ) -> str:
+        self._group_rules[group] = (rule or group, token_type)
+        return f"(?P<{group}>{pattern})"
+
+    def _count(self, match: re.Match) -> tuple[str, str]:
+        rule, token_type = self._group_rules[match.lastgroup]
+        self.hits[rule] += 1
+        return rule, token_type
+
+    @staticmethod
+    def _compile(pattern: str, flags: int = 0) -> re.Pattern:
+        try:
+            return re.compile(pattern, flags)
+        except re.error as e:
+            raise InvalidDetectionRule(
+                f"Detection rules could not be compiled: {e}"
+            ) from e
+
+    @classmethod
+    def from_config(
+        cls, cfg: ConfigParser | None, template: bool = False
+    ) -> "RuleEngine":
+        """
+        Builds the engine from the ``[detection_rules]`` section of a Clanto
+        config (``identifiable`` / ``non_identifiable`` options).
+
+        :param cfg: Clanto's ConfigParser, if any
+        :type cfg: ConfigParser | None
+        :param template: Also apply ``[mapping_template_rules]`` exclusions,
+                         defaults to False
+        :type template: bool, optional
+        :raises TypeError: If the rules are not a list of strings.
+        :return: The compiled engine
+        :rtype: RuleEngine
+        """
+
+        def _rules(section: str, option: str) -> list[str]:
+            if not (cfg and cfg.has_option(section, option)):
+                return []
+            rules = cfg.getlist(section, option)
+            if not isinstance(rules, list):
+                raise TypeError(
+                    f"Regex rules for {section}.{option} must be list[str], not {type(rules).__name__}"
+                )
+            return rules
+
+        include = _rules(RULES_SECTION, "identifiable")
+        exclude = _rules(RULES_SECTION, "non_identifiable")
+        if template:
+            exclude += _rules(TEMPLATE_RULES_SECTION, "non_identifiable")
+
+        return cls(
+            include=include,
+            exclude=exclude,
+            verdict_cache_size=cache_size(cfg, "verdicts"),
+        )
+
+    def detect(self, value: str) -> list[tuple[int, int, str]]:
+        """
+        Finds every token to be replaced in a value in a single scan.
+
+        Include rule matches that are vetoed by an exclude rule are dropped.
+
+        :param value: String to scan
+        :type value: str
+        :return: ``(start, end, token_type)`` spans, in order, where the token
+                 type is ``email``, ``phone`` or ``general``.
+        :rtype: list[tuple[int, int, str]]
+        """
+        return self._spans(
+            value, "@" in value, _PHONE_CLUSTER_RE.search(value) is not None
+        )
+
+    def scan(self, values: pd.Series) -> list[list[tuple[int, int, str]]]:
+        """
+        ``detect`` over a whole Series.
+
+        Which detectors each string needs is decided for the whole Series
+        at once (``@`` and digit cluster searches), so the strings that cannot
+        hold a token, e.g. most cells of a free-text column, cost two
+        vectorized passes and are never scanned by a regex.
+
+        :param values: Strings to scan; other values hold no token
+        :type values: pd.Series
+        :return: ``detect`` spans of every value, in order
+        :rtype: list[list[tuple[int, int, str]]]
+        """
+        found = [[] for _ in range(len(values))]
+        strings = np.flatnonzero(values.map(type).eq(str).to_numpy(dtype=bool))
+        if not len(strings):
+            return found
+        text = values.iloc[strings]
+        emails = text.str.contains("@", regex=False).tolist()
+        phones = text.str.contains(PHONE_CLUSTER, regex=True).tolist()
+        for i, value, email, phone in zip(
+            strings, text.to_numpy(dtype=object), emails, phones
+        ):
+            found[i] = self._spans(value, email, phone)
+        return found
+
+    def _spans(
+        self, value: str, email: bool, phone: bool
+    ) -> list[tuple[int, int, str]]:
+        """
+        ``detect`` spans of a value, scanned only by the detectors it needs.
+
+        :param value: String to scan
+        :type value: str
+        :param email: Whether the value may hold an e-mail (has an ``@``)
+        :type email: bool
+        :param phone: Whether the value may hold a phone (has a PHONE_CLUSTER)
+        :type phone: bool
+        :return: ``(start, end, token_type)`` spans, in order
+        :rtype: list[tuple[int, int, str]]
+        """
+        detector = self._detectors[email, phone]
+        if detector is None:
+            return []
+        if email or self.include:
+            return self._detect(detector, value)
+
+        # Phones only: long text is scanned cluster by cluster; the window
+        # starts at a possible "+" or "(" and ends one character past the
+        # cluster, so the word boundaries see the same characters
+        spans = []
+        for cluster in _PHONE_CLUSTER_RE.finditer(value):
+            spans += self._detect(
+                detector, value, max(cluster.start() - 1, 0), cluster.end() + 1
+            )
+        return spans
+
+    def _detect(
+        self, detector: re.Pattern, value: str, pos: int = 0, endpos: int = sys.maxsize
+    ) -> list[tuple[int, int, str]]:
+        """``detect`` with a given matcher, between ``pos`` and ``endpos``."""
+        spans = []
+        for match in detector.finditer(value, pos, endpos):
+            token_type = self._count(match)[1]
+            if token_type == "general" and self.is_excluded(match.group(0)):
+                continue
+            spans.append((match.start(), match.end(), token_type))
+        return spans
+
+    def is_excluded(self, value: str) -> bool:
+        """
+        Checks a single value against the exclude rules.
+
+        :param value: Value to check
+        :type value: str
+        :return: True if any exclude rule matches the value.
+        :rtype: bool
+        """
+        if self._exclude_named is None:
+            return False
+        match = self._exclude_named.search(value.strip())
+        if match is None:
+            return False
+        self._count(match)
+        return True
+
+    def identifiable_mask(self, series: pd.Series) -> np.ndarray:
+        """
+        Batch classification of a Series honouring the exclude rules.
+
+        Verdicts are cached (see ``verdicts``): only values not classified
+        recently go through the classifier, so exclude rule hits are
+        counted once per value while it stays cached. A value's verdict does
+        not depend on the other values of the Series.
+
+        :param series: Values to check
+        :type series: pd.Series
+        :return: Boolean array aligned with ``series``.
+        :rtype: np.ndarray
+        """
+        if not self.verdicts.maxsize:
+            return self._classify(series)
+
+        values = series.to_numpy(dtype=object)
+        mask = np.zeros(len(values), dtype=bool)
+        missing = []
+        try:
+            for i, value in enumerate(values):
+                verdict = self.verdicts.get(value)
+                if verdict is None:
+                    missing.append(i)
+                else:
+                    mask[i] = verdict
+        except TypeError:
+            # Unhashable values (e.g. lists) are never cached
+            return self._classify(series)
+
+        if missing:
+            missing = np.asarray(missing)
+            verdicts = self._classify(pd.Series(values[missing], dtype=object))
+            mask[missing] = verdicts
+            for value, verdict in zip(values[missing], verdicts):
+                self.verdicts.put(value, bool(verdict))
+        return mask
+
+    def _classify(self, series: pd.Series) -> np.ndarray:
+        """``identifiable_mask`` without the verdict cache."""
+        mask = identifiable_mask(series)
+        if self._exclude_any is None or not mask.any():
+            return mask
+
+        positions = np.flatnonzero(mask)
+        candidates = pd.Series(
+            series.to_numpy(dtype=object)[positions], dtype=object
+        ).str.strip()
+        excluded = candidates.str.contains(
+            self._exclude_any, flags=re.IGNORECASE, regex=True
+        ).to_numpy(dtype=bool)
+
+        for value in candidates[excluded]:
+            self._count(self._exclude_named.search(value))
+
+        mask[positions[excluded]] = False
+        return mask
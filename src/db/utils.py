@@ -1 +1,227 @@
+"""Utility functions for SQLite databases"""
+
+import os
 import sqlite3
+from collections.abc import Iterable, Iterator
+
+_USER_OBJECT = "substr(name, 1, 7) != 'sqlite_'"
+"""Leaves SQLite's internal objects out (in LIKE, ``_`` would match any
+character, and drop user objects such as ``sqlite1_log``)"""
+
+
+def quote_identifier(name: str) -> str:
+    """Quotes a table or column name for use in a SQL statement.
+
+    :param name: Identifier
+    :type name: str
+    :return: Quoted identifier
+    :rtype: str
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def connect_readonly(path: str) -> sqlite3.Connection:
+    """Opens a database in read-only mode, so the input is never modified.
+
+    :param path: Path to the database
+    :type path: str
+    :return: Connection
+    :rtype: sqlite3.Connection
+    """
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def list_tables(conn: sqlite3.Connection) -> list[str]:
+    """Lists the user tables of a database, in creation order.
+
+    Virtual tables (e.g. FTS) and their shadow tables are left out.
+
+    :param conn: Connection to the database
+    :type conn: sqlite3.Connection
+    :return: Table names
+    :rtype: list[str]
+    """
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master "
+        f"WHERE type = 'table' AND {_USER_OBJECT} ORDER BY rowid"
+    ).fetchall()
+    virtual = [
+        name for name, sql in rows if sql.upper().startswith("CREATE VIRTUAL")
+    ]
+    return [
+        name
+        for name, sql in rows
+        if name not in virtual
+        and not any(name.startswith(f"{v}_") for v in virtual)
+    ]
+
+
+def copy_schema(
+    src: sqlite3.Connection, dst: sqlite3.Connection, tables: list[str]
+) -> list[str]:
+    """Creates the given tables of ``src`` in ``dst``.
+
+    Indexes, triggers and views are not created yet: they are returned so
+    they can be applied once the data is in, which is faster than keeping
+    the indexes up to date row by row and keeps triggers from firing on the
+    copy.
+
+    :param src: Connection to the input database
+    :type src: sqlite3.Connection
+    :param dst: Connection to the output database
+    :type dst: sqlite3.Connection
+    :param tables: Tables to create
+    :type tables: list[str]
+    :return: Deferred ``CREATE INDEX/TRIGGER/VIEW`` statements
+    :rtype: list[str]
+    """
+    deferred = []
+    for kind, name, tbl_name, sql in src.execute(
+        "SELECT type, name, tbl_name, sql FROM sqlite_master "
+        f"WHERE sql IS NOT NULL AND {_USER_OBJECT} ORDER BY rowid"
+    ):
+        if kind == "table":
+            if name in tables:
+                dst.execute(sql)
+        elif kind == "view" or tbl_name in tables:
+            deferred.append(sql)
+    return deferred
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> list[str]:
+    """Lists the stored columns of a table, leaving generated columns out.
+
+    :param conn: Connection to the database
+    :type conn: sqlite3.Connection
+    :param table: Table name
+    :type table: str
+    :return: Column names, in table order
+    :rtype: list[str]
+    """
+    return [
+        row[1]
+        for row in conn.execute(f"PRAGMA table_xinfo({quote_identifier(table)})")
+        if row[6] == 0
+    ]
+
+
+def iter_batches(
+    conn: sqlite3.Connection, table: str, batch_size: int
+) -> Iterator[tuple[list[str], list[tuple]]]:
+    """Reads a table with ``fetchmany``, so memory is bounded by ``batch_size``.
+
+    :param conn: Connection to the database
+    :type conn: sqlite3.Connection
+    :param table: Table name
+    :type table: str
+    :param batch_size: Rows per batch
+    :type batch_size: int
+    :yield: Column names and the rows of each batch
+    :rtype: Iterator[tuple[list[str], list[tuple]]]
+    """
+    columns = table_columns(conn, table)
+    cursor = conn.execute(
+        f"SELECT {', '.join(quote_identifier(c) for c in columns)} "
+        f"FROM {quote_identifier(table)}"
+    )
+    try:
+        while rows := cursor.fetchmany(batch_size):
+            yield columns, rows
+    finally:
+        cursor.close()
+
+
+def insert_rows(
+    conn: sqlite3.Connection, table: str, columns: list[str], rows: Iterable[tuple]
+) -> None:
+    """Inserts a batch of rows with a single ``executemany``.
+
+    :param conn: Connection to the output database
+    :type conn: sqlite3.Connection
+    :param table: Table name
+    :type table: str
+    :param columns: Column names
+    :type columns: list[str]
+    :param rows: Rows to insert
+    :type rows: Iterable[tuple]
+    """
+    conn.executemany(
+        f"INSERT INTO {quote_identifier(table)} "
+        f"({', '.join(quote_identifier(c) for c in columns)}) "
+        f"VALUES ({', '.join('?' * len(columns))})",
+        rows,
+    )
+
+
+class DatabaseWriter:
+    """
+    Writes an anonymised copy of a database, table by table.
+
+    The schema of the copied tables is created up front; rows are inserted
+    with ``executemany`` in transactions of ``commit_rows`` rows, and the
+    indexes, triggers and views are only created on ``close``.
+    """
+
+    def __init__(
+        self, src: sqlite3.Connection, path: str, tables: list[str], commit_rows: int
+    ) -> None:
+        """
+        :param src: Connection to the input database
+        :type src: sqlite3.Connection
+        :param path: Path of the output database, replaced if it exists
+        :type path: str
+        :param tables: Tables to copy
+        :type tables: list[str]
+        :param commit_rows: Rows inserted per transaction
+        :type commit_rows: int
+        """
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+        self.path = path
+        self.commit_rows = commit_rows
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        # A half-written copy is simply written again, so durability is not needed
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+
+        self._conn.execute("BEGIN")
+        self._deferred = copy_schema(src, self._conn, tables)
+        """Statements applied once every row is in"""
+        self._uncommitted = 0
+
+    def write(self, table: str, columns: list[str], rows: Iterable[tuple]) -> None:
+        """
+        Inserts a batch of rows, committing once ``commit_rows`` are pending.
+
+        :param table: Table name
+        :type table: str
+        :param columns: Column names
+        :type columns: list[str]
+        :param rows: Rows to insert
+        :type rows: Iterable[tuple]
+        """
+        before = self._conn.total_changes
+        insert_rows(self._conn, table, columns, rows)
+        self._uncommitted += self._conn.total_changes - before
+        if self._uncommitted >= self.commit_rows:
+            self._conn.execute("COMMIT")
+            self._conn.execute("BEGIN")
+            self._uncommitted = 0
+
+    def close(self) -> None:
+        """Commits the remaining rows, creates the deferred objects and closes."""
+        for sql in self._deferred:
+            self._conn.execute(sql)
+        self._conn.execute("COMMIT")
+        self._conn.close()
+
+    def __enter__(self) -> "DatabaseWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._conn.close()
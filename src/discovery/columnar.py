@@ -0,0 +1,258 @@
+"""Streaming Parquet and Arrow IPC backend, anonymising dictionaries instead of rows"""
+
+import functools
+import os
+from collections.abc import Callable, Collection, Iterator
+
+import numpy as np
+import pandas as pd
+
+pa = pc = pq = None
+"""Optional dependency, only needed for Parquet and Arrow IPC inputs, and
+imported by ``_require_pyarrow`` on first use"""
+
+PARQUET_EXTENSIONS = (".parquet",)
+ARROW_EXTENSIONS = (".arrow", ".feather")
+COLUMNAR_EXTENSIONS = PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+"""Inputs streamed by row group / record batch"""
+
+
+def _require_pyarrow() -> None:
+    global pa, pc, pq
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "Parquet and Arrow IPC files need pyarrow: pip install pyarrow"
+        )
+    pa, pc, pq = pyarrow, pyarrow.compute, pyarrow.parquet
+
+
+def is_columnar(path: str) -> bool:
+    """Checks whether a file is a Parquet or Arrow IPC file.
+
+    :param path: Path to the file
+    :type path: str
+    :return: True for ``COLUMNAR_EXTENSIONS``
+    :rtype: bool
+    """
+    return os.path.splitext(path)[1].lower() in COLUMNAR_EXTENSIONS
+
+
+def _is_text(data_type: "pa.DataType") -> bool:
+    return pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+
+
+def _is_text_column(data_type: "pa.DataType") -> bool:
+    if pa.types.is_dictionary(data_type):
+        return _is_text(data_type.value_type)
+    return _is_text(data_type)
+
+
+def read_schema(path: str) -> "pa.Schema":
+    """Reads the Arrow schema of a Parquet or Arrow IPC file.
+
+    :param path: Path to the file
+    :type path: str
+    :return: Schema, with its metadata
+    :rtype: pa.Schema
+    """
+    _require_pyarrow()
+    if os.path.splitext(path)[1].lower() in PARQUET_EXTENSIONS:
+        return pq.read_schema(path)
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).schema
+
+
+def iter_tables(path: str) -> Iterator["pa.Table"]:
+    """Streams a Parquet file row group by row group, or an Arrow IPC file
+    record batch by record batch.
+
+    Parquet text columns are read as dictionaries, so their distinct values
+    come straight from the Parquet dictionary pages.
+
+    :param path: Path to the file
+    :type path: str
+    :yield: One table per row group / record batch
+    :rtype: Iterator[pa.Table]
+    """
+    _require_pyarrow()
+    if os.path.splitext(path)[1].lower() in PARQUET_EXTENSIONS:
+        schema = pq.read_schema(path)
+        text = [f.name for f in schema if _is_text(f.type)]
+        parquet = pq.ParquetFile(path, read_dictionary=text)
+        try:
+            for i in range(parquet.num_row_groups):
+                yield parquet.read_row_group(i)
+        finally:
+            parquet.close()
+        return
+
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield pa.Table.from_batches([reader.get_batch(i)])
+
+
+def _map_values(
+    values: "pa.Array", anonymise: Callable[[pd.Series], pd.Series]
+) -> "pa.Array":
+    """Anonymises an array of distinct strings through a pandas callback"""
+    series = values.to_pandas()
+    anonymised = anonymise(series)
+    if anonymised is series:
+        return values
+    return pa.array(anonymised.to_numpy(dtype=object), type=values.type)
+
+
+def _map_chunk(
+    chunk: "pa.Array",
+    target: "pa.DataType",
+    anonymise: Callable[[pd.Series], pd.Series],
+) -> "pa.Array":
+    """Anonymises one text chunk by its dictionary, reusing the indices as-is"""
+    if not pa.types.is_dictionary(chunk.type):
+        chunk = pc.dictionary_encode(chunk)
+
+    dictionary = _map_values(chunk.dictionary, anonymise)
+    if pa.types.is_dictionary(target):
+        return pa.DictionaryArray.from_arrays(chunk.indices, dictionary)
+    return dictionary.take(chunk.indices)
+
+
+def anonymise_table(
+    table: "pa.Table",
+    schema: "pa.Schema",
+    anonymise: Callable[..., pd.Series],
+    skip: Collection[str] = (),
+    scan: Collection[str] = (),
+) -> "pa.Table":
+    """
+    Anonymises the text columns of a table.
+
+    Every text chunk is handled through its dictionary: ``anonymise`` only
+    sees the distinct values, and the indices are reused as they are, so a
+    low-cardinality column costs the size of its dictionary, not its row
+    count. Other columns are passed through without a copy.
+
+    :param table: Row group / record batch, as read by ``iter_tables``
+    :type table: pa.Table
+    :param schema: Schema of the output, i.e. the schema of the input file
+    :type schema: pa.Schema
+    :param anonymise: Anonymises a Series of distinct values, returning the
+                      same Series object when nothing changes; called with
+                      ``scan=True`` for the columns in ``scan``
+    :type anonymise: Callable[..., pd.Series]
+    :param skip: Text columns passed through as they are, defaults to none
+    :type skip: Collection[str], optional
+    :param scan: Free-text columns only scanned for tokens, defaults to none
+    :type scan: Collection[str], optional
+    :return: The anonymised table, with ``schema``
+    :rtype: pa.Table
+    """
+    columns = []
+    for field, column in zip(schema, table.columns):
+        if _is_text_column(field.type) and field.name not in skip:
+            mapper = (
+                functools.partial(anonymise, scan=True)
+                if field.name in scan
+                else anonymise
+            )
+            column = pa.chunked_array(
+                [_map_chunk(chunk, field.type, mapper) for chunk in column.chunks],
+                type=field.type,
+            )
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def sample_frame(table: "pa.Table", rows: int) -> pd.DataFrame:
+    """
+    First rows of the text columns of a table, e.g. to profile them.
+
+    :param table: Row group / record batch, as read by ``iter_tables``
+    :type table: pa.Table
+    :param rows: Number of rows
+    :type rows: int
+    :return: The text columns, as object columns named after their fields
+    :rtype: pd.DataFrame
+    """
+    head = table.slice(0, rows)
+    return pd.DataFrame(
+        {
+            field.name: column.to_pandas().astype(object)
+            for field, column in zip(head.schema, head.columns)
+            if _is_text_column(field.type)
+        }
+    )
+
+
+def iter_text_counts(table: "pa.Table") -> Iterator[pd.Series]:
+    """
+    Yields the distinct values of every text chunk of a table and their
+    number of occurrences, counted over the dictionary indices.
+
+    :param table: Row group / record batch, as read by ``iter_tables``
+    :type table: pa.Table
+    :yield: One Series of counts, indexed by value, per text chunk
+    :rtype: Iterator[pd.Series]
+    """
+    for column in table.columns:
+        if not _is_text_column(column.type):
+            continue
+        for chunk in column.chunks:
+            if not pa.types.is_dictionary(chunk.type):
+                chunk = pc.dictionary_encode(chunk)
+            counts = np.bincount(
+                chunk.indices.drop_null().to_numpy(), minlength=len(chunk.dictionary)
+            )
+            counts = pd.Series(counts, index=chunk.dictionary.to_pandas())
+            yield counts[counts > 0]
+
+
+class ColumnarWriter:
+    """Writes a Parquet or Arrow IPC file one row group / record batch at a time."""
+
+    def __init__(self, path: str, schema: "pa.Schema") -> None:
+        """
+        :param path: Path of the output file; its extension picks the format
+        :type path: str
+        :param schema: Schema of the output
+        :type schema: pa.Schema
+        """
+        _require_pyarrow()
+        self.path = path
+        if os.path.splitext(path)[1].lower() in PARQUET_EXTENSIONS:
+            self._writer = pq.ParquetWriter(path, schema)
+            self._sink = None
+        else:
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, schema)
+
+    def write(self, table: "pa.Table") -> None:
+        """
+        Writes a table as a single row group / record batch.
+
+        :param table: Table with the schema of the writer
+        :type table: pa.Table
+        """
+        if isinstance(self._writer, pq.ParquetWriter):
+            self._writer.write_table(table, row_group_size=max(len(table), 1))
+        else:
+            self._writer.write_table(table, max_chunksize=max(len(table), 1))
+
+    def close(self) -> None:
+        """Finalises the file."""
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,362 @@
+"""Fast Excel backend: every sheet is read and written, with streaming workbooks"""
+
+import datetime
+import importlib.util
+import re
+import warnings
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+_READ_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
+"""Optional Rust-based reader, used when installed (imported by pandas on use)"""
+
+_WRITE_BATCH_ROWS = 10_000
+"""Rows rendered to XML at once when writing a sheet"""
+_EXCEL_EPOCH = np.datetime64("1899-12-30")
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+EXCEL_MAX_CELL_CHARS = 32_767
+"""Longest string Excel holds in a cell; longer ones are truncated"""
+_REPORTED_CELLS = 10
+"""Cells listed by name when warning about changed cells"""
+
+_STYLE_DATETIME = 1
+_STYLE_DATE = 2
+_STYLE_TIME = 3
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "{sheets}"
+    "</Types>"
+)
+_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    "<sheets>{sheets}</sheets></workbook>"
+)
+_WORKBOOK_SHEET = '<sheet name="{name}" sheetId="{n}" r:id="rId{n}"/>'
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    "{sheets}"
+    '<Relationship Id="rId{styles}" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    "</Relationships>"
+)
+_WORKBOOK_SHEET_REL = (
+    '<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/worksheet" Target="worksheets/sheet{n}.xml"/>'
+)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="3">'
+    '<numFmt numFmtId="164" formatCode="yyyy\\-mm\\-dd\\ hh:mm:ss"/>'
+    '<numFmt numFmtId="165" formatCode="yyyy\\-mm\\-dd"/>'
+    '<numFmt numFmtId="166" formatCode="hh:mm:ss"/>'
+    "</numFmts>"
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    "</borders>"
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>'
+    "</cellStyleXfs>"
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" '
+    'applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" '
+    'applyNumberFormat="1"/>'
+    '<xf numFmtId="166" fontId="0" fillId="0" borderId="0" xfId="0" '
+    'applyNumberFormat="1"/>'
+    "</cellXfs>"
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/>'
+    "</cellStyles></styleSheet>"
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    "<sheetData>"
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+
+def read_workbook(path: str) -> dict[str, pd.DataFrame]:
+    """
+    Reads every sheet of a workbook.
+
+    Uses the calamine engine when ``python-calamine`` is installed, and
+    otherwise streams the rows of every sheet from a read-only openpyxl
+    workbook. Either way, the DataFrames are the same as ``pd.read_excel``.
+
+    :param path: Path to the workbook
+    :type path: str
+    :return: Sheet name -> DataFrame, in workbook order
+    :rtype: dict[str, pd.DataFrame]
+    """
+    if _READ_ENGINE is not None:
+        return pd.read_excel(path, sheet_name=None, engine=_READ_ENGINE)
+
+    import openpyxl  # Only needed without calamine, and slow to import
+
+    wb = openpyxl.load_workbook(
+        path, read_only=True, data_only=True, keep_links=False
+    )
+    try:
+        sheets = {}
+        for ws in wb.worksheets:
+            # Same cell handling as pandas: empty cells become "" (parsed as NaN)
+            data = [
+                ["" if v is None else v for v in row]
+                for row in ws.iter_rows(values_only=True)
+            ]
+            while data and all(v == "" for v in data[-1]):
+                data.pop()
+            sheets[ws.title] = (
+                TextParser(data, header=0).read() if data else pd.DataFrame()
+            )
+        return sheets
+    finally:
+        wb.close()
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class _CellEdits:
+    """Cells of a sheet whose string had to be changed to be written"""
+
+    def __init__(self) -> None:
+        self.cleaned: list[str] = []
+        """Cells holding characters XML does not allow, removed"""
+        self.truncated: list[str] = []
+        """Cells longer than EXCEL_MAX_CELL_CHARS, truncated"""
+
+    def warn(self, path: str, sheet: str) -> None:
+        """Warns about the changed cells, if any"""
+        for refs, change in (
+            (self.cleaned, "had characters not allowed in XML removed"),
+            (self.truncated, f"were truncated to {EXCEL_MAX_CELL_CHARS} characters"),
+        ):
+            if refs:
+                listed = ", ".join(refs[:_REPORTED_CELLS])
+                more = ", ..." if len(refs) > _REPORTED_CELLS else ""
+                warnings.warn(
+                    f"{path} [{sheet}]: {len(refs)} cell(s) {change} "
+                    f"({listed}{more})",
+                    stacklevel=3,
+                )
+
+
+def _string_cell(ref: str, value: str, edits: _CellEdits) -> str:
+    if _ILLEGAL_XML_CHARS.search(value):
+        value = _ILLEGAL_XML_CHARS.sub("", value)
+        edits.cleaned.append(ref)
+    if len(value) > EXCEL_MAX_CELL_CHARS:
+        value = value[:EXCEL_MAX_CELL_CHARS]
+        edits.truncated.append(ref)
+    value = escape(value)
+    return (
+        f'<c r="{ref}" t="inlineStr">'
+        f'<is><t xml:space="preserve">{value}</t></is></c>'
+    )
+
+
+def _serial(value: datetime.datetime | datetime.date) -> float:
+    """Excel serial number of a date or datetime (1900 date system)"""
+    return float(
+        (np.datetime64(value, "us") - _EXCEL_EPOCH) / np.timedelta64(1, "D")
+    )
+
+
+def _cell(ref: str, value, edits: _CellEdits) -> str:
+    """XML of a single cell of any type; missing values give an empty string"""
+    if value is None or value is pd.NaT:
+        return ""
+    if isinstance(value, str):
+        return _string_cell(ref, value, edits)
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, np.integer)):
+        return f'<c r="{ref}"><v>{int(value)}</v></c>'
+    if isinstance(value, (float, np.floating)):
+        if not np.isfinite(value):
+            return ""
+        return f'<c r="{ref}"><v>{float(value)!r}</v></c>'
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.replace(tzinfo=None)
+        return f'<c r="{ref}" s="{_STYLE_DATETIME}"><v>{_serial(value)!r}</v></c>'
+    if isinstance(value, datetime.date):
+        return f'<c r="{ref}" s="{_STYLE_DATE}"><v>{_serial(value)!r}</v></c>'
+    if isinstance(value, datetime.time):
+        seconds = (
+            value.hour * 3600 + value.minute * 60 + value.second
+        ) + value.microsecond / 1e6
+        return f'<c r="{ref}" s="{_STYLE_TIME}"><v>{seconds / 86400!r}</v></c>'
+    if isinstance(value, (datetime.timedelta, np.timedelta64)):
+        days = pd.Timedelta(value) / pd.Timedelta(days=1)
+        return f'<c r="{ref}"><v>{days!r}</v></c>'
+    return _string_cell(ref, str(value), edits)
+
+
+def _column_cells(
+    values: np.ndarray, letter: str, first_row: int, edits: _CellEdits
+) -> list[str]:
+    """XML of the cells of one column, with fast paths for typed columns"""
+    rows = range(first_row, first_row + len(values))
+
+    if values.dtype.kind in "iu":
+        return [
+            f'<c r="{letter}{r}"><v>{v}</v></c>'
+            for r, v in zip(rows, values.tolist())
+        ]
+    if values.dtype.kind == "f":
+        finite = np.isfinite(values)
+        return [
+            f'<c r="{letter}{r}"><v>{v!r}</v></c>' if ok else ""
+            for r, v, ok in zip(rows, values.tolist(), finite.tolist())
+        ]
+    if values.dtype.kind == "b":
+        return [
+            f'<c r="{letter}{r}" t="b"><v>{int(v)}</v></c>'
+            for r, v in zip(rows, values.tolist())
+        ]
+    if values.dtype.kind == "M":
+        serials = (values.astype("datetime64[us]") - _EXCEL_EPOCH) / np.timedelta64(
+            1, "D"
+        )
+        missing = np.isnat(values)
+        return [
+            ""
+            if nat
+            else f'<c r="{letter}{r}" s="{_STYLE_DATETIME}"><v>{v!r}</v></c>'
+            for r, v, nat in zip(rows, serials.tolist(), missing.tolist())
+        ]
+    return [
+        _cell(f"{letter}{r}", v, edits)
+        for r, v in zip(rows, values.tolist() if values.dtype != object else values)
+    ]
+
+
+def _write_sheet(stream, df: pd.DataFrame, edits: _CellEdits) -> None:
+    """Streams the header and rows of a DataFrame as worksheet XML"""
+    letters = [_column_letter(i) for i in range(df.shape[1])]
+    stream.write(_SHEET_HEAD.encode("utf-8"))
+
+    if df.shape[1]:
+        header = "".join(
+            _cell(f"{letter}1", name, edits)
+            for letter, name in zip(letters, df.columns)
+        )
+        stream.write(f'<row r="1">{header}</row>'.encode("utf-8"))
+
+    for start in range(0, len(df), _WRITE_BATCH_ROWS):
+        batch = df.iloc[start : start + _WRITE_BATCH_ROWS]
+        first_row = start + 2
+        columns = [
+            _column_cells(
+                _column_values(batch.iloc[:, i]), letters[i], first_row, edits
+            )
+            for i in range(batch.shape[1])
+        ]
+        stream.write(
+            "".join(
+                f'<row r="{r}">{"".join(cells)}</row>'
+                for r, cells in enumerate(zip(*columns), start=first_row)
+            ).encode("utf-8")
+        )
+
+    stream.write(_SHEET_TAIL.encode("utf-8"))
+
+
+def _column_values(series: pd.Series) -> np.ndarray:
+    """Values of a column, as a typed NumPy array when possible"""
+    dtype = series.dtype
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return series.dt.tz_localize(None).to_numpy()
+    if isinstance(dtype, np.dtype) and dtype.kind in "iufbM":
+        return series.to_numpy()
+    return series.to_numpy(dtype=object, na_value=None)
+
+
+def write_workbook(path: str, sheets: dict[str, pd.DataFrame]) -> None:
+    """
+    Writes DataFrames to a workbook, one sheet each, without their index.
+
+    Worksheets are streamed straight to the compressed file in batches of
+    rows, so no cell objects are built and memory stays flat. Strings are
+    written as inline strings, numbers and booleans as such, and dates with
+    a date format, like ``DataFrame.to_excel``. Strings longer than
+    EXCEL_MAX_CELL_CHARS are truncated and characters XML does not allow
+    are removed, with a warning listing the cells changed.
+
+    :param path: Path of the workbook to write
+    :type path: str
+    :param sheets: Sheet name -> DataFrame, in workbook order
+    :type sheets: dict[str, pd.DataFrame]
+    """
+    names = [escape(str(name), {'"': "&quot;"}) for name in sheets]
+    numbers = range(1, len(names) + 1)
+
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(
+            "[Content_Types].xml",
+            _CONTENT_TYPES.format(
+                sheets="".join(_SHEET_CONTENT_TYPE.format(n=n) for n in numbers)
+            ),
+        )
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr(
+            "xl/workbook.xml",
+            _WORKBOOK.format(
+                sheets="".join(
+                    _WORKBOOK_SHEET.format(name=name, n=n)
+                    for name, n in zip(names, numbers)
+                )
+            ),
+        )
+        zf.writestr(
+            "xl/_rels/workbook.xml.rels",
+            _WORKBOOK_RELS.format(
+                sheets="".join(_WORKBOOK_SHEET_REL.format(n=n) for n in numbers),
+                styles=len(names) + 1,
+            ),
+        )
+        zf.writestr("xl/styles.xml", _STYLES)
+
+        for n, (sheet, df) in zip(numbers, sheets.items()):
+            edits = _CellEdits()
+            with zf.open(f"xl/worksheets/sheet{n}.xml", "w") as stream:
+                _write_sheet(stream, df, edits)
+            edits.warn(path, sheet)
@@ -1,52 +1,361 @@
 """Lookup for files and databases for Clanto"""
 
-from .utils import _file_discovery, load_non_db, save_non_db
-
-from ..config import DATABASE_SUPPORT, FILE_SUPPORT
-from ..clanto_cfg import __find_cfg, _ROOTDIR, _CFG_PATH, _CLANTO_JSON
+from .utils import _file_discovery, load_non_db, load_non_db_chunks, save_non_db
+
+from ..config import (
+    DATABASE_SUPPORT,
+    DEFAULT_DB_BATCH_SIZE,
+    DEFAULT_DB_COMMIT_ROWS,
+    FILE_SUPPORT,
+)
+from ..clanto_cfg import _ROOTDIR, _CLANTO_JSON, _cfg_dir, _shallow_discovery
+from ..core.aho_corasick import AhoCorasick
 from ..core.base_reader import ClantoFileManager, RawFile, ClantoFile
+from ..core.metrics import RunMetrics
+from ..db.utils import DatabaseWriter, connect_readonly, iter_batches, list_tables
 from ..objects.template import MappingTemplate
 from .utils import _file_discovery, load_clason
+from .manifest import RunManifest
+from .columnar import is_columnar, iter_tables, read_schema
 
+from collections.abc import Iterator
+from contextlib import closing
 import json
 import os
 import re
+import threading
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    import pyarrow as pa
 
 
 class DatabaseManager(ClantoFileManager):
     __SUPPORTED_FILES = DATABASE_SUPPORT
 
-    def __init__(self, root_path: str) -> None:
-        self._db_path = _file_discovery(root_path, self.__SUPPORTED_FILES)
-        super().__init__()
+    def __init__(
+        self,
+        root_path: str,
+        output_dir: str = None,
+        batch_size: int = DEFAULT_DB_BATCH_SIZE,
+        commit_rows: int = DEFAULT_DB_COMMIT_ROWS,
+        metrics: RunMetrics | None = None,
+    ) -> None:
+        """
+        Initializes the DatabaseManager.
+
+        Tables are never loaded whole: they are read in batches of
+        ``batch_size`` rows and written to an anonymised copy of their
+        database, so memory does not depend on the size of the tables.
+
+        Args:
+            root_path (str): Directory to discover SQLite databases in.
+            output_dir (str): The directory where anonymised copies will be saved.
+            batch_size (int): Rows fetched per ``fetchmany`` call.
+            commit_rows (int): Rows inserted per transaction in the copies.
+            metrics (RunMetrics | None): Collector of the run's timings, shared
+                with the Anonymiser. Defaults to a new one.
+        """
+        super().__init__(root_path, output_dir)
+
+        self.metrics = metrics if metrics is not None else RunMetrics()
+        """Timings and counters of the run"""
+
+        self.batch_size = batch_size
+        """Rows fetched per batch"""
+        self.commit_rows = commit_rows
+        """Rows inserted per transaction"""
+
+        with self.metrics.stage("discovery"):
+            self.__db_paths = _file_discovery(root_path, self.__SUPPORTED_FILES)
+            if not isinstance(self.__db_paths, list):
+                self.__db_paths = [self.__db_paths]
+
+            self.databases: dict[str, list[str]] = {}
+            """Database path -> tables to anonymise"""
+            self.clantod_files: list[ClantoFile] = []
+            self._load()
+
+    def _load(self) -> None:
+        """Discover the tables of every database"""
+        for path in self.__db_paths:
+            with closing(connect_readonly(path)) as conn:
+                self.databases[path] = list_tables(conn)
+
+    def has_files(self) -> bool:
+        """Whether there is any database to process."""
+        return bool(self.databases)
+
+    def iter_batches(self, path: str, table: str) -> Iterator[pd.DataFrame]:
+        """
+        Reads a table in batches of ``batch_size`` rows.
+
+        Args:
+            path (str): Path of a database in ``databases``.
+            table (str): Table of that database.
+
+        Yields:
+            pd.DataFrame: One object-dtype DataFrame per batch, so the values
+                keep the Python types SQLite returned.
+        """
+        name = f"{os.path.basename(path)}:{table}"
+        with closing(connect_readonly(path)) as conn:
+            batches = iter_batches(conn, table, self.batch_size)
+            while True:
+                with self.metrics.stage("load", file=name):
+                    batch = next(batches, None)
+                    if batch is not None:
+                        columns, rows = batch
+                        df = pd.DataFrame(rows, columns=columns, dtype=object)
+                if batch is None:
+                    return
+                yield df
+
+    def open_output(self, path: str) -> DatabaseWriter:
+        """
+        Creates the anonymised copy of a database, with the schema of its
+        tables, ready to receive their rows.
+
+        Args:
+            path (str): Path of a database in ``databases``.
+
+        Returns:
+            DatabaseWriter: Writer of the copy, to be used as a context manager.
+        """
+        filename = f"anonymised_{os.path.basename(path)}"
+        output = os.path.join(self.output_path, filename)
+        with closing(connect_readonly(path)) as conn:
+            return DatabaseWriter(conn, output, self.databases[path], self.commit_rows)
+
+    def add_clanto_file(self, clanto: ClantoFile):
+        """
+        Adds a ClantoFile object (e.g. the mapping) to be saved.
+
+        Args:
+            clanto (ClantoFile): The ClantoFile object to add.
+
+        Raises:
+            TypeError: If the provided object is not a ClantoFile instance.
+        """
+        if not isinstance(clanto, ClantoFile):
+            raise TypeError(
+                f"Expected 'ClantoFile', but received '{type(clanto).__name__}'"
+            )
+        self.clantod_files.append(clanto)
+
+    def save_files(self) -> None:
+        """Saves the mapping file. Databases are written while anonymising."""
+        for f in self.clantod_files:
+            with self.metrics.stage("save", file=f.filename):
+                save_non_db(f)
 
 
 class FileManager(ClantoFileManager):
     __SUPPORTED_FILES = FILE_SUPPORT
 
-    def __init__(self, root_path: str, output_dir: str = None) -> None:
+    def __init__(
+        self,
+        root_path: str,
+        output_dir: str = None,
+        chunksize: int | None = None,
+        lazy: bool = False,
+        max_loaded: int = 1,
+        incremental: bool = False,
+        metrics: RunMetrics | None = None,
+        categorical: bool = False,
+        settings: dict | None = None,
+    ) -> None:
+        """
+        Initializes the FileManager.
+
+        Args:
+            root_path (str): Directory to discover files in.
+            output_dir (str): The directory where anonymised files will be saved.
+            chunksize (int | None): Rows per chunk when streaming CSV files.
+            lazy (bool): Load files on demand through ``iter_files`` and write
+                anonymised files as soon as they are added, instead of
+                loading every input up front and saving everything at the end.
+            max_loaded (int): In lazy mode, maximum number of raw files held
+                in ``raw_loaded`` at once.
+            incremental (bool): Skip inputs left unchanged since the last run
+                recorded in the output directory's manifest.
+            metrics (RunMetrics | None): Collector of the run's timings, shared
+                with the Anonymiser. Defaults to a new one.
+            categorical (bool): Load the repetitive text columns of CSV and
+                XLSX files as categoricals, so they are held, and anonymised,
+                once per distinct value.
+            settings (dict | None): In incremental mode, settings the outputs
+                depend on (see ``manifest.run_settings``). When they differ
+                from the last run's, every input is processed again.
+        """
 
         super().__init__(root_path, output_dir)
 
-        self.__file_paths = _file_discovery(root_path, self.__SUPPORTED_FILES)
-        if not isinstance(self.__file_paths, list):
-            self.__file_paths = [self.__file_paths]
+        self.metrics = metrics if metrics is not None else RunMetrics()
+        """Timings and counters of the run"""
+
+        self.chunksize = chunksize
+        """Rows per chunk when streaming CSV files (None loads them whole)"""
+        self.lazy = lazy
+        """Whether files are loaded on demand and released once written"""
+        self.max_loaded = max(1, max_loaded) if lazy else None
+        """Maximum number of raw files held at once (None when not lazy)"""
+        self.categorical = categorical
+        """Whether repetitive text columns are loaded as categoricals"""
+
+        with self.metrics.stage("discovery"):
+            self.__file_paths = _file_discovery(root_path, self.__SUPPORTED_FILES)
+            if not isinstance(self.__file_paths, list):
+                self.__file_paths = [self.__file_paths]
 
         self.raw_loaded: dict[str, RawFile] = {}
+        self._raw_lock = threading.Lock()
+        """Guards ``raw_loaded``, loaded and released from different threads
+        when pipelining"""
         self.clantod_files: list[ClantoFile] = []
         self.clanto_mapping: ClantoFile = None
+        self.streamed: list[str] = []
+        """CSV files read chunk by chunk instead of being loaded"""
+        self.columnar: list[str] = []
+        """Parquet/Arrow IPC files, always read row group by row group"""
+        self.pending: list[str] = []
+        """Files not loaded yet (lazy mode)"""
+        self.manifest = (
+            RunManifest(root_path, output_dir, settings) if incremental else None
+        )
+        """Manifest of the last run (incremental mode)"""
+        self.skipped: list[str] = []
+        """Inputs unchanged since the last run, whose outputs are kept"""
+        self.processed: list[str] = []
+        """Inputs to be (re)processed in this run"""
         self._load()
 
     def _load(self) -> None:
         """Load files into memory"""
 
         for file in self.__file_paths:
-            f = load_non_db(file)
+            if self.manifest is not None and self.manifest.is_unchanged(file):
+                self.skipped.append(file)
+                continue
+            self.processed.append(file)
+
+            if is_columnar(file):
+                self.columnar.append(file)
+                continue
+            if self.chunksize and os.path.splitext(file)[1].lower() == ".csv":
+                self.streamed.append(file)
+                continue
+            if self.lazy:
+                self.pending.append(file)
+                continue
+            with self.metrics.stage("load", file=os.path.basename(file)):
+                self._read(file)
+                f = load_non_db(file, categorical=self.categorical)
             self.raw_loaded[f.filename] = f
 
+    def _read(self, path: str) -> None:
+        """Fingerprints an input in the manifest just before it is read."""
+        if self.manifest is not None:
+            self.manifest.read(path)
+
+    def has_files(self) -> bool:
+        """Whether there is anything left to process."""
+        return bool(self.raw_loaded or self.pending or self.streamed or self.columnar)
+
+    def iter_files(self) -> Iterator[RawFile]:
+        """
+        Yields every loaded file, then loads and yields pending ones on demand.
+
+        In lazy mode, loading a file beyond ``max_loaded`` releases the oldest
+        one still held.
+
+        Yields:
+            RawFile: Loaded files, in discovery order.
+        """
+        with self._raw_lock:
+            loaded = list(self.raw_loaded.values())
+        yield from loaded
+
+        while self.pending:
+            path = self.pending.pop(0)
+            with self._raw_lock:
+                while len(self.raw_loaded) >= self.max_loaded:
+                    del self.raw_loaded[next(iter(self.raw_loaded))]
+            with self.metrics.stage("load", file=os.path.basename(path)):
+                self._read(path)
+                f = load_non_db(path, categorical=self.categorical)
+            with self._raw_lock:
+                self.raw_loaded[f.filename] = f
+            yield f
+
+    def release(self, f: RawFile | str) -> None:
+        """
+        Drops a raw file from memory once it has been processed (lazy mode).
+
+        Args:
+            f (RawFile | str): The file, or its filename.
+        """
+        if self.lazy:
+            with self._raw_lock:
+                self.raw_loaded.pop(f if isinstance(f, str) else f.filename, None)
+
+    def iter_chunks(self, path: str) -> Iterator[RawFile]:
+        """
+        Lazily loads a streamed CSV chunk by chunk.
+
+        Args:
+            path (str): Path of a file in ``streamed``.
+
+        Yields:
+            RawFile: One RawFile per chunk of ``chunksize`` rows.
+        """
+        self._read(path)
+        yield from self._timed_load(
+            path,
+            load_non_db_chunks(path, self.chunksize, categorical=self.categorical),
+        )
+
+    def iter_tables(self, path: str) -> Iterator["pa.Table"]:
+        """
+        Lazily reads a Parquet/Arrow IPC file row group by row group.
+
+        Args:
+            path (str): Path of a file in ``columnar``.
+
+        Yields:
+            pa.Table: One Arrow table per row group / record batch.
+        """
+        self._read(path)
+        yield from self._timed_load(path, iter_tables(path))
+
+    def _timed_load(self, path: str, items: Iterator) -> Iterator:
+        """Yields from a lazy reader, timing every read as the file's load."""
+        name = os.path.basename(path)
+        while True:
+            with self.metrics.stage("load", file=name):
+                item = next(items, None)
+            if item is None:
+                return
+            yield item
+
+    def schema(self, path: str) -> "pa.Schema":
+        """
+        Reads the Arrow schema of a file in ``columnar``.
+
+        Args:
+            path (str): Path of a file in ``columnar``.
+
+        Returns:
+            pa.Schema: Schema of the file, reused for its anonymised copy.
+        """
+        return read_schema(path)
+
     def add_clanto_file(self, clanto: ClantoFile):
         """
         Adds a ClantoFile object to the list of processed files.
+        In lazy mode, the file is written right away and not kept.
 
         Args:
             clanto (ClantoFile): The ClantoFile object to add.
@@ -59,6 +368,10 @@ class FileManager(ClantoFileManager):
                 f"Expected 'ClantoFile', but received '{type(clanto).__name__}'"
             )
 
+        if self.lazy:
+            self.save_file(clanto)
+            return
+
         self.clantod_files.append(clanto)
 
     def save_files(
@@ -66,13 +379,42 @@ class FileManager(ClantoFileManager):
     ) -> None:
         """Saves all processed ClantoFiles and the mapping file."""
         for f in self.clantod_files:
-            save_non_db(f)
+            self.save_file(f)
+
+    def save_file(self, clanto: ClantoFile) -> None:
+        """
+        Saves a ClantoFile right away, timed as the save of its input file.
+
+        Args:
+            clanto (ClantoFile): The ClantoFile object to save.
+        """
+        name = clanto.filename.removeprefix("anonymised_")
+        with self.metrics.stage("save", file=name):
+            save_non_db(clanto)
+
+    def save_manifest(self, mapping: dict, settings: dict | None = None) -> None:
+        """
+        Records every processed input in the manifest and saves it
+        (incremental mode only).
+
+        Args:
+            mapping (dict): State of the mapping at the end of the run.
+            settings (dict | None): Settings as they ended up after the run,
+                defaults to those given to the manager.
+        """
+        if self.manifest is None:
+            return
+        for path in self.processed:
+            self.manifest.record(path)
+        self.manifest.save(mapping, settings)
 
 
 class MappingTemplateManager(ClantoFileManager):
     def __init__(self, output_path: str) -> None:
         self._compiled_custom_patterns: list[tuple[re.Pattern, str]] = []
         """Regex-Compiled Custom Patterns"""
+        self._automaton: AhoCorasick = AhoCorasick([])
+        """Automaton over the custom pattern keys, in rule order"""
         self._compiled_map_template: dict = {}
         """Compiled Mapping Template"""
 
@@ -85,26 +427,52 @@ class MappingTemplateManager(ClantoFileManager):
         or load files in the same manner as other ClantoFileManagers.
         Returns an empty list as there are no "sources" to load in this context.
         """
-        files = _file_discovery(_ROOTDIR, _CLANTO_JSON)
+        directory = _cfg_dir() or _ROOTDIR
+        files = _shallow_discovery(directory, _CLANTO_JSON)
+        if not files:
+            raise FileNotFoundError(
+                f"No files found matching patterns '{_CLANTO_JSON}' in directory '{directory}'."
+            )
 
         for f in files:
-            if "custom_rules" in f:
+            if "custom_rules" in f or "substitution_rules" in f:
                 self.custom_sub = load_clason(f)
             elif "mapping_template" in f:
                 self.map_template = load_clason(f)
         self.__precompile()
 
+    def use_templates(
+        self, map_template: dict | None = None, custom_sub: dict | None = None
+    ) -> None:
+        """
+        Uses in-memory templates instead of the .clason files found by ``_load``.
+
+        Args:
+            map_template (dict | None): Filled-in mapping template.
+            custom_sub (dict | None): Substitution rules.
+        """
+        if map_template is not None:
+            self.map_template = map_template
+        if custom_sub is not None:
+            self.custom_sub = custom_sub
+        self.__precompile()
+
     def __precompile(self) -> None:
         """Precompile the Regex Patterns and preprocess the substitution rules"""
-        if isinstance(self.custom_sub.file, dict):
+        self._compiled_custom_patterns = []
+        _keys = []
+        if hasattr(self, "_custom_sub") and isinstance(self.custom_sub.file, dict):
             for patt_k, repl_v in self.custom_sub.file.items():
                 try:
                     _comp_pattern = re.compile(re.escape(str(patt_k)))
                     self._compiled_custom_patterns.append((_comp_pattern, str(repl_v)))
+                    _keys.append(str(patt_k))
 
                 except re.error as e:
                     ...
-        if isinstance(self.map_template.file, dict):
+        self._automaton = AhoCorasick(_keys)
+
+        if hasattr(self, "_map_template") and isinstance(self.map_template.file, dict):
             self._compiled_map_template = {
                 str(k): v for k, v in self.map_template.file.items()
             }
@@ -117,6 +485,8 @@ class MappingTemplateManager(ClantoFileManager):
         Args:
             file (dict): The dictionary representing the mapping template to save.
         """
+        if not hasattr(self, "_map_template"):
+            return
 
         with open(self.map_template.path, "w", encoding="utf-8") as f:
             json.dump(self.map_template.file, f, indent=4)
@@ -125,14 +495,18 @@ class MappingTemplateManager(ClantoFileManager):
     def map_template(self):
         return self._map_template
 
+    @property
+    def map_template_path(self) -> str:
+        """Path of the mapping template, next to the configuration file."""
+        return os.path.join(_cfg_dir() or _ROOTDIR, "mapping_template.clason")
+
     @map_template.setter
     def map_template(self, value: dict) -> MappingTemplate:
         if not isinstance(value, dict):
             raise TypeError(
                 f"Expected 'dict', but got '{type(value).__name__}' instead."
             )
-        __path = os.path.join(_CFG_PATH or _ROOTDIR, "mapping_template.clason")
-        self._map_template = MappingTemplate(file=value, path=__path)
+        self._map_template = MappingTemplate(file=value, path=self.map_template_path)
 
     @property
     def custom_sub(self):
@@ -144,5 +518,5 @@ class MappingTemplateManager(ClantoFileManager):
             raise TypeError(
                 f"Expected 'dict', but got '{type(value).__name__}' instead."
             )
-        __path = os.path.join(_CFG_PATH or _ROOTDIR, "substitution_rules.clason")
+        __path = os.path.join(_cfg_dir() or _ROOTDIR, "substitution_rules.clason")
         self._custom_sub = MappingTemplate(file=value, path=__path)
@@ -0,0 +1,213 @@
+"""Run manifest used to skip unchanged inputs on incremental re-runs"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+MANIFEST_FILENAME = "clanto_manifest.json"
+"""Name of the manifest, saved in the output directory"""
+_HASH_BLOCK_SIZE = 1 << 20
+_KEY_FINGERPRINT_SALT = b"clanto-manifest"
+_KEY_FINGERPRINT_ITERATIONS = 100_000
+
+
+def file_digest(path: str) -> str:
+    """Computes the SHA-256 of a file, reading it in blocks.
+
+    :param path: Path to the file
+    :type path: str
+    :return: Hex digest
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def key_fingerprint(key: str) -> str:
+    """Fingerprint of a secret key, telling keys apart without revealing them.
+
+    :param key: Secret key
+    :type key: str
+    :return: Hex fingerprint (slow salted hash, so weak keys are costly to guess)
+    :rtype: str
+    """
+    return hashlib.pbkdf2_hmac(
+        "sha256",
+        key.encode("utf-8"),
+        _KEY_FINGERPRINT_SALT,
+        _KEY_FINGERPRINT_ITERATIONS,
+    ).hex()[:32]
+
+
+def run_settings(
+    method: str,
+    fpe_key: str | None = None,
+    rules: dict[str, list[str]] | None = None,
+    plan: dict[str, dict[str, str]] | None = None,
+) -> dict:
+    """Settings the outputs of a run depend on, as recorded in the manifest.
+
+    :param method: Anonymisation method
+    :type method: str
+    :param fpe_key: Secret key of the 'fpe' method, if any
+    :type fpe_key: str | None, optional
+    :param rules: Detection rules (``identifiable`` / ``non_identifiable``)
+    :type rules: dict[str, list[str]] | None, optional
+    :param plan: Column plan (file -> column -> action), None without ``--plan``
+    :type plan: dict[str, dict[str, str]] | None, optional
+    :return: JSON-serialisable settings
+    :rtype: dict
+    """
+    return {
+        "method": method,
+        "fpe_key": key_fingerprint(fpe_key) if fpe_key else None,
+        "detection_rules": rules or {},
+        "column_plan": plan,
+    }
+
+
+def _fingerprint(path: str) -> dict:
+    """Size, mtime and SHA-256 of a file, the stat taken before the hash."""
+    stat = os.stat(path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_digest(path),
+    }
+
+
+class RunManifest:
+    """
+    Records the size, mtime and content hash of every processed input, as
+    they were when it was read, and the output it produced, alongside the
+    state of the mapping and the settings of the run (see ``run_settings``).
+
+    A run whose settings differ from the last one treats every input as
+    changed.
+    """
+
+    def __init__(
+        self, root_path: str, output_dir: str, settings: dict | None = None
+    ) -> None:
+        """
+        :param root_path: Input directory; entries are keyed relative to it
+        :type root_path: str
+        :param output_dir: Directory holding the manifest and the outputs
+        :type output_dir: str
+        :param settings: Settings of this run, defaults to None (no settings)
+        :type settings: dict | None, optional
+        """
+        self.root_path = root_path
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_FILENAME)
+
+        self.settings = settings or {}
+        """Settings of this run"""
+        self.entries: dict[str, dict] = {}
+        """Relative input path -> size, mtime, sha256 and output"""
+        self.mapping: dict = {}
+        """State of the mapping at the end of the last run"""
+        self.settings_changed = False
+        """Whether the last run had other settings, so nothing of it is reused"""
+        self._read: dict[str, dict] = {}
+        """Relative input path -> size, mtime and sha256 when read in this run"""
+
+        if os.path.isfile(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("settings", {}) != self.settings:
+                self.settings_changed = True
+                return
+            self.entries = data.get("files", {})
+            self.mapping = data.get("mapping", {})
+
+    def _key(self, path: str) -> str:
+        return os.path.relpath(path, self.root_path)
+
+    @staticmethod
+    def output_for(path: str) -> str:
+        """Output filename produced for an input file."""
+        return f"anonymised_{os.path.basename(path)}"
+
+    def is_unchanged(self, path: str) -> bool:
+        """
+        Checks whether an input is the same as when it was last processed.
+
+        Size and mtime are compared first; the content hash is only computed
+        when the size matches but the mtime moved (e.g. a touched file).
+
+        :param path: Input file
+        :type path: str
+        :return: True if the input and its output can be kept as they are.
+        :rtype: bool
+        """
+        entry = self.entries.get(self._key(path))
+        if entry is None:
+            return False
+        if not os.path.isfile(os.path.join(self.output_dir, entry["output"])):
+            return False
+
+        stat = os.stat(path)
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        if file_digest(path) != entry["sha256"]:
+            return False
+
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def read(self, path: str) -> None:
+        """
+        Takes the size, mtime and content hash of an input about to be read.
+
+        Called before the input is read, so a file edited during the run is
+        recorded as it was before the edit, and processed again next time.
+
+        :param path: Input file
+        :type path: str
+        """
+        self._read.setdefault(self._key(path), _fingerprint(path))
+
+    def record(self, path: str) -> None:
+        """
+        Records an input that has just been processed, as it was when read.
+
+        :param path: Input file
+        :type path: str
+        """
+        key = self._key(path)
+        fingerprint = self._read.pop(key, None) or _fingerprint(path)
+        self.entries[key] = {**fingerprint, "output": self.output_for(path)}
+
+    def save(self, mapping: dict, settings: dict | None = None) -> None:
+        """
+        Writes the manifest to the output directory.
+
+        :param mapping: State of the mapping (size, backend, export file)
+        :type mapping: dict
+        :param settings: Settings as they ended up after the run (e.g. with the
+                         columns profiled in it), defaults to those of the run
+        :type settings: dict | None, optional
+        """
+        if settings is not None:
+            self.settings = settings
+        self.mapping = {
+            **mapping,
+            "updated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "settings": self.settings,
+                    "files": self.entries,
+                    "mapping": self.mapping,
+                },
+                f,
+                indent=4,
+            )
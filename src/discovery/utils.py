@@ -3,8 +3,12 @@
 import glob
 import os
 import json
+from collections import defaultdict
+from collections.abc import Iterator
 
+from ..config import CATEGORICAL_MAX_RATIO, CATEGORICAL_SAMPLE_ROWS
 from ..core.base_reader import RawFile, ClantoFile
+from .excel import read_workbook, write_workbook
 
 import pandas as pd
 
@@ -68,13 +72,86 @@ def load_clason(path: str) -> dict:
     return data
 
 
-def load_non_db(f: str, *args, **kwargs) -> RawFile:
+def categorical_columns(
+    df: pd.DataFrame, max_ratio: float = CATEGORICAL_MAX_RATIO
+) -> list[int]:
+    """
+    Positions of the object columns repetitive enough to be held as
+    categoricals: one array of distinct values plus small integer codes.
+
+    Args:
+        df (pd.DataFrame): DataFrame, or a sample of it.
+        max_ratio (float): Maximum distinct values per non-empty cell.
+            Defaults to CATEGORICAL_MAX_RATIO.
+
+    Returns:
+        list[int]: Column positions.
+    """
+    positions = []
+    for i, dtype in enumerate(df.dtypes):
+        if dtype != object:
+            continue
+        column = df.iloc[:, i]
+        cells = column.count()
+        if cells and column.nunique() <= max_ratio * cells:
+            positions.append(i)
+    return positions
+
+
+def to_categorical(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the repetitive object columns of a DataFrame to categoricals.
+
+    Args:
+        df (pd.DataFrame): Loaded DataFrame.
+
+    Returns:
+        pd.DataFrame: The DataFrame, with ``categorical_columns`` converted.
+    """
+    positions = categorical_columns(df)
+    if not positions:
+        return df
+    df = df.copy(deep=False)
+    for i in positions:
+        df.isetitem(i, df.iloc[:, i].astype("category"))
+    return df
+
+
+def _categorical_dtype(f: str, *args, **kwargs) -> dict:
+    """
+    ``dtype`` argument of ``pd.read_csv`` parsing the repetitive text columns
+    of a CSV straight into categoricals, chosen on its first rows. The other
+    columns keep the ``dtype`` of ``kwargs``, if any.
+
+    Args:
+        f (str): The path to the CSV file.
+        *args: Positional arguments to pass to pandas read function.
+        **kwargs: Keyword arguments to pass to pandas read function.
+
+    Returns:
+        dict: Column name -> dtype.
+    """
+    sample = pd.read_csv(f, *args, nrows=CATEGORICAL_SAMPLE_ROWS, **kwargs)
+    dtype = {sample.columns[i]: "category" for i in categorical_columns(sample)}
+    default = kwargs.get("dtype")
+    if default is None:
+        return dtype
+    return defaultdict(lambda: default, dtype)
+
+
+def load_non_db(f: str, *args, categorical: bool = False, **kwargs) -> RawFile:
     """
     Loads a non-database supported file into a pandas DataFrame.
 
+    Every sheet of a workbook is loaded into ``sheets``, unless pandas
+    arguments are given, in which case ``pd.read_excel`` is used as is.
+
     Args:
         f (str): The path to the file.
         *args: Positional arguments to pass to pandas read function.
+        categorical (bool): Load the repetitive text columns as categoricals
+            (see ``categorical_columns``). A CSV is parsed straight into
+            them, other files are converted once loaded. Defaults to False.
         **kwargs: Keyword arguments to pass to pandas read function.
 
 
@@ -85,28 +162,80 @@ def load_non_db(f: str, *args, **kwargs) -> RawFile:
     _f_xt = os.path.splitext(f)[1].lower()  # file ext
 
     if _f_xt == ".csv":
-        df = pd.read_csv(f, *args, **kwargs)
+        if categorical:
+            kwargs["dtype"] = _categorical_dtype(f, *args, **kwargs)
+        return RawFile(f, pd.read_csv(f, *args, **kwargs))
+    elif _f_xt == ".xlsx" and not args and not kwargs:
+        sheets = read_workbook(f)
+        if categorical:
+            sheets = {name: to_categorical(df) for name, df in sheets.items()}
+        df = next(iter(sheets.values()), pd.DataFrame())
+        return RawFile(f, df, sheets=sheets)
     elif _f_xt in [".xlsx", ".xls"]:
         df = pd.read_excel(f, *args, **kwargs)
+    elif _f_xt == ".parquet":
+        df = pd.read_parquet(f, *args, **kwargs)
+    elif _f_xt in [".arrow", ".feather"]:
+        df = pd.read_feather(f, *args, **kwargs)
     else:
         raise ValueError(f"Unsupported file extension: {_f_xt}")
-    return RawFile(f, df)
+    return RawFile(f, to_categorical(df) if categorical else df)
 
 
-def save_non_db(f: ClantoFile, *args, **kwargs) -> RawFile:
+def load_non_db_chunks(
+    f: str, chunksize: int, categorical: bool = False, **kwargs
+) -> Iterator[RawFile]:
     """
-    Loads a non-database supported file into a pandas DataFrame.
+    Lazily loads a CSV file as a sequence of DataFrame chunks.
+
+    Every column is read as text (``dtype=object``) so a column does not
+    change type, and its cells their formatting, from one chunk to the next.
 
     Args:
         f (str): The path to the file.
-        *args: Positional arguments to pass to pandas read function.
+        chunksize (int): Number of rows per chunk.
+        categorical (bool): Parse the repetitive text columns, chosen on the
+            first rows of the file, as categoricals. Defaults to False.
         **kwargs: Keyword arguments to pass to pandas read function.
 
+    Yields:
+        RawFile: One RawFile per chunk, all sharing the same path.
+    """
+
+    _f_xt = os.path.splitext(f)[1].lower()  # file ext
+
+    if _f_xt != ".csv":
+        raise ValueError(f"Chunked loading is not supported for: {_f_xt}")
+
+    kwargs.setdefault("dtype", object)
+    if categorical:
+        kwargs["dtype"] = _categorical_dtype(f, **kwargs)
+    with pd.read_csv(f, chunksize=chunksize, **kwargs) as reader:
+        for chunk in reader:
+            yield RawFile(f, chunk)
+
+
+def save_non_db(f: ClantoFile, *args, **kwargs) -> RawFile:
+    """
+    Saves a ClantoFile DataFrame (or every sheet of a workbook) to its path.
+
+    Args:
+        f (ClantoFile): The file to save.
+        *args: Positional arguments to pass to pandas write function.
+        **kwargs: Keyword arguments to pass to pandas write function
+            (e.g. ``mode="a", header=False`` to append CSV chunks).
+
     Returns:
         RawFile: RawFile dataclass
     """
 
     if f.ext == ".csv":
-        f.df.to_csv(f.path, index=False)
-    elif f.ext in [".xlsx", ".xls"]:
+        f.df.to_csv(f.path, *args, index=False, **kwargs)
+    elif f.ext == ".xlsx":
+        write_workbook(f.path, f.sheets or {"Sheet1": f.df})
+    elif f.ext == ".xls":
         f.df.to_excel(f.path, index=False)
+    elif f.ext == ".parquet":
+        f.df.to_parquet(f.path, *args, index=False, **kwargs)
+    elif f.ext in [".arrow", ".feather"]:
+        f.df.reset_index(drop=True).to_feather(f.path, *args, **kwargs)
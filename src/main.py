@@ -1,20 +1,29 @@
 import argparse
 import os
-from .core.anonymiser import Anonymiser
-from .config import FILE_SUPPORT, DATABASE_SUPPORT
-from .discovery.lookup import DatabaseManager, FileManager
-from .example.dummy_gen import create_dummy_files
-from .clanto_cfg import _load_cfg
+from .config import (
+    CONFIG_ENV,
+    FILE_SUPPORT,
+    DATABASE_SUPPORT,
+    DEFAULT_DB_BATCH_SIZE,
+    DEFAULT_PIPELINE_IN_FLIGHT,
+    DEFAULT_TEMPLATE_MEMORY_MB,
+    FPE_KEY_ENV,
+)
 
-__ROOTDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-"""Root directory of Clanto"""
-__CFG, __CFG_PATH = _load_cfg(__ROOTDIR)
-"""Automatic loading of Clanto's ConfigParser"""
+
+def create_dummy_files(directory: str = "input_data") -> None:
+    """Create dummy files to test how Clanto works (see ``example.dummy_gen``)"""
+    from .example.dummy_gen import create_dummy_files
+
+    create_dummy_files(directory)
 
 
 def main():
     """
     In charge of parsing arguments and running Clanto
+
+    Only the standard library is imported until the arguments are parsed, so
+    ``clanto --help`` stays fast; pandas and the pipeline load afterwards.
     """
     parser = argparse.ArgumentParser(
         description="Anonymise text in CSV and XLSX files."
@@ -32,6 +41,13 @@ def main():
         default=False,
         action="store_true",
     )
+    parser.add_argument(
+        "--template-memory",
+        help=f"With --gen-map, memory budget in MB of the distinct values counted before they are spilled to disk (default {DEFAULT_TEMPLATE_MEMORY_MB}).",
+        type=float,
+        default=DEFAULT_TEMPLATE_MEMORY_MB,
+        metavar="MB",
+    )
     parser.add_argument(
         "-o",
         "--output-dir",
@@ -41,10 +57,15 @@ def main():
     parser.add_argument(
         "-m",
         "--method",
-        help="Anonymisation method: 'random_chars', 'random_words' or 'custom_mapping'.",
-        choices=["random_chars", "random_words", "custom_mapping"],
+        help="Anonymisation method: 'random_chars', 'random_words', 'custom_mapping' or 'fpe'.",
+        choices=["random_chars", "random_words", "custom_mapping", "fpe"],
         default="random_chars",
     )
+    parser.add_argument(
+        "--fpe-key",
+        help=f"Secret key for the 'fpe' method. Defaults to the {FPE_KEY_ENV} environment variable.",
+        default=None,
+    )
 
     parser.add_argument(
         "-t",
@@ -53,6 +74,74 @@ def main():
         choices=["file", "db"],
         default="file",
     )
+    parser.add_argument(
+        "--workers",
+        help="Number of processes used to anonymise files and row shards.",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--chunksize",
+        help="Stream CSV files in chunks of this many rows instead of loading them whole. With '-t db', rows fetched per batch.",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--lazy",
+        help="Load, anonymise, write and release one file at a time instead of loading every file up front.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--max-loaded",
+        help="With --lazy, maximum number of input files held in memory at once.",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--pipeline",
+        help=f"Read the next file (or chunk) and write the previous one while anonymising the current one, with at most N in flight (default {DEFAULT_PIPELINE_IN_FLIGHT}). Implies --lazy.",
+        type=int,
+        nargs="?",
+        const=DEFAULT_PIPELINE_IN_FLIGHT,
+        default=None,
+        metavar="N",
+    )
+    parser.add_argument(
+        "--categorical",
+        help="Load repetitive text columns of CSV/XLSX files as categoricals: they take a fraction of the memory and only their distinct values are anonymised.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--mapping-store",
+        help="SQLite file holding the mapping. Reusing it keeps tokens consistent across runs.",
+        default=None,
+    )
+    parser.add_argument(
+        "--mapping-format",
+        help="Format of the mapping export, written while anonymising: 'csv' or the compact, fast to reload 'parquet'.",
+        choices=["csv", "parquet"],
+        default="csv",
+    )
+    parser.add_argument(
+        "--plan",
+        help="Profile a sample of every text column and pass through the columns without identifiable values (dates, numbers stored as text...). The plan is saved to the .clanto config, where it can be edited.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--incremental",
+        help="Only process inputs that are new or changed since the last run in the output directory.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--config",
+        help=f"Path of the .clanto configuration file. Defaults to the {CONFIG_ENV} environment variable, then to a shallow search of the working directory.",
+        default=None,
+    )
+    parser.add_argument(
+        "--profile",
+        help="Run under cProfile and save the stats to this file (e.g. clanto.prof).",
+        default=None,
+    )
     parser.add_argument(
         "--create-dummy",
         action="store_true",
@@ -61,6 +150,17 @@ def main():
 
     args = parser.parse_args()
 
+    from .clanto_cfg import _cfg_file, _load_cfg
+    from .core.anonymiser import Anonymiser
+    from .core.mapping_store import SqliteMappingStore
+    from .core.metrics import RunMetrics, profile
+    from .core.profiler import ColumnPlan
+    from .core.rules import RuleEngine
+    from .discovery.lookup import DatabaseManager, FileManager
+    from .discovery.manifest import run_settings
+
+    cfg, _ = _load_cfg(args.config)
+
     if args.create_dummy:
         create_dummy_files(args.i)
 
@@ -69,25 +169,61 @@ def main():
     anonymisation_method = args.method
     file_ext = args.type
     mapping_gen = args.gen_map
+    metrics = RunMetrics()
+    rules = RuleEngine.from_config(cfg)
+    column_plan = ColumnPlan(rules, cfg, _cfg_file()) if args.plan else None
+    fpe_key = args.fpe_key or os.environ.get(FPE_KEY_ENV)
+    settings = run_settings(
+        anonymisation_method,
+        fpe_key if anonymisation_method == "fpe" else None,
+        {"identifiable": rules.include, "non_identifiable": rules.exclude},
+        column_plan.snapshot() if column_plan is not None else None,
+    )
 
-    if file_ext == "file":
-        fmanager = FileManager(input_directory, output_directory)
-    elif file_ext == "db":
-        fmanager = DatabaseManager(input_directory, output_directory)
+    with profile(args.profile):
+        if file_ext == "file":
+            fmanager = FileManager(
+                input_directory,
+                output_directory,
+                chunksize=args.chunksize,
+                lazy=args.lazy or bool(args.pipeline),
+                max_loaded=args.max_loaded,
+                incremental=args.incremental,
+                metrics=metrics,
+                categorical=args.categorical,
+                settings=settings,
+            )
+        elif file_ext == "db":
+            fmanager = DatabaseManager(
+                input_directory,
+                output_directory,
+                batch_size=args.chunksize or DEFAULT_DB_BATCH_SIZE,
+                metrics=metrics,
+            )
 
-    anon = Anonymiser(
-        output_dir=output_directory,
-        anonymisation_method=anonymisation_method,
-        manager=fmanager,
-        make_mapping=mapping_gen,
-        cfg=__CFG,
-    )
-    if mapping_gen:
-        anon.gen_map_template()
+        anon = Anonymiser(
+            output_dir=output_directory,
+            anonymisation_method=anonymisation_method,
+            manager=fmanager,
+            make_mapping=mapping_gen,
+            cfg=cfg,
+            fpe_key=fpe_key,
+            workers=args.workers,
+            mapping_store=(
+                SqliteMappingStore(args.mapping_store) if args.mapping_store else None
+            ),
+            metrics=metrics,
+            pipeline=args.pipeline,
+            mapping_format=args.mapping_format,
+            column_plan=column_plan,
+        )
+        if mapping_gen:
+            anon.gen_map_template(memory_mb=args.template_memory)
 
-    else:
-        anon.anonymise_files()
+        else:
+            anon.anonymise_files()
 
+        anon.store.close()
     print("\nAnonymisation process finished.")
 
 
@@ -1,11 +1,28 @@
+import numpy as np
 import pandas as pd
 import random
 import re
 from datetime import datetime
 from typing import Any
 from .config import RANDOM_CHARS, RANDOM_WORDS
+from .core.dates import date_mask, may_be_date
 from .discovery.lookup import MappingTemplateManager
 
+COLUMN_NUMERIC = "numeric"
+"""Column whose values are all numbers (or numbers stored as strings)"""
+COLUMN_DATE = "date"
+"""Column whose values are all dates (or dates stored as strings)"""
+COLUMN_TEXT = "text"
+"""Column that needs value-level classification"""
+
+_EMAIL_RE = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+_PHONE_RE = re.compile(r"^[\d\s\-\(\)\+]*\d[\d\s\-\(\)\+]*$")
+_LETTER_RE = re.compile(r"[a-zA-Z]")
+
+_NUMBER_CANDIDATE_PATTERN = r"\d|(?i:nan|inf)"
+"""Strings that ``float`` may accept although ``pd.to_numeric`` does not"""
+_DATE_SAMPLE_SIZE = 100
+
 
 def is_number(value: float | int | str) -> bool:
     """Checks if a value can be converted to a number.
@@ -26,8 +43,9 @@ def is_number(value: float | int | str) -> bool:
 def is_date(value: Any) -> bool:
     """Checks if a value can be parsed as a date.
 
-    This is a basic check. For more robust date parsing, consider
-    using a dedicated library like 'dateutil.parser'
+    Strings go through a cheap character-class prefilter first (see
+    ``may_be_date``), so names, e-mails and most free text are ruled out
+    without calling the date parser.
 
     :param value: Value to be checked
     :type value: Any
@@ -36,6 +54,8 @@ def is_date(value: Any) -> bool:
     """
     if isinstance(value, datetime):
         return True
+    if isinstance(value, str) and not may_be_date(value.strip()):
+        return False
     try:
         pd.to_datetime(value)
         return True
@@ -57,9 +77,6 @@ def generate_random_string(length: int = 10, prefix: str = "ANON_") -> str:
     return f"{prefix}{random_part}"
 
 
-import re
-
-
 def custom_mapping_replacement(
     word: str,
     mm: MappingTemplateManager,
@@ -68,6 +85,9 @@ def custom_mapping_replacement(
     Performs custom mapping replacement using pre-compiled regex patterns
     and a pre-processed lowercase template map from the MappingTemplateManager.
 
+    The first substitution rule (in file order) whose key occurs in the word
+    is found with a single pass of the manager's Aho-Corasick automaton.
+
     :param word: The word to be replaced.
     :type word: str
     :param mm: An instance of MappingTemplateManager containing compiled patterns and map.
@@ -77,12 +97,10 @@ def custom_mapping_replacement(
     """
     word_str = str(word)
 
-    for (
-        compiled_pattern,
-        replacement_value,
-    ) in mm._compiled_custom_patterns:
-        if compiled_pattern.search(word_str):
-            return compiled_pattern.sub(replacement_value, word_str)
+    rule = mm._automaton.first_match(word_str)
+    if rule is not None:
+        compiled_pattern, replacement_value = mm._compiled_custom_patterns[rule]
+        return compiled_pattern.sub(replacement_value, word_str)
 
     if word_str in mm._compiled_map_template:
         template_value = mm._compiled_map_template[word_str]
@@ -94,6 +112,46 @@ def custom_mapping_replacement(
     return word_str
 
 
+def custom_mapping_replacements(
+    words: list[str] | np.ndarray | pd.Series,
+    mm: MappingTemplateManager,
+) -> list[str]:
+    """
+    Batch version of ``custom_mapping_replacement`` for a whole column.
+
+    Words without a substitution rule are looked up in the mapping template
+    with a single vectorized ``map`` instead of one dict lookup per word.
+
+    :param words: The words to be replaced.
+    :type words: list[str] | np.ndarray | pd.Series
+    :param mm: An instance of MappingTemplateManager containing compiled patterns and map.
+    :type mm: MappingTemplateManager
+    :return: The replaced words, in the same order.
+    :rtype: list[str]
+    """
+    words_str = [str(word) for word in words]
+    replaced: list[str | None] = [None] * len(words_str)
+
+    for i, word_str in enumerate(words_str):
+        rule = mm._automaton.first_match(word_str)
+        if rule is not None:
+            compiled_pattern, replacement_value = mm._compiled_custom_patterns[rule]
+            replaced[i] = compiled_pattern.sub(replacement_value, word_str)
+
+    remaining = [i for i, value in enumerate(replaced) if value is None]
+    if remaining:
+        looked_up = pd.Series(
+            [words_str[i] for i in remaining], dtype=object
+        ).map(mm._compiled_map_template)
+        for i, template_value in zip(remaining, looked_up):
+            if pd.isna(template_value) or str(template_value) == "":
+                replaced[i] = words_str[i]
+            else:
+                replaced[i] = str(template_value)
+
+    return replaced
+
+
 def generate_random_word_string(prefix: str = "ANON_") -> str:
     """Generates a random string using words from a predefined list.
 
@@ -171,6 +229,118 @@ def anonymise_phone(phone: str) -> str:
     return result
 
 
+_RANDOM_CODEPOINTS = np.frombuffer(RANDOM_CHARS.encode("utf-32-le"), dtype=np.uint32)
+_DIGIT_CODEPOINTS = np.arange(ord("0"), ord("9") + 1, dtype=np.uint32)
+_DOT_CODEPOINT = ord(".")
+
+
+def _bulk_rng() -> np.random.Generator:
+    """NumPy generator seeded from ``random``, so ``random.seed`` still applies"""
+    return np.random.default_rng(random.getrandbits(64))
+
+
+def _to_codepoints(values: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Joins strings into one code point buffer, returning it and the offsets"""
+    lengths = np.fromiter((len(v) for v in values), dtype=np.int64, count=len(values))
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    buffer = np.frombuffer("".join(values).encode("utf-32-le"), dtype=np.uint32)
+    return buffer.copy(), offsets
+
+
+def _from_codepoints(buffer: np.ndarray, offsets: np.ndarray) -> list[str]:
+    """Splits a code point buffer back into strings"""
+    joined = buffer.tobytes().decode("utf-32-le")
+    return [joined[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def anonymise_emails(
+    emails: list[str] | np.ndarray | pd.Series,
+    keep_domain: bool = True,
+    rng: np.random.Generator | None = None,
+) -> list[str]:
+    """
+    Column-level version of ``anonymise_email``.
+
+    Every replacement character of the batch is drawn at once into a single
+    buffer, instead of one ``random.choice`` per character.
+
+    :param emails: Original email addresses
+    :type emails: list[str] | np.ndarray | pd.Series
+    :param keep_domain: Whether to keep the original domains or anonymise them, defaults to True
+    :type keep_domain: bool, optional
+    :param rng: Random generator, defaults to one seeded from ``random``
+    :type rng: np.random.Generator | None, optional
+    :return: Anonymised email addresses, in the same order. Values that are not
+             a string with a single ``@`` are returned unchanged.
+    :rtype: list[str]
+    """
+    result = list(emails)
+    valid = [
+        i
+        for i, email in enumerate(result)
+        if isinstance(email, str) and email.count("@") == 1
+    ]
+    if not valid:
+        return result
+    rng = rng if rng is not None else _bulk_rng()
+
+    usernames, domains = zip(*(result[i].split("@") for i in valid))
+
+    buffer, offsets = _to_codepoints(list(usernames))
+    buffer[:] = rng.choice(_RANDOM_CODEPOINTS, size=len(buffer))
+    usernames = _from_codepoints(buffer, offsets)
+
+    if not keep_domain:
+        buffer, offsets = _to_codepoints(list(domains))
+        letters = buffer != _DOT_CODEPOINT
+        buffer[letters] = rng.choice(_RANDOM_CODEPOINTS, size=int(letters.sum()))
+        domains = _from_codepoints(buffer, offsets)
+
+    for i, username, domain in zip(valid, usernames, domains):
+        result[i] = f"{username}@{domain}"
+    return result
+
+
+def anonymise_phones(
+    phones: list[str] | np.ndarray | pd.Series,
+    rng: np.random.Generator | None = None,
+) -> list[str]:
+    """
+    Column-level version of ``anonymise_phone``.
+
+    Every digit of the batch is replaced at once over a single buffer, so
+    separators, spacing and lengths are preserved.
+
+    :param phones: Original phone numbers
+    :type phones: list[str] | np.ndarray | pd.Series
+    :param rng: Random generator, defaults to one seeded from ``random``
+    :type rng: np.random.Generator | None, optional
+    :return: Anonymised phone numbers, in the same order. Non-string values
+             are returned unchanged.
+    :rtype: list[str]
+    """
+    result = list(phones)
+    valid = [i for i, phone in enumerate(result) if isinstance(phone, str)]
+    if not valid:
+        return result
+    rng = rng if rng is not None else _bulk_rng()
+
+    values = [result[i] for i in valid]
+    buffer, offsets = _to_codepoints(values)
+    joined = "".join(values)
+    if joined.isascii():
+        digits = (buffer >= ord("0")) & (buffer <= ord("9"))
+    else:
+        digits = np.fromiter(
+            (c.isdigit() for c in joined), dtype=bool, count=len(joined)
+        )
+    buffer[digits] = rng.choice(_DIGIT_CODEPOINTS, size=int(digits.sum()))
+
+    for i, phone in zip(valid, _from_codepoints(buffer, offsets)):
+        result[i] = phone
+    return result
+
+
 def is_identifiable_string(
     value: Any, exclude_patterns: str | list[str] | None = None
 ) -> bool:
@@ -209,15 +379,141 @@ def is_identifiable_string(
     if is_number(value_stripped) or is_date(value_stripped):
         return False
 
-    email_pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-    phone_pattern = r"^[\d\s\-\(\)\+]*\d[\d\s\-\(\)\+]*$"
-
-    if re.search(email_pattern, value_stripped):
+    if _EMAIL_RE.search(value_stripped):
         return True
-    if re.search(phone_pattern, value_stripped):
+    if _PHONE_RE.search(value_stripped):
         return True
 
-    if re.search(r"[a-zA-Z]", value_stripped):
+    if _LETTER_RE.search(value_stripped):
         return True
 
     return False
+
+
+def _number_mask(values: pd.Series) -> np.ndarray:
+    """Vectorized ``is_number`` over a Series of stripped strings.
+
+    :param values: Stripped strings
+    :type values: pd.Series
+    :return: Boolean array, True where the value can be converted to a number.
+    :rtype: np.ndarray
+    """
+    mask = pd.to_numeric(values, errors="coerce").notna().to_numpy(dtype=bool)
+
+    # float() is more permissive than pd.to_numeric ("nan", "1_000", "1e400")
+    residual = ~mask & values.str.contains(
+        _NUMBER_CANDIDATE_PATTERN, regex=True
+    ).to_numpy(dtype=bool)
+    if residual.any():
+        mask[residual] = [is_number(v) for v in values[residual]]
+    return mask
+
+
+def infer_column_type(series: pd.Series) -> str:
+    """
+    Tags a whole column as numeric, date or free text.
+
+    Numeric and date columns (either by dtype or because every string in
+    them converts) hold no identifiable strings, so they can skip
+    value-level classification entirely.
+
+    :param series: Column to inspect
+    :type series: pd.Series
+    :return: One of ``COLUMN_NUMERIC``, ``COLUMN_DATE`` or ``COLUMN_TEXT``.
+    :rtype: str
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return COLUMN_NUMERIC
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return COLUMN_DATE
+
+    values = series.dropna()
+    is_str = values.map(type).eq(str)
+    if not is_str.all():
+        inferred = pd.api.types.infer_dtype(values[~is_str], skipna=True)
+        if inferred in (
+            "integer",
+            "floating",
+            "mixed-integer-float",
+            "decimal",
+            "boolean",
+        ):
+            non_str_type = COLUMN_NUMERIC
+        elif inferred in ("datetime", "datetime64", "date"):
+            non_str_type = COLUMN_DATE
+        else:
+            return COLUMN_TEXT
+    else:
+        non_str_type = None
+
+    stripped = values[is_str].astype(object).str.strip()
+    stripped = stripped[stripped != ""]
+    if stripped.empty:
+        return non_str_type or COLUMN_TEXT
+
+    if non_str_type in (None, COLUMN_NUMERIC) and _number_mask(stripped).all():
+        return COLUMN_NUMERIC
+
+    if non_str_type in (None, COLUMN_DATE):
+        if (
+            date_mask(stripped.head(_DATE_SAMPLE_SIZE)).all()
+            and date_mask(stripped).all()
+        ):
+            return COLUMN_DATE
+
+    return COLUMN_TEXT
+
+
+def identifiable_mask(
+    series: pd.Series, exclude_patterns: str | list[str] | None = None
+) -> np.ndarray:
+    """
+    Batch version of ``is_identifiable_string`` over a whole Series.
+
+    Gives the same answer as ``is_identifiable_string`` for every value, but
+    relies on bulk numeric/datetime coercion and the ``.str`` regex
+    accessors instead of one Python call per value.
+
+    :param series: Values to check
+    :type series: pd.Series
+    :param exclude_patterns: A regex string or a list of regex strings. Values
+                             matching any of them are never identifiable.
+    :type exclude_patterns: str | list[str] | None
+    :return: Boolean array aligned with ``series``.
+    :rtype: np.ndarray
+    """
+    result = np.zeros(len(series), dtype=bool)
+    if infer_column_type(series) != COLUMN_TEXT:
+        return result
+
+    values = pd.Series(series.to_numpy(dtype=object), dtype=object)
+    is_str = values.map(type).eq(str)
+    stripped = values[is_str].str.strip()
+    candidates = stripped[stripped != ""]
+
+    if exclude_patterns and not candidates.empty:
+        patterns_to_check = (
+            [exclude_patterns]
+            if isinstance(exclude_patterns, str)
+            else exclude_patterns
+        )
+        excluded = np.zeros(len(candidates), dtype=bool)
+        for pattern in patterns_to_check:
+            excluded |= candidates.str.contains(
+                pattern, flags=re.IGNORECASE, regex=True
+            ).to_numpy(dtype=bool)
+        candidates = candidates[~excluded]
+
+    if not candidates.empty:
+        candidates = candidates[~_number_mask(candidates)]
+    if not candidates.empty:
+        candidates = candidates[~date_mask(candidates)]
+    if not candidates.empty:
+        identifiable = (
+            candidates.str.contains(_EMAIL_RE.pattern, regex=True)
+            | candidates.str.contains(_PHONE_RE.pattern, regex=True)
+            | candidates.str.contains(_LETTER_RE.pattern, regex=True)
+        ).to_numpy(dtype=bool)
+        result[candidates.index[identifiable]] = True
+
+    return result
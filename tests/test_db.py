@@ -0,0 +1,52 @@
+import os
+import sqlite3
+
+from src.core.anonymiser import Anonymiser
+from src.db.utils import list_tables
+from src.discovery.lookup import DatabaseManager
+
+
+def _objects(path: str) -> set[tuple[str, str]]:
+    with sqlite3.connect(path) as conn:
+        return set(
+            conn.execute(
+                "SELECT type, name FROM sqlite_master "
+                "WHERE substr(name, 1, 7) != 'sqlite_'"
+            )
+        )
+
+
+def test_tables_named_like_sqlite_internals_are_copied(tmp_path):
+    root, output = tmp_path / "in", tmp_path / "out"
+    root.mkdir()
+    path = str(root / "app.db")
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+            CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT);
+            CREATE TABLE sqlite1_log (id INTEGER PRIMARY KEY, message TEXT);
+            CREATE TABLE sqliteevents (id INTEGER PRIMARY KEY, owner TEXT);
+            CREATE INDEX sqlite1_log_message ON sqlite1_log (message);
+            CREATE VIEW sqliteview AS SELECT owner FROM sqliteevents;
+            INSERT INTO customers (name) VALUES ('Alice Smith');
+            INSERT INTO sqlite1_log (message) VALUES ('Bob Jones called');
+            INSERT INTO sqliteevents (owner) VALUES ('Carol White');
+            """)
+    with sqlite3.connect(path) as conn:
+        assert list_tables(conn) == ["customers", "sqlite1_log", "sqliteevents"]
+
+    manager = DatabaseManager(str(root), str(output))
+    Anonymiser(manager, output_dir=str(output)).anonymise_files()
+
+    copy = os.path.join(output, "anonymised_app.db")
+    assert _objects(copy) == {
+        ("table", "customers"),
+        ("table", "sqlite1_log"),
+        ("table", "sqliteevents"),
+        ("index", "sqlite1_log_message"),
+        ("view", "sqliteview"),
+    }
+    with sqlite3.connect(copy) as conn:
+        (owner,) = conn.execute("SELECT owner FROM sqliteevents").fetchone()
+        (message,) = conn.execute("SELECT message FROM sqlite1_log").fetchone()
+    assert owner != "Carol White"
+    assert message != "Bob Jones called"
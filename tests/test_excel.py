@@ -0,0 +1,73 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.discovery import excel
+from src.discovery.excel import EXCEL_MAX_CELL_CHARS, read_workbook, write_workbook
+
+
+@pytest.fixture(params=["calamine", None], ids=["calamine", "openpyxl"])
+def reader(request, monkeypatch) -> None:
+    if request.param is not None:
+        pytest.importorskip("python_calamine")
+    monkeypatch.setattr(excel, "_READ_ENGINE", request.param)
+
+
+def test_round_trip(tmp_path, reader):
+    path = str(tmp_path / "book.xlsx")
+    sheets = {
+        "Customers": pd.DataFrame(
+            {
+                "name": ["Alice & Bob", "<Carol>", np.nan, 'Dan "the" man'],
+                "age": [34, 41, 27, 55],
+                "score": [1.5, np.nan, -2.25, 1e-7],
+                "active": [True, False, True, True],
+                "joined": pd.to_datetime(
+                    ["2024-01-05 00:00", "2023-12-31 10:30", None, "1999-02-28 00:00"]
+                ),
+            }
+        ),
+        "Notes & <more>": pd.DataFrame(
+            {
+                "note": ["x" * 30_000, "short", "line\nbreak"],
+                "day": [
+                    datetime.date(2024, 1, 5),
+                    datetime.date(2020, 2, 29),
+                    datetime.date(1900, 3, 1),
+                ],
+            }
+        ),
+        "Empty": pd.DataFrame({"only_header": pd.Series([], dtype=object)}),
+    }
+    write_workbook(path, sheets)
+    read = read_workbook(path)
+
+    assert list(read) == list(sheets)
+    pd.testing.assert_frame_equal(read["Customers"], sheets["Customers"])
+
+    notes = read["Notes & <more>"]
+    assert notes["note"].tolist() == sheets["Notes & <more>"]["note"].tolist()
+    assert pd.to_datetime(notes["day"]).dt.date.tolist() == (
+        sheets["Notes & <more>"]["day"].tolist()
+    )
+    assert list(read["Empty"].columns) == ["only_header"]
+    assert read["Empty"].empty
+
+
+def test_long_strings_are_truncated_with_a_warning(tmp_path):
+    path = str(tmp_path / "book.xlsx")
+    df = pd.DataFrame({"text": ["a" * (EXCEL_MAX_CELL_CHARS + 100), "ok"]})
+    with pytest.warns(UserWarning, match=r"1 cell\(s\) were truncated .*A2"):
+        write_workbook(path, {"Sheet1": df})
+    text = read_workbook(path)["Sheet1"]["text"]
+    assert text.tolist() == ["a" * EXCEL_MAX_CELL_CHARS, "ok"]
+
+
+def test_illegal_characters_are_removed_with_a_warning(tmp_path):
+    path = str(tmp_path / "book.xlsx")
+    df = pd.DataFrame({"text": ["fine", "ab\x01cd"]})
+    with pytest.warns(UserWarning, match=r"\[Sheet1\]: 1 cell\(s\) had .*A3"):
+        write_workbook(path, {"Sheet1": df})
+    assert read_workbook(path)["Sheet1"]["text"].tolist() == ["fine", "abcd"]
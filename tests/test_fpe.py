@@ -0,0 +1,54 @@
+import string
+
+import pytest
+
+from src.core.fpe import FormatPreservingCipher
+
+
+@pytest.fixture
+def cipher() -> FormatPreservingCipher:
+    return FormatPreservingCipher("test-key")
+
+
+def _letters(value: str) -> str:
+    return "".join(c for c in value if c in string.ascii_letters)
+
+
+def _digits(value: str) -> str:
+    return "".join(c for c in value if c in string.digits)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("john.smith1", "john.smith2"),
+        ("AB1234567", "AB7654321"),
+        ("customer_0001_anderson", "customer_0002_anderson"),
+    ],
+)
+def test_values_differing_only_in_digits_get_different_letters(cipher, first, second):
+    assert _letters(cipher.encrypt(first)) != _letters(cipher.encrypt(second))
+
+
+@pytest.mark.parametrize(
+    "first, second", [("AB1234567", "XY1234567"), ("order-42-abc", "order-42-abd")]
+)
+def test_values_differing_only_in_letters_get_different_digits(cipher, first, second):
+    assert _digits(cipher.encrypt(first)) != _digits(cipher.encrypt(second))
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["", "john.smith1", "AB1234567", "+34 600 123 456", "Ñandú-7", "already ok"],
+)
+def test_round_trip_keeps_format(cipher, value):
+    encrypted = cipher.encrypt(value, "general")
+    assert len(encrypted) == len(value)
+    assert [cipher._layout(c) for c in encrypted] == [cipher._layout(c) for c in value]
+    assert cipher.decrypt(encrypted, "general") == value
+
+
+def test_email_round_trip_keeps_domain(cipher):
+    encrypted = cipher.encrypt_email("john.smith1@example.com")
+    assert encrypted.endswith("@example.com")
+    assert cipher.decrypt_email(encrypted) == "john.smith1@example.com"
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from src.discovery.manifest import RunManifest, run_settings
+
+
+@pytest.fixture
+def dirs(tmp_path) -> tuple[str, str]:
+    root, output = tmp_path / "in", tmp_path / "out"
+    root.mkdir()
+    output.mkdir()
+    (root / "a.csv").write_text("name\nAlice\n")
+    (output / "anonymised_a.csv").write_text("name\nXyz\n")
+    return str(root), str(output)
+
+
+def _run(root: str, output: str, settings: dict, edit: str | None = None) -> None:
+    path = os.path.join(root, "a.csv")
+    manifest = RunManifest(root, output, settings)
+    manifest.read(path)
+    if edit is not None:
+        with open(path, "w") as f:
+            f.write(edit)
+    manifest.record(path)
+    manifest.save({})
+
+
+def test_unchanged_input_is_skipped(dirs):
+    root, output = dirs
+    settings = run_settings("random_chars")
+    _run(root, output, settings)
+    assert RunManifest(root, output, settings).is_unchanged(f"{root}/a.csv")
+
+
+def test_input_edited_while_processed_is_processed_again(dirs):
+    root, output = dirs
+    settings = run_settings("random_chars")
+    _run(root, output, settings, edit="name\nBob, who was added later\n")
+    assert not RunManifest(root, output, settings).is_unchanged(f"{root}/a.csv")
+
+
+@pytest.mark.parametrize(
+    "changed",
+    [
+        run_settings("random_words"),
+        run_settings("fpe", fpe_key="other key"),
+        run_settings("fpe", fpe_key="secret", rules={"identifiable": ["CUST-\\d+"]}),
+        run_settings("fpe", fpe_key="secret", plan={"a.csv": {"name": "skip"}}),
+    ],
+)
+def test_other_settings_process_everything_again(dirs, changed):
+    root, output = dirs
+    _run(root, output, run_settings("fpe", fpe_key="secret"))
+    manifest = RunManifest(root, output, changed)
+    assert manifest.settings_changed
+    assert not manifest.is_unchanged(f"{root}/a.csv")
+
+
+def test_key_is_not_stored_in_clear(dirs):
+    root, output = dirs
+    _run(root, output, run_settings("fpe", fpe_key="secret"))
+    with open(os.path.join(output, "clanto_manifest.json")) as f:
+        assert "secret" not in f.read()
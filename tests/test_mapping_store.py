@@ -0,0 +1,57 @@
+import pytest
+
+from src.core.mapping_store import SqliteMappingStore
+
+
+def _count_selects(store: SqliteMappingStore) -> list[str]:
+    queries = []
+    store._conn.set_trace_callback(
+        lambda sql: queries.append(sql) if sql.lstrip().startswith("SELECT") else None
+    )
+    return queries
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "mapping.db")
+
+
+def test_first_run_never_reads_the_database(path):
+    store = SqliteMappingStore(path, batch_size=2)
+    queries = _count_selects(store)
+    for i in range(10):
+        assert f"name{i}" not in store.forward
+        assert f"token{i}" not in store.reverse
+        store.forward[f"name{i}"] = f"token{i}"
+    assert store.forward["name3"] == "token3"
+    assert store.reverse["token7"] == "name7"
+    assert queries == []
+    store.close()
+
+
+def test_prefetched_misses_are_not_queried_again(path):
+    store = SqliteMappingStore(path)
+    store.forward["known"] = "token"
+    store.close()
+    store = SqliteMappingStore(path)
+    queries = _count_selects(store)
+    store.prefetch(["known", "new"])
+    assert len(queries) == 1
+    assert "new" not in store.forward
+    assert store.forward["known"] == "token"
+    assert "other" not in store.reverse
+    assert "other" not in store.reverse
+    assert len(queries) == 2
+    store.close()
+
+
+def test_evicted_pairs_are_read_back(path):
+    store = SqliteMappingStore(path, cache_size=2, batch_size=1)
+    for i in range(5):
+        store.forward[f"name{i}"] = f"token{i}"
+    assert store.forward["name0"] == "token0"
+    assert store.reverse["token1"] == "name1"
+    store.delete("name0")
+    assert "name0" not in store.forward
+    assert "token0" not in store.reverse
+    store.close()
@@ -0,0 +1,156 @@
+from configparser import ConfigParser
+
+import pandas as pd
+import pytest
+
+from src.core.profiler import (
+    ACTION_ANONYMISE,
+    ACTION_SKIP,
+    ColumnPlan,
+    encode_plan_key,
+    profile_column,
+)
+from src.core.rules import RuleEngine
+
+
+@pytest.fixture
+def rules() -> RuleEngine:
+    return RuleEngine()
+
+
+def _column(values: list, rows: int = 1000) -> pd.Series:
+    return pd.Series((values * (rows // len(values) + 1))[:rows], dtype=object)
+
+
+@pytest.mark.parametrize(
+    "values, kind",
+    [
+        (["Alice", "Bob", "Carol"], "enum"),
+        ([f"{name}{i}" for i in range(100) for name in ("JSMITH", "ADOE")], "code"),
+        ([f"ORD-{i:04d}" for i in range(200)], "code"),
+    ],
+)
+def test_identifiable_enums_and_codes_are_anonymised(rules, values, kind):
+    profile = profile_column(_column(values), rules)
+    assert profile.kind == kind
+    assert profile.action == ACTION_ANONYMISE
+
+
+def test_rare_emails_among_placeholders_are_anonymised(rules):
+    values = pd.Series(["n/a"] * 100_000, dtype=object)
+    values[::2000] = [f"user{i}@example.com" for i in range(50)]
+    profile = profile_column(values, rules)
+    assert profile.action == ACTION_ANONYMISE
+
+
+def test_email_or_phone_hit_forces_anonymise(rules):
+    values = _column(["2024-01-05", "2024-02-11", "2024-03-30"])
+    values[10] = "+34 600 123 456"
+    values[20] = "someone@example.com"
+    assert profile_column(values, rules).action == ACTION_ANONYMISE
+
+
+@pytest.mark.parametrize(
+    "values, kind",
+    [
+        (["2024-01-05", "2024-02-11", "2024-03-30"], "date"),
+        (["12", "3.5", "1e3", "-7"], "numeric_string"),
+        ([None, "", "   "], "empty"),
+    ],
+)
+def test_columns_without_identifiable_cells_are_skipped(rules, values, kind):
+    profile = profile_column(_column(values), rules)
+    assert profile.kind == kind
+    assert profile.action == ACTION_SKIP
+
+
+def test_excluded_values_are_skipped():
+    rules = RuleEngine(exclude=["^HR$", "^IT$"])
+    profile = profile_column(_column(["HR", "IT"]), rules)
+    assert profile.kind == "non_identifiable"
+    assert profile.action == ACTION_SKIP
+
+
+def _read_config(path: str) -> ConfigParser:
+    cfg = ConfigParser()
+    cfg.read(path, encoding="utf-8")
+    return cfg
+
+
+def test_plan_keeps_hand_edits(rules, tmp_path):
+    df = pd.DataFrame(
+        {
+            "owner": _column(["Alice", "Bob", "Carol"], 100),
+            "created": _column(["2024-01-05", "2024-02-11"], 100),
+            "orderid": [f"ORD-{i:04d}" for i in range(100)],
+        }
+    )
+    path = tmp_path / "clanto.clanto"
+    path.write_text(
+        "# keep these rules reviewed by legal\n"
+        "[column_plan:orders.csv]\n"
+        "# created is a date, nothing to hide\n"
+        "created = skip (date)\n"
+        "\n"
+        "[settings]\n"
+        "lazy = yes\n",
+        encoding="utf-8",
+    )
+    plan = ColumnPlan(rules, _read_config(str(path)), str(path))
+    assert plan.column_actions("orders.csv", df) == {
+        0: ACTION_ANONYMISE,
+        1: ACTION_SKIP,
+        2: ACTION_ANONYMISE,
+    }
+    assert plan.save() == 2
+    saved = path.read_text(encoding="utf-8")
+    assert saved.startswith("# keep these rules reviewed by legal\n")
+    assert "# created is a date, nothing to hide\n" in saved
+    assert "owner = anonymise (enum)" in saved
+    assert "orderid = anonymise (code)" in saved
+    assert saved.index("orderid") < saved.index("[settings]")
+    reloaded = _read_config(str(path))
+    assert reloaded.getboolean("settings", "lazy")
+    assert reloaded.get("column_plan:orders.csv", "created") == "skip (date)"
+
+    plan.cfg.set("column_plan:orders.csv", "orderid", "skip (code)")
+    edited = ColumnPlan(rules, plan.cfg, plan.path)
+    assert edited.column_actions("orders.csv", df)[2] == ACTION_SKIP
+
+
+def test_plan_round_trips_columns_configparser_would_split(rules, tmp_path):
+    columns = [
+        "ratio=a/b",
+        "Notes: free",
+        "[draft]",
+        "#tag",
+        ";memo",
+        " padded ",
+        "100%",
+        "two\nlines",
+    ]
+    df = pd.DataFrame({c: _column(["Alice", "Bob", "Carol"], 100) for c in columns})
+    path = str(tmp_path / "clanto.clanto")
+
+    plan = ColumnPlan(rules, path=path)
+    plan.column_actions("f.csv", df)
+    assert plan.save() == len(columns)
+
+    reloaded = ColumnPlan(rules, _read_config(path), path)
+    assert reloaded.actions == plan.actions
+    assert set(reloaded.actions["f.csv"]) == {c.lower() for c in columns}
+    assert reloaded.column_actions("f.csv", df) == dict.fromkeys(
+        range(len(columns)), ACTION_ANONYMISE
+    )
+    assert not reloaded.profiles
+    assert reloaded.save() == 0
+
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    option = encode_plan_key("ratio=a/b")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text.replace(f"{option} = anonymise", f"{option} = skip"))
+    edited = ColumnPlan(rules, _read_config(path), path)
+    assert edited.column_actions("f.csv", df)[0] == ACTION_SKIP
+    assert edited.save() == 0
+    assert _read_config(path).has_section("column_plan:f.csv")